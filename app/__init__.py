@@ -1,24 +1,99 @@
-from flask import Flask, jsonify
+from flask import Flask, g, jsonify
+from jinja2 import FileSystemBytecodeCache
 from app.config import config
+from app.conditional import add_validators, check_not_modified
 from app.db import close_db, test_connection
+from app.invalidation import invalidation_bus
+from app.metrics import metrics
+from app.page_cache import page_cache
+from app.serialization import FastJSONProvider
 import atexit
+import os
+
+# Process that last started its in-process index builds (see warm_memory_indexes)
+_warmed_pid = None
+
+
+class ShippedBytecodeCache(FileSystemBytecodeCache):
+    """Bytecode cache that tolerates read-only deployments (e.g. serverless)"""
+    
+    def get_cache_key(self, name, filename=None):
+        # Key on the template name only so bytecode built in a checkout still
+        # matches on the deployment host; stale sources fail the checksum check
+        return super().get_cache_key(name)
+    
+    def dump_bytecode(self, bucket):
+        try:
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+def memory_indexes(config):
+    """In-process indexes enabled by the configuration"""
+    from app.services.suggest_service import suggest_index
+    indexes = [suggest_index]
+    if config['SEARCH_ENGINE'] == 'bm25':
+        from app.services.search_service import search_index
+        indexes.append(search_index)
+    return indexes
+
+
+def warm_memory_indexes(config):
+    """
+    Start building this process's in-process indexes, once per process
+    Called from gunicorn's post_fork and on the first request, never from
+    create_app: a preloading server runs that in the master, whose build
+    every forked worker throws away.
+    """
+    global _warmed_pid
+    if _warmed_pid == os.getpid():
+        return
+    _warmed_pid = os.getpid()
+    for index in memory_indexes(config):
+        index.warm_in_background()
+
+
+def check_invalidation():
+    """before_request hook: pick up writes made elsewhere, unless the ASGI app already did off the loop"""
+    if not g.get('invalidation_checked'):
+        invalidation_bus.check()
 
 
 def create_app(config_name='default'):
     """Flask application factory"""
     app = Flask(__name__)
+    # orjson-backed JSON (when installed) that understands ObjectId/datetime
+    app.json = FastJSONProvider(app)
     
     # Load configuration based on environment
     app.config.from_object(config[config_name])
     
+    # Load precompiled template bytecode instead of compiling on first render
+    cache_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if cache_dir and os.path.isdir(cache_dir):
+        app.jinja_env.bytecode_cache = ShippedBytecodeCache(cache_dir)
+    
+    # Full-page cache for anonymous catalog views
+    page_cache.init_app(app)
+    
+    # Per-request timings and MongoDB command metrics; registered first so
+    # every other hook (and 304s, and cache hits) falls inside the measurement
+    metrics.init_app(app)
+    
+    # Pick up writes made by other workers/nodes before any cache is consulted,
+    # then answer unchanged catalog GETs with 304 before any query or render runs
+    app.before_request(check_invalidation)
+    app.before_request(check_not_modified)
+    
     # Add security headers to all responses
     @app.after_request
     def add_security_headers(response):
-        """Add security headers to all responses"""
+        """Add security headers and catalog cache validators to responses"""
         security_headers = app.config.get('SECURITY_HEADERS', {})
         for header, value in security_headers.items():
             response.headers[header] = value
-        return response
+        return add_validators(response)
     
     # Error handlers
     @app.errorhandler(404)
@@ -36,16 +111,52 @@ def create_app(config_name='default'):
     def health():
         """Health check endpoint for deployment platforms"""
         db_status = 'connected' if test_connection() else 'disconnected'
-        return jsonify({
+        body = {
             'status': 'ok',
             'database': db_status
-        }), 200 if db_status == 'connected' else 503
+        }
+        if db_status == 'connected':
+            from app.repositories.url_repo import url_repo
+            body['query_cache'] = url_repo.cache.stats()
+            body['page_cache'] = page_cache.stats()
+            body['invalidation'] = invalidation_bus.stats()
+            body['memory_indexes'] = {index.name: index.stats() for index in memory_indexes(app.config)}
+            if app.config['METADATA_FETCH']:
+                from app.services.metadata_service import metadata_pipeline
+                body['metadata'] = metadata_pipeline.stats()
+            if app.config['SLOW_QUERY_LOG']:
+                from app.slow_query_log import slow_query_log
+                body['slow_queries'] = slow_query_log.stats()
+        return jsonify(body), 200 if db_status == 'connected' else 503
     
     # Register routes
-    from app.routes import public, admin, auth
+    from app.routes import public, admin, auth, api, api_v1
     app.register_blueprint(public.bp)
     app.register_blueprint(admin.bp)
     app.register_blueprint(auth.bp)
+    app.register_blueprint(api.bp)
+    app.register_blueprint(api_v1.bp)
+    
+    # In-process indexes follow this process's writes incrementally and rebuild
+    # after other processes' writes; built off the request path in each worker
+    from app.repositories.url_repo import url_repo
+    for index in memory_indexes(app.config):
+        url_repo.add_write_listener(index)
+        invalidation_bus.subscribe(index.invalidate, own_writes=False)
+    if app.config['MEMORY_INDEX_PRELOAD']:
+        app.before_request(lambda: warm_memory_indexes(app.config))
+    
+    # Entries created without a title/description get them from their pages in the background
+    if app.config['METADATA_FETCH']:
+        from app.services.metadata_service import metadata_pipeline
+        url_repo.add_write_listener(metadata_pipeline)
+    
+    # The writing process drops its own query cache in touch_catalog
+    invalidation_bus.subscribe(url_repo.cache.invalidate, own_writes=False)
+    invalidation_bus.subscribe(page_cache.clear)
+    if app.config['SEARCH_ENGINE'] == 'bm25':
+        from app.services.search_service import search_index
+        url_repo.search_engine = search_index
     
     # Close DB connection on shutdown
     atexit.register(close_db)
@@ -0,0 +1,171 @@
+import asyncio
+import io
+import sys
+from flask import g
+from werkzeug.exceptions import HTTPException
+from app import create_app
+from app.db import close_db
+from app.invalidation import invalidation_bus
+from app.repositories.async_url_repo import async_url_repo
+from app.routes.async_views import ASYNC_VIEWS
+
+# Streamed bodies are coalesced into chunks of about this size before sending
+SEND_BUFFER_SIZE = 16 * 1024
+
+
+def build_environ(scope, body=b''):
+    """WSGI environ for an ASGI HTTP scope, so Flask's request context works unchanged"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    for raw_name, raw_value in scope['headers']:
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+            continue
+        key = f'HTTP_{name}'
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class AsyncServingApp:
+    """
+    ASGI application serving the catalog reads with async handlers
+    GET/HEAD requests routed to an endpoint in ASYNC_VIEWS run on the event
+    loop (Motor queries, async template streaming), inside a regular Flask
+    request context so hooks, sessions, error handlers and caches all behave
+    as in WSGI mode. Everything else (admin, auth, writes) goes to the Flask
+    app through asgiref's WsgiToAsgi, which runs it on a thread.
+    """
+    
+    def __init__(self, app, views=None):
+        self.app = app
+        self.views = ASYNC_VIEWS if views is None else views
+        self._wsgi = None
+    
+    @property
+    def wsgi(self):
+        if self._wsgi is None:
+            try:
+                from asgiref.wsgi import WsgiToAsgi
+            except ImportError:
+                raise RuntimeError("The async serving mode needs the 'asgiref' package: pip install asgiref")
+            self._wsgi = WsgiToAsgi(self.app)
+        return self._wsgi
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD'):
+            return await self.wsgi(scope, receive, send)
+        
+        environ = build_environ(scope)
+        try:
+            adapter = self.app.url_map.bind_to_environ(environ, server_name=self.app.config['SERVER_NAME'])
+            endpoint, view_args = adapter.match()
+        except HTTPException:
+            endpoint = None  # Redirects and 404s are Flask's to answer
+        view = self.views.get(endpoint)
+        if view is None:
+            return await self.wsgi(scope, receive, send)
+        
+        await self._dispatch(environ, endpoint, view, view_args, send)
+    
+    async def _dispatch(self, environ, endpoint, view, view_args, send):
+        """Full Flask request lifecycle around an async view"""
+        app = self.app
+        ctx = app.request_context(environ)
+        ctx.push()
+        error = None
+        try:
+            try:
+                # The bus may poll MongoDB and its subscribers clear caches on
+                # disk, so it runs on a thread; check_invalidation then skips it
+                await asyncio.to_thread(invalidation_bus.check)
+                g.invalidation_checked = True
+                if endpoint in app.config['CONDITIONAL_GET_ENDPOINTS']:
+                    # Prefetched here so check_not_modified doesn't block the loop
+                    g.catalog_version = await async_url_repo.get_catalog_version()
+                rv = app.preprocess_request()
+                if rv is None:
+                    rv = await view(**view_args)
+                response = app.make_response(rv)
+            except Exception as e:
+                response = self._handle_exception(e)
+            response = app.process_response(response)
+            await self._send(response, send, head=environ['REQUEST_METHOD'] == 'HEAD')
+            # What a WSGI server does after the last chunk: runs call_on_close callbacks
+            response.close()
+        except Exception as e:
+            # Headers may be out already; the ASGI server closes the connection
+            error = e
+            raise
+        finally:
+            ctx.pop(error)
+    
+    def _handle_exception(self, e):
+        """Flask's error handling: registered handlers first, then the 500 handler"""
+        try:
+            return self.app.make_response(self.app.handle_user_exception(e))
+        except Exception as unhandled:
+            return self.app.make_response(self.app.handle_exception(unhandled))
+    
+    async def _send(self, response, send, head=False):
+        """Send a Werkzeug response, streaming async (or sync) iterable bodies"""
+        headers = [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in response.headers.items()
+        ]
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+        
+        body = response.response
+        if head:
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        if not hasattr(body, '__aiter__'):
+            await send({'type': 'http.response.body', 'body': response.get_data()})
+            return
+        
+        buffer = []
+        size = 0
+        async for chunk in body:
+            data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+            buffer.append(data)
+            size += len(data)
+            if size >= SEND_BUFFER_SIZE:
+                await send({'type': 'http.response.body', 'body': b''.join(buffer), 'more_body': True})
+                buffer = []
+                size = 0
+        await send({'type': 'http.response.body', 'body': b''.join(buffer)})
+    
+    async def _lifespan(self, receive, send):
+        """Startup/shutdown events: close the Mongo clients on the way out"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                close_db()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def create_asgi_app(config_name='default'):
+    """ASGI application factory (run with an ASGI server, e.g. uvicorn asgi:app)"""
+    return AsyncServingApp(create_app(config_name))
@@ -0,0 +1,74 @@
+import hashlib
+import os
+from datetime import timezone
+from flask import current_app, g, request, session
+from app.services.auth_service import is_logged_in
+
+_template_digest = None
+
+
+def _templates_digest():
+    """Short hash of the template sources, so a deploy changes every ETag"""
+    global _template_digest
+    if _template_digest is None:
+        digest = hashlib.sha1()
+        folder = os.path.join(current_app.root_path, current_app.template_folder)
+        for name in sorted(os.listdir(folder)):
+            if name.endswith('.html'):
+                with open(os.path.join(folder, name), 'rb') as f:
+                    digest.update(f.read())
+        _template_digest = digest.hexdigest()[:8]
+    return _template_digest
+
+
+def check_not_modified():
+    """
+    before_request hook: answer 304 for catalog GETs the client already has
+    Validators come from the stored catalog version, so no listing query
+    or template render runs for a match.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    if request.endpoint not in current_app.config['CONDITIONAL_GET_ENDPOINTS']:
+        return None
+    if session.get('_flashes'):
+        # Pending flash messages must be rendered (and consumed)
+        return None
+    
+    if 'catalog_version' in g:
+        # Already fetched without blocking by the async serving mode
+        version, updated_at = g.catalog_version
+    else:
+        from app.repositories.url_repo import url_repo
+        version, updated_at = url_repo.get_catalog_version()
+    viewer = 'admin' if is_logged_in() else 'anon'
+    g.catalog_etag = f"{version}-{_templates_digest()}-{viewer}"
+    g.catalog_last_modified = updated_at
+    
+    if request.if_none_match:
+        # If-None-Match takes precedence over If-Modified-Since
+        not_modified = request.if_none_match.contains_weak(g.catalog_etag)
+    elif request.if_modified_since and updated_at:
+        last_modified = updated_at.replace(microsecond=0, tzinfo=timezone.utc)
+        not_modified = last_modified <= request.if_modified_since
+    else:
+        not_modified = False
+    
+    if not_modified:
+        return current_app.response_class(status=304)
+    return None
+
+
+def add_validators(response):
+    """after_request hook: attach ETag/Last-Modified to catalog responses"""
+    etag = g.get('catalog_etag')
+    if etag is None or response.status_code not in (200, 304):
+        return response
+    
+    response.set_etag(etag, weak=True)
+    if g.get('catalog_last_modified'):
+        response.last_modified = g.catalog_last_modified.replace(tzinfo=timezone.utc)
+    if 'Cache-Control' not in response.headers:
+        # Let clients keep the page but revalidate it on every use
+        response.cache_control.no_cache = True
+    return response
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,12 +12,117 @@ class Config:
     ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'admin')
     ADMIN_PASSWORD_HASH = os.getenv('ADMIN_PASSWORD_HASH', '')
     
+    # MongoDB client (one per worker process; keep the pool >= gunicorn threads)
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 20))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 60000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 10000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 10000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 10000))
+    # Wire compression in preference order; zstd/snappy are used only if installed
+    MONGO_COMPRESSORS = os.getenv('MONGO_COMPRESSORS', 'zstd,snappy,zlib')
+    # Reconnect backoff after a failed connection attempt (seconds)
+    MONGO_RETRY_BASE_DELAY = float(os.getenv('MONGO_RETRY_BASE_DELAY', 0.5))
+    MONGO_RETRY_MAX_DELAY = float(os.getenv('MONGO_RETRY_MAX_DELAY', 30))
+    # Check the index-schema marker in the background after connecting; disable
+    # on serverless and run scripts/ensure_indexes.py at deploy time instead
+    MONGO_AUTO_INDEXES = os.getenv('MONGO_AUTO_INDEXES', 'true').lower() == 'true'
+    
+    # Precompiled Jinja bytecode (built by scripts/compile_templates.py)
+    JINJA_BYTECODE_CACHE_DIR = os.getenv(
+        'JINJA_BYTECODE_CACHE_DIR',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jinja_cache')
+    )
+    
     # Session configuration
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
     SESSION_COOKIE_SECURE = os.getenv('FLASK_ENV') == 'production'
     PERMANENT_SESSION_LIFETIME = 3600  # 1 hour
     
+    # Public catalog streaming: documents fetched per Mongo round trip
+    CATALOG_BATCH_SIZE = int(os.getenv('CATALOG_BATCH_SIZE', 200))
+    
+    # Views answered with 304 Not Modified when the catalog version is unchanged
+    CONDITIONAL_GET_ENDPOINTS = ('public.index', 'public.url_detail', 'api_v1.list_urls', 'api_v1.get_url')
+    
+    # Full-page cache for anonymous catalog views: 'memory' (per worker),
+    # 'filesystem' (shared by all workers on a node) or 'none'
+    PAGE_CACHE_BACKEND = os.getenv('PAGE_CACHE_BACKEND', 'memory')
+    # Must be private to the app's user (created 0o700; refused if shared)
+    PAGE_CACHE_DIR = os.getenv('PAGE_CACHE_DIR', os.path.join(
+        tempfile.gettempdir(), f"url_organizer_pages-{os.getuid()}" if hasattr(os, 'getuid') else 'url_organizer_pages'
+    ))
+    PAGE_CACHE_MAX_ENTRIES = int(os.getenv('PAGE_CACHE_MAX_ENTRIES', 128))
+    PAGE_CACHE_MAX_BYTES = int(os.getenv('PAGE_CACHE_MAX_BYTES', 2 * 1024 * 1024))  # per page
+    PAGE_CACHE_TTL = int(os.getenv('PAGE_CACHE_TTL', 300))  # seconds
+    # Cache-Control for anonymous pages: browsers revalidate, a CDN may reuse briefly
+    PAGE_CACHE_MAX_AGE = int(os.getenv('PAGE_CACHE_MAX_AGE', 0))
+    PAGE_CACHE_SHARED_MAX_AGE = int(os.getenv('PAGE_CACHE_SHARED_MAX_AGE', 60))
+    
+    # In-process indexes (suggestions, search) built from the urls collection
+    MEMORY_INDEX_PRELOAD = os.getenv('MEMORY_INDEX_PRELOAD', 'true').lower() == 'true'  # build in the background at startup
+    MEMORY_INDEX_MAX_AGE = int(os.getenv('MEMORY_INDEX_MAX_AGE', 300))  # seconds before a background rebuild
+    # Build (or rebuild) an index when a query finds it missing or expired; off on
+    # serverless platforms, which freeze the build thread once the response is sent
+    MEMORY_INDEX_ON_DEMAND = os.getenv('MEMORY_INDEX_ON_DEMAND', 'true').lower() == 'true'
+    
+    # Search-box prefix suggestions (/api/suggest)
+    SUGGEST_TITLE_WORDS = int(os.getenv('SUGGEST_TITLE_WORDS', 6))  # title words a suggestion can start at
+    SUGGEST_MAX_RESULTS = 10
+    
+    # Search backend: 'bm25' (in-process ranked index, $text until it is built) or 'text' (Mongo $text only)
+    SEARCH_ENGINE = os.getenv('SEARCH_ENGINE', 'bm25')
+    
+    # Cross-worker cache invalidation: 'file' (generation counter shared by every
+    # process on this machine) or 'memory' (single process only)
+    INVALIDATION_BACKEND = os.getenv('INVALIDATION_BACKEND', 'file')
+    # Its directory must be private to the app's user, like PAGE_CACHE_DIR
+    INVALIDATION_FILE = os.getenv('INVALIDATION_FILE', os.path.join(
+        tempfile.gettempdir(), f"url_organizer-{os.getuid()}" if hasattr(os, 'getuid') else 'url_organizer', 'generation'
+    ))
+    # Multi-node deployments: also publish/poll events in a capped Mongo collection
+    INVALIDATION_MONGO_LOG = os.getenv('INVALIDATION_MONGO_LOG', 'false').lower() == 'true'
+    INVALIDATION_POLL_INTERVAL = float(os.getenv('INVALIDATION_POLL_INTERVAL', 2.0))  # seconds
+    INVALIDATION_NODE_ID = os.getenv('INVALIDATION_NODE_ID', '')  # defaults to the hostname
+    
+    # Filtered result counts stop here and display as "1000+" (0 = always exact)
+    COUNT_LIMIT = int(os.getenv('COUNT_LIMIT', 1000)) or None
+    
+    # Repository query cache (set either to 0 to disable)
+    QUERY_CACHE_MAX_ENTRIES = int(os.getenv('QUERY_CACHE_MAX_ENTRIES', 256))
+    QUERY_CACHE_TTL = int(os.getenv('QUERY_CACHE_TTL', 60))  # seconds
+    
+    # Documents per insert_many round trip in URLRepository.create_many
+    BULK_INSERT_CHUNK_SIZE = int(os.getenv('BULK_INSERT_CHUNK_SIZE', 1000))
+    
+    # Link-health checker (scripts/check_links.py)
+    LINK_CHECK_CONCURRENCY = int(os.getenv('LINK_CHECK_CONCURRENCY', 100))  # requests in flight
+    LINK_CHECK_PER_DOMAIN = int(os.getenv('LINK_CHECK_PER_DOMAIN', 4))  # requests in flight per domain
+    LINK_CHECK_TIMEOUT = float(os.getenv('LINK_CHECK_TIMEOUT', 10.0))  # seconds per attempt
+    LINK_CHECK_RETRIES = int(os.getenv('LINK_CHECK_RETRIES', 2))
+    
+    # Background page metadata for new entries (app/services/metadata_service.py)
+    METADATA_FETCH = os.getenv('METADATA_FETCH', 'true').lower() == 'true'
+    METADATA_WORKERS = int(os.getenv('METADATA_WORKERS', 4))  # fetch threads per process
+    METADATA_QUEUE_SIZE = int(os.getenv('METADATA_QUEUE_SIZE', 1000))  # entries waiting; more are dropped
+    METADATA_TIMEOUT = float(os.getenv('METADATA_TIMEOUT', 5.0))  # seconds per page
+    METADATA_MAX_BYTES = int(os.getenv('METADATA_MAX_BYTES', 262144))  # read at most this much looking for </head>
+    METADATA_CACHE_SIZE = int(os.getenv('METADATA_CACHE_SIZE', 2048))  # pages, keyed by normalized URL
+    METADATA_CACHE_TTL = int(os.getenv('METADATA_CACHE_TTL', 86400))  # seconds
+    
+    # Request and MongoDB command metrics at /metrics (Prometheus text format)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')  # "Authorization: Bearer <token>"; /metrics is a 404 without one
+    METRICS_MONGO_BYTES = os.getenv('METRICS_MONGO_BYTES', 'false').lower() == 'true'  # re-encodes every reply
+    SERVER_TIMING = os.getenv('SERVER_TIMING', 'false').lower() == 'true'  # db/render/total timings per response
+    
+    # Commands slower than SLOW_QUERY_MS are sampled, with explain plans, into the capped slow_queries collection
+    SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', 'true').lower() == 'true'
+    SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', 100))
+    SLOW_QUERY_EXPLAIN_INTERVAL = int(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', 300))  # seconds between explains of one shape
+    SLOW_QUERY_LOG_BYTES = int(os.getenv('SLOW_QUERY_LOG_BYTES', 8 * 1024 * 1024))  # capped collection size
+    
     # Security headers
     SECURITY_HEADERS = {
         'X-Content-Type-Options': 'nosniff',
@@ -1,82 +1,283 @@
-from pymongo import MongoClient, ASCENDING, TEXT
+from pymongo import MongoClient, ASCENDING, DESCENDING, TEXT
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
-from dotenv import load_dotenv
+from app.config import Config
+from datetime import datetime
+import importlib.util
 import os
+import threading
+import time
 
-# Load environment variables
-load_dotenv()
+# Bump whenever _ensure_indexes changes so existing databases pick up the new indexes
+INDEX_SCHEMA_VERSION = 5
 
+# Per-process connection state; reset in forked children (see _reset_state)
 _client = None
 _db = None
-_connection_attempted = False
+_pid = None
+_lock = threading.Lock()
+_failures = 0
+_retry_at = 0.0
+_indexes_checked = False
+
+# Async (Motor) client for the ASGI serving mode; bound to one event loop per process
+_async_client = None
+_async_db = None
+_async_owner = None
+
+# Wire compressors and the optional package each one needs
+_COMPRESSOR_MODULES = {
+    'zstd': 'zstandard',
+    'snappy': 'snappy',
+    'zlib': None
+}
 
 
 def get_db():
-    """Get database connection singleton (lazy initialization)"""
-    global _client, _db, _connection_attempted
+    """Get this process's database connection (lazy, fork-safe, retried with backoff)"""
+    global _client, _db, _pid, _failures, _retry_at
+    
+    if _pid != os.getpid():
+        # Inherited from a parent process: never reuse its sockets
+        _reset_state()
     
     if _db is not None:
         return _db
     
-    if _connection_attempted and _db is None:
-        # Already tried and failed, raise error
-        raise ConnectionFailure("MongoDB connection not available. Check your MONGO_URI in .env file.")
-    
-    mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017/url_organizer')
-    _connection_attempted = True
-    
-    try:
-        # Increase timeout for Atlas connections
-        _client = MongoClient(
-            mongo_uri,
-            serverSelectionTimeoutMS=10000,
-            connectTimeoutMS=10000,
-            socketTimeoutMS=10000
-        )
+    with _lock:
+        if _db is not None:
+            return _db
         
-        # Test connection
-        _client.admin.command('ping')
+        wait = _retry_at - time.monotonic()
+        if wait > 0:
+            raise ConnectionFailure(
+                f"MongoDB connection not available (next retry in {wait:.1f}s). Check your MONGO_URI in .env file."
+            )
         
-        # Extract database name from URI or use default
-        db_name = mongo_uri.split('/')[-1].split('?')[0] or 'url_organizer'
-        _db = _client[db_name]
+        mongo_uri = Config.MONGO_URI
+        client = None
         
-        # Create indexes
-        _ensure_indexes()
-        
-        print(f"✓ Connected to MongoDB: {db_name}")
-        return _db
+        try:
+            client = MongoClient(mongo_uri, **_client_options())
+            
+            # Test connection
+            client.admin.command('ping')
+            
+            # Extract database name from URI or use default
+            db_name = mongo_uri.split('/')[-1].split('?')[0] or 'url_organizer'
+            db = client[db_name]
+            
+            _client, _db, _pid = client, db, os.getpid()
+            _failures = 0
+            _retry_at = 0.0
+            
+            print(f"✓ Connected to MongoDB: {db_name} (pid {_pid})")
+            
+            if Config.MONGO_AUTO_INDEXES:
+                _check_indexes_in_background(db)
+            return _db
         
+        except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            if client is not None:
+                client.close()
+            
+            # Exponential backoff instead of giving up for the life of the process
+            _failures += 1
+            delay = min(Config.MONGO_RETRY_MAX_DELAY, Config.MONGO_RETRY_BASE_DELAY * 2 ** (_failures - 1))
+            _retry_at = time.monotonic() + delay
+            
+            print(f"✗ MongoDB connection failed (attempt {_failures}, retrying in {delay:.1f}s): {e}")
+            print("\n💡 Troubleshooting tips:")
+            print("   1. Check your MONGO_URI in .env file")
+            print("   2. Ensure MongoDB Atlas cluster is running")
+            print("   3. Verify network access (whitelist your IP in Atlas)")
+            print("   4. Check username and password are correct\n")
+            raise
+
+
+async def get_async_db():
+    """Get the Motor database for the running event loop (ASGI mode; needs the motor package)"""
+    global _async_client, _async_db, _async_owner
+    
+    import asyncio
+    owner = (os.getpid(), asyncio.get_running_loop())
+    if _async_db is not None and _async_owner == owner:
+        return _async_db
+    
+    try:
+        from motor.motor_asyncio import AsyncIOMotorClient
+    except ImportError:
+        raise RuntimeError("The async serving mode needs the 'motor' package: pip install motor")
+    
+    mongo_uri = Config.MONGO_URI
+    client = AsyncIOMotorClient(mongo_uri, **_client_options())
+    try:
+        await client.admin.command('ping')
     except (ConnectionFailure, ServerSelectionTimeoutError) as e:
-        print(f"✗ MongoDB connection failed: {e}")
-        print("\n💡 Troubleshooting tips:")
-        print("   1. Check your MONGO_URI in .env file")
-        print("   2. Ensure MongoDB Atlas cluster is running")
-        print("   3. Verify network access (whitelist your IP in Atlas)")
-        print("   4. Check username and password are correct\n")
-        _db = None
+        client.close()
+        print(f"✗ MongoDB (async) connection failed: {e}")
         raise
+    
+    if _async_db is not None and _async_owner == owner:
+        # Another request connected while this one was pinging
+        client.close()
+        return _async_db
+    
+    db_name = mongo_uri.split('/')[-1].split('?')[0] or 'url_organizer'
+    _async_client, _async_db, _async_owner = client, client[db_name], owner
+    print(f"✓ Connected to MongoDB (async): {db_name} (pid {owner[0]})")
+    return _async_db
+
+
+def _client_options():
+    """MongoClient keyword arguments built from Config"""
+    options = {
+        'maxPoolSize': Config.MONGO_MAX_POOL_SIZE,
+        'minPoolSize': Config.MONGO_MIN_POOL_SIZE,
+        'maxIdleTimeMS': Config.MONGO_MAX_IDLE_TIME_MS,
+        'serverSelectionTimeoutMS': Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        'connectTimeoutMS': Config.MONGO_CONNECT_TIMEOUT_MS,
+        'socketTimeoutMS': Config.MONGO_SOCKET_TIMEOUT_MS
+    }
+    
+    compressors = _available_compressors(Config.MONGO_COMPRESSORS)
+    if compressors:
+        options['compressors'] = ','.join(compressors)
+    
+    listeners = []
+    if Config.METRICS_ENABLED:
+        from app.metrics import metrics
+        listeners.append(metrics.listener)
+    if Config.SLOW_QUERY_LOG:
+        from app.slow_query_log import slow_query_log
+        listeners.append(slow_query_log)
+    if listeners:
+        options['event_listeners'] = listeners
+    
+    return options
 
 
-def _ensure_indexes():
+def _available_compressors(names):
+    """Keep the configured compressors whose optional package is installed"""
+    available = []
+    for name in (n.strip().lower() for n in names.split(',')):
+        if name not in _COMPRESSOR_MODULES:
+            continue
+        module = _COMPRESSOR_MODULES[name]
+        if module is None or importlib.util.find_spec(module) is not None:
+            available.append(name)
+    return available
+
+
+def ensure_indexes(db=None, force=False):
+    """
+    Create indexes unless the stored index-schema marker is already current
+    Returns True if indexes were (re)created
+    """
+    db = db if db is not None else get_db()
+    
+    marker = db.meta.find_one({'_id': 'index_schema'})
+    if not force and marker and marker.get('version', 0) >= INDEX_SCHEMA_VERSION:
+        return False
+    
+    _ensure_indexes(db)
+    db.meta.update_one(
+        {'_id': 'index_schema'},
+        {'$set': {'version': INDEX_SCHEMA_VERSION, 'updated_at': datetime.utcnow()}},
+        upsert=True
+    )
+    return True
+
+
+def _check_indexes_in_background(db):
+    """Check the index-schema marker at most once per process, off the request path"""
+    global _indexes_checked
+    if _indexes_checked:
+        return
+    _indexes_checked = True
+    
+    def run():
+        try:
+            if ensure_indexes(db):
+                print(f"✓ MongoDB indexes updated to schema v{INDEX_SCHEMA_VERSION}")
+        except Exception as e:
+            print(f"✗ MongoDB index check failed: {e}")
+    
+    threading.Thread(target=run, name='ensure-indexes', daemon=True).start()
+
+
+def _ensure_indexes(db):
     """Create necessary database indexes"""
-    urls = _db.urls
+    urls = db.urls
     
     # Unique sparse index on URL (only applies to single URLs, not collections)
     # Sparse index allows documents without 'url' field (collections with 'urls' array)
     urls.create_index([('url', ASCENDING)], unique=True, sparse=True)
     
+    # Multikey index over the canonical hash of every link (single URL or collection
+    # items); backs the duplicate checks in create/create_many/update and the report
+    urls.create_index([('url_hashes', ASCENDING)], name='url_hashes')
+    
     # Text index for search
     urls.create_index([
         ('title', TEXT),
         ('description', TEXT)
     ], name='text_search')
     
-    # Index for tag filtering
-    urls.create_index([('tags', ASCENDING)])
+    # Tag and domain filters match on the multikey prefix and walk the rest in
+    # listing order, so filtered pages and $facet counts share one index each;
+    # they supersede the single-field tags_1 and domains indexes
+    urls.create_index(
+        [('tags', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+        name='tags_created_at_id'
+    )
+    urls.create_index(
+        [('domains', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+        name='domains_created_at_id'
+    )
+    existing = urls.index_information()
+    for name in ('tags_1', 'domains'):
+        if name in existing:
+            urls.drop_index(name)
     
     # Index for sorting by creation date
     urls.create_index([('created_at', ASCENDING)])
+    
+    # Compound index backing keyset pagination on (created_at, _id)
+    urls.create_index([('created_at', DESCENDING), ('_id', DESCENDING)], name='created_at_id')
+    
+    # Dashboard "broken links" filter; only documents with failures are indexed
+    urls.create_index(
+        [('broken_links', ASCENDING)],
+        name='broken_links',
+        partialFilterExpression={'broken_links': {'$gt': 0}}
+    )
+    
+    # Materialized tag and domain counts are listed by popularity
+    db.tag_counts.create_index([('count', DESCENDING)])
+    db.domain_counts.create_index([('count', DESCENDING)])
+
+
+def _reset_state():
+    """Forget connection state without closing it (it may belong to a parent process)"""
+    global _client, _db, _pid, _lock, _failures, _retry_at, _async_client, _async_db, _async_owner
+    _client = None
+    _db = None
+    _async_client = None
+    _async_db = None
+    _async_owner = None
+    _pid = os.getpid()
+    _lock = threading.Lock()
+    _failures = 0
+    _retry_at = 0.0
+
+
+def reset_after_fork():
+    """Drop any client inherited across fork (called from gunicorn's post_fork hook)"""
+    _reset_state()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_state)
 
 
 def test_connection():
@@ -91,9 +292,13 @@ def test_connection():
 
 def close_db():
     """Close database connection"""
-    global _client, _db, _connection_attempted
-    if _client:
+    global _client, _db, _async_client, _async_db, _async_owner
+    if _client and _pid == os.getpid():
         _client.close()
-        _client = None
-        _db = None
-        _connection_attempted = False
+    _client = None
+    _db = None
+    if _async_client and _async_owner[0] == os.getpid():
+        _async_client.close()
+    _async_client = None
+    _async_db = None
+    _async_owner = None
@@ -0,0 +1,248 @@
+import mmap
+import os
+import socket
+import stat
+import struct
+import threading
+import time
+from datetime import datetime
+from pymongo.errors import CollectionInvalid, PyMongoError
+from app.config import Config
+from app.db import get_db
+from app.page_cache import private_directory
+
+try:
+    import fcntl
+except ImportError:  # Windows: no shared counter, fall back to MemoryGeneration
+    fcntl = None
+
+_COUNTER = struct.Struct('<Q')
+
+
+class MemoryGeneration:
+    """Process-local generation counter (single-process servers and tests)"""
+    
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+    
+    def read(self):
+        return self._value
+    
+    def bump(self):
+        """Increment; returns (previous, new)"""
+        with self._lock:
+            self._value += 1
+            return self._value - 1, self._value
+    
+    def describe(self):
+        return 'memory'
+
+
+class FileGeneration:
+    """
+    Generation counter in a small file mapped into every process on the machine
+    Reads are a single unpack from shared memory; bumps take an flock so
+    concurrent writers in different workers never lose an increment. The
+    file must sit in a private directory and belong to this user alone,
+    otherwise another account could pin or bump the counter; _open raises
+    ValueError when it doesn't.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._map = None
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    def _open(self):
+        if self._pid != os.getpid():
+            # Reopen after fork: flock is per open file, so children need their own
+            private_directory(os.path.dirname(self.path) or '.')
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+            info = os.fstat(fd)
+            if (not stat.S_ISREG(info.st_mode) or info.st_uid != os.geteuid()
+                    or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+                os.close(fd)
+                raise ValueError(f"{self.path} is not a regular file writable only by this user")
+            if info.st_size < _COUNTER.size:
+                os.ftruncate(fd, _COUNTER.size)
+            self._fd = fd
+            self._map = mmap.mmap(fd, _COUNTER.size)
+            self._pid = os.getpid()
+            self._lock = threading.Lock()
+        return self._map
+    
+    def read(self):
+        return _COUNTER.unpack_from(self._open(), 0)[0]
+    
+    def bump(self):
+        """Increment under an exclusive file lock; returns (previous, new)"""
+        shared = self._open()
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                previous = _COUNTER.unpack_from(shared, 0)[0]
+                _COUNTER.pack_into(shared, 0, previous + 1)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return previous, previous + 1
+    
+    def describe(self):
+        return f'file:{self.path}'
+
+
+class MongoEventLog:
+    """
+    Invalidation events in a capped collection, for deployments spanning machines
+    Each node polls for events published by other nodes at most once per
+    poll_interval; workers on the same node already share the file counter.
+    """
+    
+    collection_name = 'invalidation_log'
+    
+    def __init__(self, node_id, poll_interval=2.0, size_bytes=1024 * 1024):
+        self.node_id = node_id
+        self.poll_interval = poll_interval
+        self.size_bytes = size_bytes
+        self._last_id = None
+        self._primed = False
+        self._next_poll = 0.0
+        self._created = False
+        self._lock = threading.Lock()
+    
+    def _collection(self):
+        db = get_db()
+        if not self._created:
+            try:
+                db.create_collection(self.collection_name, capped=True, size=self.size_bytes)
+            except CollectionInvalid:
+                pass  # Already exists
+            self._created = True
+        return db[self.collection_name]
+    
+    def publish(self, generation):
+        """Record that this node changed the catalog"""
+        self._collection().insert_one({
+            'node': self.node_id,
+            'pid': os.getpid(),
+            'generation': generation,
+            'at': datetime.utcnow()
+        })
+    
+    def poll(self):
+        """True if another node published an event since the last poll (rate limited, never blocks)"""
+        now = time.monotonic()
+        if now < self._next_poll or not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_poll = now + self.poll_interval
+            # Capped collections keep insertion order, so $natural needs no index
+            recent = list(self._collection().find({}, {'node': 1}).sort('$natural', -1).limit(100))
+            remote = False
+            for event in recent:
+                if event['_id'] == self._last_id:
+                    break
+                if event['node'] != self.node_id:
+                    remote = True
+            if recent:
+                self._last_id = recent[0]['_id']
+            # The first poll only records where the log stands
+            primed, self._primed = self._primed, True
+            return remote and primed
+        finally:
+            self._lock.release()
+
+
+class InvalidationBus:
+    """
+    Cross-worker invalidation for in-process caches
+    url_repo bumps a shared generation counter on every write; check() runs
+    before each request and notifies subscribers when another process (or,
+    with the Mongo event log, another node) has written since it last looked.
+    """
+    
+    def __init__(self, counter, event_log=None):
+        self.counter = counter
+        self.event_log = event_log
+        self._subscribers = []
+        self._seen = counter.read()
+    
+    def subscribe(self, callback, own_writes=True):
+        """
+        Call callback() whenever the catalog changes
+        With own_writes=False it only runs for writes made by other processes,
+        for caches the writing process already updates incrementally.
+        """
+        self._subscribers.append((callback, own_writes))
+    
+    def bump(self):
+        """Record a write made by this process and notify local subscribers"""
+        previous, generation = self.counter.bump()
+        # Someone else wrote since our last check if the counter moved without us
+        missed = previous != self._seen
+        self._seen = generation
+        
+        if self.event_log is not None:
+            try:
+                self.event_log.publish(generation)
+            except PyMongoError as e:
+                print(f"✗ Invalidation event not published: {e}")
+        
+        self._notify(remote=missed, local=True)
+    
+    def check(self):
+        """Cheap per-request check for writes made elsewhere"""
+        generation = self.counter.read()
+        remote = generation != self._seen
+        self._seen = generation
+        
+        if self.event_log is not None:
+            try:
+                remote = self.event_log.poll() or remote
+            except PyMongoError as e:
+                print(f"✗ Invalidation log poll failed: {e}")
+        
+        if remote:
+            self._notify(remote=True, local=False)
+    
+    def _notify(self, remote, local):
+        for callback, own_writes in self._subscribers:
+            if remote or (local and own_writes):
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"✗ Invalidation subscriber failed: {e}")
+    
+    def stats(self):
+        """Counter state for /health"""
+        return {
+            'backend': self.counter.describe(),
+            'generation': self._seen,
+            'mongo_log': self.event_log is not None
+        }
+
+
+def _create_bus():
+    """Build the bus described by Config"""
+    counter = MemoryGeneration()
+    if Config.INVALIDATION_BACKEND == 'file' and fcntl is not None:
+        try:
+            shared = FileGeneration(Config.INVALIDATION_FILE)
+            shared.read()
+            counter = shared
+        except (OSError, ValueError) as e:
+            print(f"✗ Shared invalidation counter unavailable, caches are per process: {e}")
+    
+    event_log = None
+    if Config.INVALIDATION_MONGO_LOG:
+        event_log = MongoEventLog(
+            node_id=Config.INVALIDATION_NODE_ID or socket.gethostname(),
+            poll_interval=Config.INVALIDATION_POLL_INTERVAL
+        )
+    return InvalidationBus(counter, event_log)
+
+
+# Shared instance; url_repo bumps it, create_app subscribes the cache layers
+invalidation_bus = _create_bus()
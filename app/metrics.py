@@ -0,0 +1,316 @@
+import bson
+import contextvars
+import hmac
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, abort, before_render_template, current_app, jsonify, request, template_rendered
+from pymongo import monitoring
+
+PREFIX = 'url_organizer'
+
+# Histogram bucket upper bounds
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COMMAND_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+# Tally of the request running in this thread (or asyncio task)
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class Histogram:
+    """Prometheus-style histogram; callers hold the registry lock"""
+    
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+    
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def samples(self):
+        """(le, cumulative count) pairs ending with +Inf"""
+        running = 0
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts):
+            running += count
+            yield bound, running
+
+
+class CommandStats:
+    """Totals for one MongoDB command name"""
+    
+    __slots__ = ('count', 'failures', 'duration', 'bytes_sent', 'bytes_received')
+    
+    def __init__(self):
+        self.count = 0
+        self.failures = 0
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+
+class RequestTally:
+    """MongoDB work and render time of one request"""
+    
+    __slots__ = ('started', 'commands', 'db_seconds', 'bytes_sent', 'bytes_received', 'render_seconds',
+                 'render_started', 'render_db_seconds')
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.commands = 0
+        self.db_seconds = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.render_seconds = 0.0
+        self.render_started = None
+        self.render_db_seconds = 0.0
+    
+    def server_timing(self):
+        """Server-Timing header value for the work done so far"""
+        total = time.perf_counter() - self.started
+        parts = [f'db;dur={self.db_seconds * 1000:.1f};desc="{self.commands} commands"']
+        if self.render_seconds:
+            parts.append(f'render;dur={self.render_seconds * 1000:.1f}')
+        parts.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(parts)
+
+
+class CommandCollector(monitoring.CommandListener):
+    """
+    pymongo command listener feeding Metrics
+    Events fire on the thread that ran the command, so synchronous queries
+    are attributed to the current request as well as to the process totals.
+    """
+    
+    def __init__(self, metrics):
+        self.metrics = metrics
+    
+    def started(self, event):
+        metrics = self.metrics
+        if not (metrics.enabled and metrics.count_bytes):
+            return
+        size = len(bson.encode(event.command))
+        with metrics._lock:
+            metrics._command(event.command_name).bytes_sent += size
+        tally = _current.get()
+        if tally is not None:
+            tally.bytes_sent += size
+    
+    def succeeded(self, event):
+        size = 0
+        if self.metrics.enabled and self.metrics.count_bytes:
+            raw = getattr(event.reply, 'raw', None)
+            size = len(raw) if raw is not None else len(bson.encode(event.reply))
+        self._record(event, False, size)
+    
+    def failed(self, event):
+        self._record(event, True, 0)
+    
+    def _record(self, event, failed, size):
+        metrics = self.metrics
+        if not metrics.enabled:
+            return
+        seconds = event.duration_micros / 1e6
+        with metrics._lock:
+            stats = metrics._command(event.command_name)
+            stats.count += 1
+            stats.failures += failed
+            stats.duration.observe(seconds)
+            stats.bytes_received += size
+        tally = _current.get()
+        if tally is not None:
+            tally.commands += 1
+            tally.db_seconds += seconds
+            tally.bytes_received += size
+
+
+class Metrics:
+    """
+    Process-wide request and MongoDB metrics, exposed at /metrics
+    Each request gets a RequestTally; its totals (time, MongoDB commands,
+    MongoDB time and bytes, template render time) are recorded when the
+    response is closed, so streamed pages are measured to their last byte.
+    Every worker process keeps its own numbers.
+    """
+    
+    def __init__(self):
+        self.enabled = False
+        self.count_bytes = False
+        self.server_timing = False
+        self.listener = CommandCollector(self)
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+    
+    def _reset(self):
+        """Start from zero (also in forked children, which must not report the parent's counts)"""
+        self._lock = threading.Lock()
+        self.commands = {}
+        self.requests = {}
+        self.request_duration = {}
+        self.render_duration = {}
+        self.db_duration = {}
+        self.db_commands = {}
+        self.db_bytes = {}
+    
+    def _command(self, name):
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        return stats
+    
+    def init_app(self, app):
+        """Install the request hooks and the /metrics endpoint when METRICS_ENABLED is set"""
+        self.enabled = app.config['METRICS_ENABLED']
+        self.count_bytes = app.config['METRICS_MONGO_BYTES']
+        self.server_timing = app.config['SERVER_TIMING']
+        if not self.enabled:
+            return
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+        app.add_url_rule('/metrics', 'metrics', self.view)
+    
+    def start_request(self):
+        """before_request hook: open a tally for this request"""
+        if self.enabled:
+            _current.set(RequestTally())
+    
+    def finish_request(self, response):
+        """after_request hook: add Server-Timing and record the totals once the body has been sent"""
+        tally = _current.get()
+        if tally is None:
+            return response
+        if self.server_timing:
+            response.headers['Server-Timing'] = tally.server_timing()
+        key = (request.endpoint or 'none', request.method, response.status_code)
+        response.call_on_close(lambda: self._observe(tally, key))
+        return response
+    
+    def _observe(self, tally, key):
+        endpoint = key[0]
+        total = time.perf_counter() - tally.started
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+            for series, buckets, value in (
+                (self.request_duration, DURATION_BUCKETS, total),
+                (self.render_duration, DURATION_BUCKETS, tally.render_seconds),
+                (self.db_duration, DURATION_BUCKETS, tally.db_seconds),
+                (self.db_commands, COMMAND_COUNT_BUCKETS, tally.commands)
+            ):
+                histogram = series.get(endpoint)
+                if histogram is None:
+                    histogram = series[endpoint] = Histogram(buckets)
+                histogram.observe(value)
+            if self.count_bytes:
+                sent, received = self.db_bytes.get(endpoint, (0, 0))
+                self.db_bytes[endpoint] = (sent + tally.bytes_sent, received + tally.bytes_received)
+        if _current.get() is tally:
+            _current.set(None)
+    
+    def _render_started(self, sender, template, context, **extra):
+        tally = _current.get()
+        if tally is not None:
+            tally.render_started = time.perf_counter()
+            tally.render_db_seconds = tally.db_seconds
+    
+    def _render_finished(self, sender, template, context, **extra):
+        # Streamed templates pull documents from the cursor while rendering;
+        # that MongoDB time is already counted as db, not render
+        tally = _current.get()
+        if tally is not None and tally.render_started is not None:
+            elapsed = time.perf_counter() - tally.render_started
+            tally.render_seconds += max(elapsed - (tally.db_seconds - tally.render_db_seconds), 0.0)
+            tally.render_started = None
+    
+    def view(self):
+        """GET /metrics in the Prometheus text format, behind the METRICS_TOKEN bearer token"""
+        token = current_app.config['METRICS_TOKEN']
+        if not token:
+            # Collected but never served without a token: the figures describe the deployment
+            abort(404)
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return jsonify({'error': 'Unauthorized'}), 401
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+    
+    def render(self):
+        """All metrics as Prometheus exposition text"""
+        lines = []
+        
+        def family(name, kind, description):
+            lines.append(f'# HELP {PREFIX}_{name} {description}')
+            lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+        
+        def sample(name, labels, value):
+            lines.append(f'{PREFIX}_{name}{_labels(labels)} {_number(value)}')
+        
+        def histograms(name, label, series):
+            for key, histogram in sorted(series.items()):
+                for bound, count in histogram.samples():
+                    sample(f'{name}_bucket', {label: key, 'le': _number(bound)}, count)
+                sample(f'{name}_sum', {label: key}, histogram.sum)
+                sample(f'{name}_count', {label: key}, histogram.count)
+        
+        with self._lock:
+            commands = sorted(self.commands.items())
+            family('mongo_commands_total', 'counter', 'MongoDB commands completed')
+            for name, stats in commands:
+                sample('mongo_commands_total', {'command': name}, stats.count)
+            family('mongo_command_failures_total', 'counter', 'MongoDB commands that failed')
+            for name, stats in commands:
+                sample('mongo_command_failures_total', {'command': name}, stats.failures)
+            family('mongo_command_duration_seconds', 'histogram', 'MongoDB command round-trip time')
+            histograms('mongo_command_duration_seconds', 'command', {name: s.duration for name, s in commands})
+            if self.count_bytes:
+                family('mongo_sent_bytes_total', 'counter', 'BSON bytes of MongoDB commands')
+                for name, stats in commands:
+                    sample('mongo_sent_bytes_total', {'command': name}, stats.bytes_sent)
+                family('mongo_received_bytes_total', 'counter', 'BSON bytes of MongoDB replies')
+                for name, stats in commands:
+                    sample('mongo_received_bytes_total', {'command': name}, stats.bytes_received)
+            
+            family('http_requests_total', 'counter', 'HTTP requests completed')
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                sample('http_requests_total', {'endpoint': endpoint, 'method': method, 'status': status}, count)
+            family('http_request_duration_seconds', 'histogram', 'Time from the first hook to the last body byte')
+            histograms('http_request_duration_seconds', 'endpoint', self.request_duration)
+            family('http_render_duration_seconds', 'histogram', 'Template rendering time per request, MongoDB time excluded')
+            histograms('http_render_duration_seconds', 'endpoint', self.render_duration)
+            family('http_mongo_duration_seconds', 'histogram', 'MongoDB time per request')
+            histograms('http_mongo_duration_seconds', 'endpoint', self.db_duration)
+            family('http_mongo_commands', 'histogram', 'MongoDB commands per request')
+            histograms('http_mongo_commands', 'endpoint', self.db_commands)
+            if self.count_bytes:
+                family('http_mongo_bytes_total', 'counter', 'BSON bytes exchanged with MongoDB by requests')
+                for endpoint, (sent, received) in sorted(self.db_bytes.items()):
+                    sample('http_mongo_bytes_total', {'endpoint': endpoint, 'direction': 'sent'}, sent)
+                    sample('http_mongo_bytes_total', {'endpoint': endpoint, 'direction': 'received'}, received)
+        
+        lines.append('')
+        return '\n'.join(lines)
+
+
+def _escape(value):
+    """Label value with backslashes, quotes and newlines escaped"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    """{a="x",b="y"} with label values escaped"""
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}' if labels else ''
+
+
+def _number(value):
+    """Sample value or bucket bound as text"""
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# Singleton instance
+metrics = Metrics()
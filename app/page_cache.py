@@ -0,0 +1,302 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, g, request, session
+from app.services.auth_service import is_logged_in
+
+
+class MemoryBackend:
+    """Per-process LRU of rendered pages"""
+    
+    # Lookups and stores never wait on I/O, so async views run them on the loop
+    blocking = False
+    
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def set(self, key, page, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, page)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileSystemBackend:
+    """
+    Rendered pages stored as files, shared by every worker on the node
+    Each file is one JSON header line (expiry, key, mimetype) followed by the
+    raw body, so reading a page never deserializes code. The directory must
+    belong to this user and not be writable by anyone else.
+    """
+    
+    suffix = '.page'
+    blocking = True
+    
+    def __init__(self, directory, max_entries=1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        private_directory(directory)
+    
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + self.suffix)
+    
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                header = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if not isinstance(header, dict) or header.get('key') != key:
+            return None
+        expires_at = header.get('expires_at')
+        if not isinstance(expires_at, (int, float)) or expires_at <= time.time():
+            return None
+        return {'body': body, 'mimetype': header.get('mimetype')}
+    
+    def set(self, key, page, ttl):
+        header = json.dumps({'expires_at': time.time() + ttl, 'key': key, 'mimetype': page['mimetype']})
+        # Write to a temporary file, then rename so readers never see partial pages
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header.encode('utf-8') + b'\n')
+                f.write(page['body'])
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._prune()
+    
+    def _prune(self):
+        """Drop the oldest pages beyond max_entries"""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(self.suffix)]
+        except OSError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+    
+    def clear(self):
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.name.endswith(self.suffix):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+
+def private_directory(directory):
+    """Create directory (mode 0o700) or check an existing one is ours alone; raises ValueError if not"""
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise ValueError(f"{directory} is not a directory")
+    if hasattr(os, 'geteuid') and info.st_uid != os.geteuid():
+        raise ValueError(f"{directory} is owned by another user")
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise ValueError(f"{directory} is writable by other users")
+
+
+class PageCache:
+    """
+    Full-page cache for anonymous catalog views
+    Pages are keyed on the endpoint, normalized query arguments and the
+    catalog version, and skipped entirely for logged-in sessions.
+    """
+    
+    def __init__(self):
+        self.backend = None
+        self.hits = 0
+        self.misses = 0
+    
+    def init_app(self, app):
+        """Create the backend selected by PAGE_CACHE_BACKEND"""
+        name = app.config['PAGE_CACHE_BACKEND']
+        if name == 'memory':
+            self.backend = MemoryBackend(app.config['PAGE_CACHE_MAX_ENTRIES'])
+        elif name == 'filesystem':
+            try:
+                self.backend = FileSystemBackend(app.config['PAGE_CACHE_DIR'], app.config['PAGE_CACHE_MAX_ENTRIES'])
+            except (OSError, ValueError) as e:
+                print(f"✗ Page cache directory refused ({e}); using the per-process memory cache")
+                self.backend = MemoryBackend(app.config['PAGE_CACHE_MAX_ENTRIES'])
+        else:
+            self.backend = None
+    
+    def clear(self):
+        """Invalidate every cached page (called after admin writes)"""
+        if self.backend is not None:
+            self.backend.clear()
+    
+    def stats(self):
+        """Hit/miss counters for this process"""
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+    
+    def cached(self, view):
+        """Decorator serving a view (plain or coroutine) from the page cache for anonymous visitors"""
+        if inspect.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_decorated_function(*args, **kwargs):
+                # File reads would stall every connection on the event loop
+                if self.backend is not None and self.backend.blocking:
+                    private, key, hit = await asyncio.to_thread(self._lookup)
+                else:
+                    private, key, hit = self._lookup()
+                if hit is not None:
+                    return hit
+                return self._finish(current_app.make_response(await view(*args, **kwargs)), private, key)
+            
+            return async_decorated_function
+        
+        @wraps(view)
+        def decorated_function(*args, **kwargs):
+            private, key, hit = self._lookup()
+            if hit is not None:
+                return hit
+            return self._finish(current_app.make_response(view(*args, **kwargs)), private, key)
+        
+        return decorated_function
+    
+    def _lookup(self):
+        """
+        Classify the current request: returns (private, key, cached response)
+        key is None when the page must not be stored; the response only on a hit.
+        """
+        if is_logged_in() or session.get('_flashes'):
+            return True, None, None
+        if self.backend is None or request.method not in ('GET', 'HEAD'):
+            return False, None, None
+        
+        key = _cache_key()
+        page = self.backend.get(key)
+        if page is None:
+            self.misses += 1
+            return False, key, None
+        
+        self.hits += 1
+        response = current_app.response_class(page['body'], mimetype=page['mimetype'])
+        response.headers['X-Page-Cache'] = 'HIT'
+        return False, key, _public(response)
+    
+    def _finish(self, response, private, key):
+        """Cache headers for a freshly rendered page, storing it when cacheable"""
+        if private:
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        
+        if key is not None:
+            if response.status_code == 200:
+                self._store_when_complete(key, response)
+            response.headers['X-Page-Cache'] = 'MISS'
+        return _public(response)
+    
+    def _store_when_complete(self, key, response):
+        """Tee the (possibly streamed, possibly async) body into the cache once fully sent"""
+        backend = self.backend
+        ttl = current_app.config['PAGE_CACHE_TTL']
+        max_bytes = current_app.config['PAGE_CACHE_MAX_BYTES']
+        mimetype = response.mimetype
+        body = response.response
+        chunks = []
+        size = 0
+        
+        def collect(chunk):
+            nonlocal chunks, size
+            if chunks is not None:
+                data = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+                size += len(data)
+                if size > max_bytes:
+                    chunks = None
+                else:
+                    chunks.append(data)
+        
+        def store():
+            if chunks is not None:
+                backend.set(key, {'body': b''.join(chunks), 'mimetype': mimetype}, ttl)
+        
+        def tee():
+            for chunk in body:
+                collect(chunk)
+                yield chunk
+            store()
+        
+        async def async_tee():
+            async for chunk in body:
+                collect(chunk)
+                yield chunk
+            if backend.blocking:
+                await asyncio.to_thread(store)
+            else:
+                store()
+        
+        response.response = async_tee() if hasattr(body, '__aiter__') else tee()
+
+
+def _cache_key():
+    """Endpoint + normalized query arguments + catalog version/viewer validator"""
+    args = sorted(
+        (name, value.strip())
+        for name, values in request.args.lists()
+        for value in values
+        if value.strip()
+    )
+    return f"{request.endpoint}?{urlencode(args)}#{g.get('catalog_etag', '')}"
+
+
+def _public(response):
+    """Cache-Control for anonymous pages so a CDN can take part"""
+    if response.status_code == 200:
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config['PAGE_CACHE_MAX_AGE']
+        response.cache_control.s_maxage = current_app.config['PAGE_CACHE_SHARED_MAX_AGE']
+    return response
+
+
+# Shared instance; configured by create_app
+page_cache = PageCache()
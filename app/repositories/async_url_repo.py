@@ -0,0 +1,179 @@
+import asyncio
+from bson import ObjectId
+from app.db import get_async_db
+from app.repositories.query_cache import cached
+from app.repositories.url_repo import (
+    CARD_PROJECTION, DETAIL_PROJECTION, LIST_SORT, count_facet_pipeline, decode_cursor, listing_page,
+    order_by_ids, page_find_args, ranked_page, ranked_slice, trim_page, unpack_count_facet, unpaginated_page,
+    url_repo
+)
+
+
+class AsyncURLRepository:
+    """
+    Read side of URLRepository on Motor, for the ASGI serving mode
+    Method names, arguments and results match the sync repository. Query
+    building, the search engine and the query cache are shared with it, so
+    a cached result is served to either mode and writes made through the
+    sync repository (admin views still run as WSGI) invalidate both.
+    """
+    
+    def __init__(self, repo):
+        self.repo = repo
+    
+    @property
+    def cache(self):
+        return self.repo.cache
+    
+    async def _collection(self):
+        return (await get_async_db()).urls
+    
+    async def find_by_id(self, url_id, projection=None):
+        """Find a URL by ID"""
+        try:
+            oid = ObjectId(url_id)
+        except:
+            return None
+        return await (await self._collection()).find_one({'_id': oid}, projection)
+    
+    async def find_details(self, url_id):
+        """Fetch the fields a listing card leaves out (full description and collection)"""
+        return await self.find_by_id(url_id, DETAIL_PROJECTION)
+    
+    @cached
+    async def find_all(self, filters=None, search=None, tag=None, page=1, per_page=24, cursor=None, count_limit=None,
+                       projection=None, domain=None, tag_mode='all', tag_facets=None):
+        """Find URLs with optional filters, search, and pagination (see URLRepository.find_all)"""
+        collection = await self._collection()
+        
+        ranked = self.repo._ranked_ids(filters, search, tag, domain, tag_mode)
+        if ranked is not None:
+            ids, total = ranked_slice(ranked, page, per_page)
+            result = ranked_page(await self._fetch_ranked(ids, projection), total, page, per_page)
+            if tag_facets:
+                result['tag_counts'] = self.repo.search_engine.count_tags(ranked, tag_facets)
+            return result
+        
+        query = self.repo._build_query(filters, search, tag, domain, tag_mode)
+        
+        if per_page is None:
+            (total, total_capped, tag_counts), urls = await asyncio.gather(
+                self._count_with_facets(query, count_limit, tag_facets),
+                collection.find(query, projection).sort(LIST_SORT).to_list(None)
+            )
+            result = unpaginated_page(urls, total, total_capped)
+        else:
+            # Both round trips are independent, so run them concurrently
+            position = decode_cursor(cursor) if cursor else None
+            keyset_query, sort, skip = page_find_args(query, position, page, per_page)
+            (total, total_capped, tag_counts), urls = await asyncio.gather(
+                self._count_with_facets(query, count_limit, tag_facets),
+                collection.find(keyset_query, projection).sort(sort).skip(skip).limit(per_page + 1).to_list(None)
+            )
+            urls, has_more = trim_page(urls, position, per_page)
+            result = listing_page(urls, has_more, total, total_capped, position, page, per_page)
+        
+        if tag_facets:
+            result['tag_counts'] = tag_counts
+        return result
+    
+    @cached
+    async def count(self, filters=None, search=None, tag=None, limit=None, domain=None, tag_mode='all'):
+        """Count URLs matching the given filters; returns (total, capped)"""
+        ranked = self.repo._ranked_ids(filters, search, tag, domain, tag_mode)
+        if ranked is not None:
+            return len(ranked), False
+        return await self._count(self.repo._build_query(filters, search, tag, domain, tag_mode), limit)
+    
+    @cached
+    async def count_with_facets(self, filters=None, search=None, tag=None, limit=None, domain=None, tag_mode='all',
+                                tag_facets=20):
+        """Count URLs matching the given filters with their most common tags; returns (total, capped, tag_counts)"""
+        ranked = self.repo._ranked_ids(filters, search, tag, domain, tag_mode)
+        if ranked is not None:
+            return len(ranked), False, self.repo.search_engine.count_tags(ranked, tag_facets)
+        return await self._count_with_facets(
+            self.repo._build_query(filters, search, tag, domain, tag_mode), limit, tag_facets
+        )
+    
+    async def _count_with_facets(self, query, limit=None, tag_facets=None):
+        """(total, capped, tag_counts or None) in one round trip (see URLRepository._count_with_facets)"""
+        if not query:
+            collection = await self._collection()
+            tag_counts = (await self.get_all_tags())[:tag_facets] if tag_facets else None
+            return await collection.estimated_document_count(), False, tag_counts
+        if not tag_facets:
+            return (*await self._count(query, limit), None)
+        collection = await self._collection()
+        result = await collection.aggregate(count_facet_pipeline(query, limit, tag_facets)).to_list(1)
+        return unpack_count_facet(result[0] if result else None, limit)
+    
+    async def _count(self, query, limit=None):
+        """Estimated count when unfiltered, otherwise an exact count stopping after limit"""
+        collection = await self._collection()
+        if not query:
+            return await collection.estimated_document_count(), False
+        if limit is None:
+            return await collection.count_documents(query), False
+        
+        total = await collection.count_documents(query, limit=limit + 1)
+        return min(total, limit), total > limit
+    
+    async def iter_all(self, filters=None, search=None, tag=None, batch_size=200, projection=None, domain=None,
+                       tag_mode='all'):
+        """
+        Lazily iterate all matching URLs in listing order (async generator)
+        Documents arrive batch_size per round trip while the caller streams them.
+        """
+        ranked = self.repo._ranked_ids(filters, search, tag, domain, tag_mode)
+        if ranked is not None:
+            for start in range(0, len(ranked), batch_size):
+                for doc in await self._fetch_ranked(ranked[start:start + batch_size], projection or CARD_PROJECTION):
+                    yield doc
+            return
+        
+        collection = await self._collection()
+        query = self.repo._build_query(filters, search, tag, domain, tag_mode)
+        cursor = collection.find(query, projection or CARD_PROJECTION, batch_size=batch_size).sort(LIST_SORT)
+        async for doc in cursor:
+            yield doc
+    
+    async def _fetch_ranked(self, ids, projection=None):
+        """Fetch documents by id, returned in the order of ids"""
+        collection = await self._collection()
+        return order_by_ids(await collection.find({'_id': {'$in': ids}}, projection).to_list(None), ids)
+    
+    @cached
+    async def get_all_tags(self):
+        """Get all unique tags with counts (read from the tag_counts collection)"""
+        if not self.repo._tag_counts_checked:
+            # One-off bootstrap check; rare enough to run on a thread
+            return await asyncio.to_thread(self.repo.get_all_tags)
+        
+        db = await get_async_db()
+        cursor = db.tag_counts.find({'count': {'$gt': 0}}).sort([('count', -1), ('_id', 1)])
+        return [{'tag': item['_id'], 'count': item['count']} async for item in cursor]
+    
+    @cached
+    async def get_domain_counts(self, limit=None):
+        """Domains with the number of entries linking to each (read from the domain_counts collection)"""
+        if not self.repo._domain_counts_checked:
+            # One-off bootstrap check; rare enough to run on a thread
+            return await asyncio.to_thread(self.repo.get_domain_counts, limit)
+        
+        db = await get_async_db()
+        cursor = db.domain_counts.find({'count': {'$gt': 0}}).sort([('count', -1), ('_id', 1)])
+        if limit:
+            cursor = cursor.limit(limit)
+        return [{'domain': item['_id'], 'count': item['count']} async for item in cursor]
+    
+    @cached
+    async def get_catalog_version(self):
+        """Get (version, updated_at) for the catalog as a whole"""
+        db = await get_async_db()
+        doc = await db.meta.find_one({'_id': 'catalog'}) or {}
+        return doc.get('version', 0), doc.get('updated_at')
+
+
+# Singleton instance
+async_url_repo = AsyncURLRepository(url_repo)
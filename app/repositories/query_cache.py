@@ -0,0 +1,136 @@
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+
+class QueryCache:
+    """
+    Bounded in-process LRU cache for repository read results
+    - Entries expire after ttl seconds
+    - invalidate() bumps a generation counter so entries stored before
+      a write are never served again, even if a read was in flight
+    """
+    
+    def __init__(self, max_entries=256, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.ttl > 0
+    
+    def get(self, key):
+        """Return (found, value) for a key, counting the hit or miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                generation, expires_at, value = entry
+                if generation == self.generation and expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+    
+    def set(self, key, value, generation):
+        """Store a value computed while the cache was at the given generation"""
+        with self._lock:
+            if generation != self.generation:
+                # A write happened while the value was being computed
+                return
+            self._entries[key] = (generation, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self):
+        """Drop every cached result (called by repository write methods)"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+    
+    def stats(self):
+        """Hit/miss counters for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'generation': self.generation,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+def _freeze(value):
+    """Turn nested dicts/lists into hashable tuples for use in cache keys"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def cached(method):
+    """
+    Memoize a repository read method in self.cache
+    Keys are built from the bound arguments, so positional and keyword
+    calls with the same values share an entry. Coroutine methods are
+    supported too, keyed the same way, so the sync and async repositories
+    can share one cache.
+    """
+    signature = inspect.signature(method)
+    
+    def make_key(self, args, kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = list(bound.arguments.items())[1:]
+        return (method.__name__, _freeze(arguments))
+    
+    if inspect.iscoroutinefunction(method):
+        @wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            cache = self.cache
+            if not cache.enabled:
+                return await method(self, *args, **kwargs)
+            
+            key = make_key(self, args, kwargs)
+            found, value = cache.get(key)
+            if found:
+                return value
+            
+            generation = cache.generation
+            value = await method(self, *args, **kwargs)
+            cache.set(key, value, generation)
+            return value
+        
+        return async_wrapper
+    
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self.cache
+        if not cache.enabled:
+            return method(self, *args, **kwargs)
+        
+        key = make_key(self, args, kwargs)
+        found, value = cache.get(key)
+        if found:
+            return value
+        
+        generation = cache.generation
+        value = method(self, *args, **kwargs)
+        cache.set(key, value, generation)
+        return value
+    
+    return wrapper
@@ -1,131 +1,911 @@
+from app.config import Config
 from app.db import get_db
+from app.invalidation import invalidation_bus
+from app.repositories.query_cache import QueryCache, cached
+from app.services.url_service import document_domains, document_url_hashes, link_targets, normalize_domain, url_hash
 from bson import ObjectId
-from datetime import datetime
-from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+from collections import Counter
+import base64
+
+# Sort order shared by every listing; matches the compound created_at/_id index
+LIST_SORT = [('created_at', -1), ('_id', -1)]
+
+# Aggregation that recomputes tag counts from scratch (used to rebuild/verify)
+TAG_COUNT_PIPELINE = [
+    {'$unwind': '$tags'},
+    {'$group': {
+        '_id': '$tags',
+        'count': {'$sum': 1}
+    }}
+]
+
+# Same for the stored domains of each document
+DOMAIN_COUNT_PIPELINE = [
+    {'$unwind': '$domains'},
+    {'$group': {
+        '_id': '$domains',
+        'count': {'$sum': 1}
+    }}
+]
+
+# Collection items and description characters shipped with each listing card
+CARD_URL_LIMIT = 3
+CARD_DESCRIPTION_LENGTH = 240
+
+# Card-level projection for list views; everything else comes from find_details
+CARD_PROJECTION = {
+    'title': 1,
+    'url': 1,
+    'tags': 1,
+    'created_at': 1,
+    'description': {'$substrCP': [{'$ifNull': ['$description', '']}, 0, CARD_DESCRIPTION_LENGTH]},
+    'urls': {'$slice': ['$urls', CARD_URL_LIMIT]},
+    'url_count': {'$size': {'$ifNull': ['$urls', []]}},
+    'link_health': 1,
+    'broken_links': 1
+}
+
+# Fields returned by the lazy detail fetch
+DETAIL_PROJECTION = {
+    'title': 1,
+    'url': 1,
+    'urls.url': 1,
+    'urls.subtitle': 1,
+    'description': 1,
+    'tags': 1
+}
+
+# How several selected tags combine: every tag ($all) or any of them ($in)
+TAG_MODES = ('all', 'any')
+
+# Documents with at least one link that failed its last health check
+BROKEN_LINKS_FILTER = {'broken_links': {'$gt': 0}}
+
+# Written by record_link_health; dropped when an entry's links are replaced
+LINK_HEALTH_FIELDS = ('link_health', 'broken_links', 'links_checked_at')
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def encode_cursor(doc, direction='next'):
+    """Build an opaque keyset cursor token from a document's (created_at, _id)"""
+    created_at = doc.get('created_at') or _EPOCH
+    millis = (created_at - _EPOCH) // timedelta(milliseconds=1)
+    raw = f"{millis}.{doc['_id']}.{direction}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a keyset cursor token
+    Returns (created_at, _id, direction) or None if the token is invalid
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        millis, oid, direction = base64.urlsafe_b64decode(padded).decode().split('.')
+        if direction not in ('next', 'prev'):
+            return None
+        return _EPOCH + timedelta(milliseconds=int(millis)), ObjectId(oid), direction
+    except:
+        return None
+
+
+def _seek_filter(position):
+    """Keyset condition selecting documents after/before a decoded cursor position"""
+    created_at, last_id, direction = position
+    op = '$lt' if direction == 'next' else '$gt'
+    return {'$or': [
+        {'created_at': {op: created_at}},
+        {'created_at': created_at, '_id': {op: last_id}}
+    ]}
+
+
+def tag_list(tag):
+    """Selected tags as a sorted list, from None, one tag or several"""
+    if not tag:
+        return []
+    if isinstance(tag, str):
+        return [tag]
+    return sorted({value for value in tag if value})
+
+
+def tag_facet_stages(limit):
+    """Aggregation stages counting tags over the documents reaching them, most common first"""
+    return [
+        {'$unwind': '$tags'},
+        {'$group': {'_id': '$tags', 'count': {'$sum': 1}}},
+        {'$sort': {'count': -1, '_id': 1}},
+        {'$limit': limit}
+    ]
+
+
+def unpack_tag_counts(items):
+    """[{'tag', 'count'}] from tag_facet_stages output"""
+    return [{'tag': item['_id'], 'count': item['count']} for item in items or []]
+
+
+def count_facet_pipeline(query, count_limit, tag_facets):
+    """Aggregation returning the matching total and tag counts in one round trip"""
+    count_stages = [{'$count': 'total'}]
+    if count_limit is not None:
+        count_stages.insert(0, {'$limit': count_limit + 1})
+    return [
+        {'$match': query},
+        {'$facet': {
+            'total': count_stages,
+            'tag_counts': tag_facet_stages(tag_facets)
+        }}
+    ]
+
+
+def unpack_count_facet(result, count_limit):
+    """Split a count_facet_pipeline result into (total, total_capped, tag_counts)"""
+    result = result or {'total': [], 'tag_counts': []}
+    total = result['total'][0]['total'] if result['total'] else 0
+    total_capped = count_limit is not None and total > count_limit
+    return (count_limit if total_capped else total), total_capped, unpack_tag_counts(result['tag_counts'])
+
+
+def order_by_ids(docs, ids):
+    """Documents fetched with $in, returned in the order of ids"""
+    by_id = {doc['_id']: doc for doc in docs}
+    return [by_id[url_id] for url_id in ids if url_id in by_id]
+
+
+def ranked_slice(ranked, page, per_page):
+    """Ids on one page of a relevance-ordered id list, and the total"""
+    if per_page is None:
+        return ranked, len(ranked)
+    start = (page - 1) * per_page
+    return ranked[start:start + per_page], len(ranked)
+
+
+def ranked_page(urls, total, page, per_page):
+    """find_all result for one page of a relevance-ordered search"""
+    if per_page is None:
+        page, per_page = 1, total
+    return {
+        'urls': urls,
+        'total': total,
+        'total_capped': False,
+        'page': page,
+        'per_page': per_page,
+        'pages': (total + per_page - 1) // per_page if per_page else 1,
+        'next_cursor': None,
+        'prev_cursor': None,
+        'ranked': True
+    }
+
+
+def unpaginated_page(urls, total, total_capped):
+    """find_all result for per_page=None (everything on one page)"""
+    return {
+        'urls': urls,
+        'total': total,
+        'total_capped': total_capped,
+        'page': 1,
+        'per_page': total,
+        'pages': 1,
+        'next_cursor': None,
+        'prev_cursor': None,
+        'ranked': False
+    }
+
+
+def page_find_args(query, position, page, per_page):
+    """
+    (filter, sort, skip) for a newest-first page: a keyset seek from a cursor
+    position (walking the index backwards for 'prev'), otherwise a skip
+    The seek sits in the find filter itself, so the (filter field,
+    created_at, _id) indexes go straight to the page whatever the filter.
+    """
+    if not position:
+        return query, LIST_SORT, (page - 1) * per_page
+    
+    seek = _seek_filter(position)
+    keyset_query = {'$and': [query, seek]} if query else seek
+    if position[2] == 'next':
+        return keyset_query, LIST_SORT, 0
+    return keyset_query, [(field, -order) for field, order in LIST_SORT], 0
+
+
+def trim_page(urls, position, per_page):
+    """Drop the look-ahead document and restore display order; returns (urls, has_more)"""
+    has_more = len(urls) > per_page
+    urls = urls[:per_page]
+    if position and position[2] == 'prev':
+        urls.reverse()
+    return urls, has_more
+
+
+def listing_page(urls, has_more, total, total_capped, position, page, per_page):
+    """find_all result for a newest-first page, with cursors for the neighbouring pages"""
+    if position:
+        direction = position[2]
+        has_next = has_more if direction == 'next' else True
+        has_prev = has_more if direction == 'prev' else True
+    else:
+        has_next = has_more
+        has_prev = page > 1
+    
+    return {
+        'urls': urls,
+        'total': total,
+        'total_capped': total_capped,
+        'page': page,
+        'per_page': per_page,
+        'pages': (total + per_page - 1) // per_page,
+        'next_cursor': encode_cursor(urls[-1], 'next') if urls and has_next else None,
+        'prev_cursor': encode_cursor(urls[0], 'prev') if urls and has_prev else None,
+        'ranked': False
+    }
+
+
+def _without_fetch_time(doc):
+    """A document minus metadata_fetched_at, which readers never see"""
+    return {key: value for key, value in (doc or {}).items() if key != 'metadata_fetched_at'}
 
 
 class URLRepository:
     """Repository for URL database operations"""
     
     def __init__(self):
-        self.collection = get_db().urls
+        self._tag_counts_checked = False
+        self._domain_counts_checked = False
+        # Read results memoized until the next write (or TTL expiry)
+        self.cache = QueryCache(
+            max_entries=Config.QUERY_CACHE_MAX_ENTRIES,
+            ttl=Config.QUERY_CACHE_TTL
+        )
+        # In-process indexes kept current by the write methods (see add_write_listener)
+        self._write_listeners = []
+        # Optional ranked search backend; $text is used when unset or not ready
+        self.search_engine = None
+    
+    @property
+    def collection(self):
+        """The urls collection on this process's current client"""
+        return get_db().urls
+    
+    @property
+    def tag_counts(self):
+        """Materialized {_id: tag, count} documents kept current by the write methods"""
+        return get_db().tag_counts
+    
+    @property
+    def domain_counts(self):
+        """Materialized {_id: domain, count} documents kept current by the write methods"""
+        return get_db().domain_counts
+    
+    @property
+    def meta(self):
+        """Small bookkeeping documents (catalog version, index schema marker)"""
+        return get_db().meta
     
     def create(self, url_data):
-        """Create a new URL entry"""
+        """Create a new URL entry; returns None if any of its links is already stored"""
         url_data['created_at'] = datetime.utcnow()
         url_data['updated_at'] = datetime.utcnow()
+        self._set_link_fields(url_data)
+        if self.find_duplicate(url_data['url_hashes']):
+            return None
         
         try:
             result = self.collection.insert_one(url_data)
             url_data['_id'] = result.inserted_id
+            self._adjust_tag_counts(added=url_data.get('tags', []))
+            self._adjust_domain_counts(added=url_data['domains'])
+            self.touch_catalog()
+            self._notify_write(added=[url_data])
             return url_data
         except DuplicateKeyError:
             return None
     
-    def create_many(self, url_data_list):
-        """Create multiple URL entries, skipping duplicates"""
+    def create_many(self, url_data_list, chunk_size=None):
+        """
+        Create multiple URL entries, skipping duplicates
+        Inserts in unordered insert_many chunks. Entries sharing a link with a
+        stored one (or an earlier one in the batch) are filtered up front with
+        a single $in lookup against the url_hashes index.
+        """
         results = {'success': [], 'duplicates': [], 'errors': []}
+        chunk_size = chunk_size or Config.BULK_INSERT_CHUNK_SIZE
+        now = datetime.utcnow()
         
         for url_data in url_data_list:
-            result = self.create(url_data)
-            if result:
-                results['success'].append(result)
-            else:
-                results['duplicates'].append(url_data.get('url', 'Unknown URL'))
+            self._set_link_fields(url_data)
+        existing = self.stored_hashes([h for url_data in url_data_list for h in url_data['url_hashes']])
+        
+        pending = []
+        for url_data in url_data_list:
+            hashes = url_data['url_hashes']
+            if not existing.isdisjoint(hashes):
+                results['duplicates'].append(url_data.get('url') or next(iter(link_targets(url_data)), 'Unknown URL'))
+                continue
+            # Also catches repeats within the batch itself
+            existing.update(hashes)
+            url_data['created_at'] = now
+            url_data['updated_at'] = now
+            pending.append(url_data)
+        
+        for start in range(0, len(pending), chunk_size):
+            self._insert_chunk(pending[start:start + chunk_size], results)
+        
+        if results['success']:
+            self._adjust_tag_counts(added=[tag for url_data in results['success'] for tag in url_data.get('tags', [])])
+            self._adjust_domain_counts(added=[domain for url_data in results['success'] for domain in url_data['domains']])
+            self.touch_catalog()
+            self._notify_write(added=results['success'])
         
         return results
     
-    def find_by_id(self, url_id):
+    def _set_link_fields(self, url_data):
+        """Derive the indexed per-link fields (url_hashes, domains) from url/urls"""
+        url_data['url_hashes'] = document_url_hashes(url_data)
+        url_data['domains'] = document_domains(url_data)
+    
+    def _insert_chunk(self, chunk, results):
+        """Insert one chunk, sorting each document into the create_many result buckets"""
+        try:
+            self.collection.insert_many(chunk, ordered=False)
+            results['success'].extend(chunk)
+            return
+        except BulkWriteError as e:
+            failed = {error['index']: error for error in e.details.get('writeErrors', [])}
+        except PyMongoError as e:
+            # Whole chunk outcome unknown (e.g. network error)
+            for url_data in chunk:
+                results['errors'].append(f"{url_data.get('url') or url_data.get('title', 'Unknown URL')}: {e}")
+            return
+        
+        for idx, url_data in enumerate(chunk):
+            error = failed.get(idx)
+            if error is None:
+                results['success'].append(url_data)
+            elif error.get('code') == 11000:
+                results['duplicates'].append(url_data.get('url', 'Unknown URL'))
+            else:
+                url_data.pop('_id', None)
+                label = url_data.get('url') or url_data.get('title', 'Unknown URL')
+                results['errors'].append(f"{label}: {error.get('errmsg', 'Insert failed')}")
+    
+    def find_duplicate(self, hashes, exclude_id=None):
+        """A stored entry sharing any of the given link hashes, or None"""
+        if not hashes:
+            return None
+        query = {'url_hashes': {'$in': list(hashes)}}
+        if exclude_id is not None:
+            query['_id'] = {'$ne': exclude_id}
+        return self.collection.find_one(query, {'title': 1, 'url': 1, 'urls.url': 1})
+    
+    def stored_hashes(self, hashes):
+        """The subset of the given link hashes already stored on some entry"""
+        wanted = set(hashes)
+        if not wanted:
+            return set()
+        stored = set()
+        for doc in self.collection.find({'url_hashes': {'$in': list(wanted)}}, {'url_hashes': 1}):
+            stored.update(wanted.intersection(doc['url_hashes']))
+        return stored
+    
+    def find_by_id(self, url_id, projection=None):
         """Find a URL by ID"""
         try:
-            return self.collection.find_one({'_id': ObjectId(url_id)})
+            return self.collection.find_one({'_id': ObjectId(url_id)}, projection)
         except:
             return None
     
-    def find_all(self, filters=None, search=None, tag=None, page=1, per_page=24):
-        """Find URLs with optional filters, search, and pagination"""
+    def find_details(self, url_id):
+        """Fetch the fields a listing card leaves out (full description and collection)"""
+        return self.find_by_id(url_id, DETAIL_PROJECTION)
+    
+    @cached
+    def find_all(self, filters=None, search=None, tag=None, page=1, per_page=24, cursor=None, count_limit=None,
+                 projection=None, domain=None, tag_mode='all', tag_facets=None):
+        """
+        Find URLs with optional filters, search, and pagination
+        Pass a cursor token (from next_cursor/prev_cursor) for keyset pagination,
+        which seeks straight to the page instead of skipping documents.
+        The page is an indexed find; the total (and tag counts) of a filtered
+        listing come from one $facet aggregation, the unfiltered total from
+        the collection's estimated count. With
+        count_limit, counting stops there and total_capped reports "limit+".
+        List views pass CARD_PROJECTION to skip fields cards never render.
+        Searches served by the ranked search engine are ordered by relevance
+        and paginate by page number only (no cursors); 'ranked' says which applies.
+        domain restricts results to entries linking to that site (see normalize_domain).
+        tag may be a list: tag_mode 'all' matches entries with every tag, 'any'
+        with at least one. With tag_facets=N the result also carries
+        'tag_counts', the N most common tags within the matching entries,
+        computed in the same $facet round trip as the page and total.
+        """
+        ranked = self._ranked_ids(filters, search, tag, domain, tag_mode)
+        if ranked is not None:
+            ids, total = ranked_slice(ranked, page, per_page)
+            result = ranked_page(self._fetch_ranked(ids, projection), total, page, per_page)
+            if tag_facets:
+                result['tag_counts'] = self.search_engine.count_tags(ranked, tag_facets)
+            return result
+        
+        query = self._build_query(filters, search, tag, domain, tag_mode)
+        
+        # Handle unpaginated requests (per_page=None means fetch all)
+        if per_page is None:
+            total, total_capped, tag_counts = self._count_with_facets(query, count_limit, tag_facets)
+            urls = list(self.collection.find(query, projection).sort(LIST_SORT))
+            result = unpaginated_page(urls, total, total_capped)
+        else:
+            # Index walk for the page; a $facet over the matches would read
+            # all of them before seeking, so only the counts go through one
+            position = decode_cursor(cursor) if cursor else None
+            keyset_query, sort, skip = page_find_args(query, position, page, per_page)
+            urls = list(self.collection.find(keyset_query, projection).sort(sort).skip(skip).limit(per_page + 1))
+            urls, has_more = trim_page(urls, position, per_page)
+            total, total_capped, tag_counts = self._count_with_facets(query, count_limit, tag_facets)
+            result = listing_page(urls, has_more, total, total_capped, position, page, per_page)
+        
+        if tag_facets:
+            result['tag_counts'] = tag_counts
+        return result
+    
+    @cached
+    def count(self, filters=None, search=None, tag=None, limit=None, domain=None, tag_mode='all'):
+        """
+        Count URLs matching the given filters
+        Returns (total, capped); with a limit, capped means "at least limit"
+        """
+        ranked = self._ranked_ids(filters, search, tag, domain, tag_mode)
+        if ranked is not None:
+            return len(ranked), False
+        return self._count(self._build_query(filters, search, tag, domain, tag_mode), limit)
+    
+    @cached
+    def count_with_facets(self, filters=None, search=None, tag=None, limit=None, domain=None, tag_mode='all',
+                          tag_facets=20):
+        """
+        Count URLs matching the given filters along with their most common tags
+        Returns (total, capped, tag_counts) from one $facet round trip, for
+        views that stream their results instead of fetching a page.
+        """
+        ranked = self._ranked_ids(filters, search, tag, domain, tag_mode)
+        if ranked is not None:
+            return len(ranked), False, self.search_engine.count_tags(ranked, tag_facets)
+        return self._count_with_facets(self._build_query(filters, search, tag, domain, tag_mode), limit, tag_facets)
+    
+    def _count_with_facets(self, query, limit=None, tag_facets=None):
+        """(total, capped, tag_counts or None); unfiltered counts come from collection metadata and tag_counts"""
+        if not query:
+            tag_counts = self.get_all_tags()[:tag_facets] if tag_facets else None
+            return self.collection.estimated_document_count(), False, tag_counts
+        if not tag_facets:
+            return (*self._count(query, limit), None)
+        result = next(self.collection.aggregate(count_facet_pipeline(query, limit, tag_facets)), None)
+        return unpack_count_facet(result, limit)
+    
+    def _count(self, query, limit=None):
+        """Estimated count when unfiltered, otherwise an exact count stopping after limit"""
+        if not query:
+            return self.collection.estimated_document_count(), False
+        if limit is None:
+            return self.collection.count_documents(query), False
+        
+        total = self.collection.count_documents(query, limit=limit + 1)
+        return min(total, limit), total > limit
+    
+    def iter_all(self, filters=None, search=None, tag=None, batch_size=200, projection=None, domain=None,
+                 tag_mode='all'):
+        """
+        Lazily iterate all matching URLs in listing order
+        Returns a cursor that fetches batch_size documents per round trip, so
+        callers can stream results without holding the whole catalog in memory.
+        Ranked searches yield documents in relevance order instead.
+        """
+        ranked = self._ranked_ids(filters, search, tag, domain, tag_mode)
+        if ranked is not None:
+            return self._iter_ranked(ranked, batch_size, projection or CARD_PROJECTION)
+        
+        query = self._build_query(filters, search, tag, domain, tag_mode)
+        return self.collection.find(
+            query,
+            projection or CARD_PROJECTION,
+            batch_size=batch_size
+        ).sort(LIST_SORT)
+    
+    def _build_query(self, filters=None, search=None, tag=None, domain=None, tag_mode='all'):
+        """Build the Mongo query shared by listing and counting"""
         query = {}
         
         # Text search
         if search:
             query['$text'] = {'$search': search}
         
-        # Tag filter
-        if tag:
-            query['tags'] = tag
+        # Tag filter: one tag is an equality, several need all ($all) or any ($in) of them
+        tags = tag_list(tag)
+        if len(tags) == 1:
+            query['tags'] = tags[0]
+        elif tags:
+            query['tags'] = {'$in' if tag_mode == 'any' else '$all': tags}
+        
+        # Domain filter (multikey index on the stored domains)
+        if domain:
+            query['domains'] = normalize_domain(domain)
         
         # Apply additional filters
         if filters:
             query.update(filters)
         
-        # Get total count
-        total = self.collection.count_documents(query)
-        
-        # Handle unpaginated requests (per_page=None means fetch all)
-        if per_page is None:
-            cursor = self.collection.find(query).sort('created_at', -1)
-            urls = list(cursor)
-            return {
-                'urls': urls,
-                'total': total,
-                'page': 1,
-                'per_page': total,
-                'pages': 1
-            }
-        
-        # Calculate skip for pagination
-        skip = (page - 1) * per_page
-        
-        # Get results with pagination
-        cursor = self.collection.find(query).sort('created_at', -1).skip(skip).limit(per_page)
-        urls = list(cursor)
-        
-        return {
-            'urls': urls,
-            'total': total,
-            'page': page,
-            'per_page': per_page,
-            'pages': (total + per_page - 1) // per_page
-        }
+        return query
+    
+    def _ranked_ids(self, filters=None, search=None, tag=None, domain=None, tag_mode='all'):
+        """
+        Ids matching a search in relevance order, or None to fall back to $text
+        Arbitrary Mongo filters can't be evaluated in memory, so they always use $text.
+        """
+        if not search or filters or self.search_engine is None or not self.search_engine.ensure_fresh():
+            return None
+        return self.search_engine.search(
+            search,
+            tag=tag_list(tag) or None,
+            domain=normalize_domain(domain) if domain else None,
+            tag_mode=tag_mode
+        )
+    
+    def _fetch_ranked(self, ids, projection=None):
+        """Fetch documents by id, returned in the order of ids"""
+        return order_by_ids(self.collection.find({'_id': {'$in': ids}}, projection), ids)
+    
+    def _iter_ranked(self, ranked, batch_size, projection):
+        """Yield documents for a relevance-ordered id list, batch_size per round trip"""
+        for start in range(0, len(ranked), batch_size):
+            yield from self._fetch_ranked(ranked[start:start + batch_size], projection)
     
     def update(self, url_id, url_data):
-        """Update a URL entry"""
+        """Update a URL entry; returns False if it would share a link with another entry"""
         url_data['updated_at'] = datetime.utcnow()
         
         try:
-            result = self.collection.update_one(
-                {'_id': ObjectId(url_id)},
-                {'$set': url_data}
+            oid = ObjectId(url_id)
+        except:
+            return False
+        update = {'$set': url_data}
+        if 'url' in url_data or 'urls' in url_data:
+            self._set_link_fields(url_data)
+            if self.find_duplicate(url_data['url_hashes'], exclude_id=oid):
+                return False
+            stored = self.collection.find_one({'_id': oid}, {'url_hashes': 1, 'urls.link_health': 1}) or {}
+            if stored.get('url_hashes') == url_data['url_hashes']:
+                # Same links: keep their last check (forms resend items without it)
+                for item, stored_item in zip(url_data.get('urls') or [], stored.get('urls') or []):
+                    if isinstance(item, dict) and isinstance(stored_item, dict) and 'link_health' in stored_item:
+                        item.setdefault('link_health', stored_item['link_health'])
+            else:
+                # New links: the last check described the old ones
+                update['$unset'] = dict.fromkeys(LINK_HEALTH_FIELDS, '')
+        
+        try:
+            previous = self.collection.find_one_and_update(
+                {'_id': oid},
+                update,
+                return_document=ReturnDocument.BEFORE
             )
-            return result.modified_count > 0
         except:
             return False
+        
+        if previous is None:
+            return False
+        
+        if 'tags' in url_data:
+            old_tags = set(previous.get('tags', []))
+            new_tags = set(url_data['tags'])
+            self._adjust_tag_counts(added=new_tags - old_tags, removed=old_tags - new_tags)
+        if 'domains' in url_data:
+            old_domains = set(previous.get('domains', []))
+            new_domains = set(url_data['domains'])
+            self._adjust_domain_counts(added=new_domains - old_domains, removed=old_domains - new_domains)
+        self.touch_catalog()
+        updated = {key: value for key, value in previous.items() if key not in update.get('$unset', {})}
+        self._notify_write(removed=[previous], added=[{**updated, **url_data}])
+        return True
     
     def delete(self, url_id):
         """Delete a URL entry"""
         try:
-            result = self.collection.delete_one({'_id': ObjectId(url_id)})
-            return result.deleted_count > 0
+            deleted = self.collection.find_one_and_delete({'_id': ObjectId(url_id)})
         except:
             return False
+        
+        if deleted is None:
+            return False
+        
+        self._adjust_tag_counts(removed=deleted.get('tags', []))
+        self._adjust_domain_counts(removed=deleted.get('domains', []))
+        self.touch_catalog()
+        self._notify_write(removed=[deleted])
+        return True
     
-    def get_all_tags(self):
-        """Get all unique tags with counts"""
+    def iter_link_batches(self, batch_size=500, query=None):
+        """Yield lists of up to batch_size documents carrying only their URLs, for the link checker"""
+        cursor = self.collection.find(query or {}, {'url': 1, 'urls.url': 1}, batch_size=batch_size).sort('_id', 1)
+        batch = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def record_link_health(self, docs, results, chunk_size=None):
+        """
+        Store link-check results with unordered bulk writes
+        Each result lands in link_health on the document (single url) or on
+        its collection item, and broken_links counts the failures. The filter
+        pins every checked URL, so documents edited since they were read are
+        left for the next run. Returns the number of documents matched; call
+        touch_catalog() once the run is done.
+        """
+        now = datetime.utcnow()
+        operations = []
+        for doc in docs:
+            match = {'_id': doc['_id']}
+            fields = {'links_checked_at': now}
+            broken = 0
+            if doc.get('url') in results:
+                match['url'] = doc['url']
+                fields['link_health'] = results[doc['url']]
+                broken += not results[doc['url']]['ok']
+            for idx, item in enumerate(doc.get('urls') or []):
+                url = item.get('url') if isinstance(item, dict) else None
+                if url in results:
+                    match[f'urls.{idx}.url'] = url
+                    fields[f'urls.{idx}.link_health'] = results[url]
+                    broken += not results[url]['ok']
+            fields['broken_links'] = broken
+            operations.append(UpdateOne(match, {'$set': fields}))
+        
+        matched = 0
+        chunk_size = chunk_size or Config.BULK_INSERT_CHUNK_SIZE
+        for start in range(0, len(operations), chunk_size):
+            matched += self.collection.bulk_write(operations[start:start + chunk_size], ordered=False).matched_count
+        return matched
+    
+    def apply_metadata(self, updates):
+        """
+        Write fetched page metadata with one unordered bulk write
+        updates: (filter, update) pairs whose filters pin the value being
+        replaced, so a field edited since it was read is left alone. Listeners
+        see the changed documents like any other update. A fetch that only
+        records metadata_fetched_at (nothing was missing, or the page had
+        nothing to add) leaves the catalog version alone, so cached pages
+        survive. Returns the number of documents whose visible fields changed.
+        """
+        if not updates:
+            return 0
+        ids = list(dict.fromkeys(match['_id'] for match, _ in updates))
+        before = {doc['_id']: doc for doc in self.collection.find({'_id': {'$in': ids}})}
+        
+        result = self.collection.bulk_write([UpdateOne(match, update) for match, update in updates], ordered=False)
+        if not result.modified_count:
+            return 0
+        
+        changed = [
+            doc for doc in self.collection.find({'_id': {'$in': ids}})
+            if _without_fetch_time(doc) != _without_fetch_time(before.get(doc['_id']))
+        ]
+        if not changed:
+            return 0
+        self.touch_catalog()
+        self._notify_write(removed=[before[doc['_id']] for doc in changed if doc['_id'] in before], added=changed)
+        return len(changed)
+    
+    def iter_missing_url_hashes(self, batch_size=500, force=False):
+        """Batches of documents (URLs only) still needing url_hashes; every document with force"""
+        return self.iter_link_batches(batch_size, None if force else {'url_hashes': {'$exists': False}})
+    
+    def record_url_hashes(self, docs, chunk_size=None):
+        """
+        Store url_hashes on documents read by iter_link_batches (backfill)
+        The filter pins every URL read, so a document edited meanwhile keeps
+        the hashes its update wrote. Returns the number of documents modified.
+        """
+        return self._record_link_field(docs, 'url_hashes', document_url_hashes, chunk_size)
+    
+    def iter_missing_domains(self, batch_size=500, force=False):
+        """Batches of documents (URLs only) still needing domains; every document with force"""
+        return self.iter_link_batches(batch_size, None if force else {'domains': {'$exists': False}})
+    
+    def record_domains(self, docs, chunk_size=None):
+        """
+        Store domains on documents read by iter_link_batches (backfill)
+        Pinned like record_url_hashes; run rebuild_domain_counts() afterwards.
+        """
+        return self._record_link_field(docs, 'domains', document_domains, chunk_size)
+    
+    def _record_link_field(self, docs, field, derive, chunk_size=None):
+        """Bulk-set a field derived from each document's links, pinned to the URLs read"""
+        operations = []
+        for doc in docs:
+            match = {'_id': doc['_id'], 'url': doc['url']} if doc.get('url') else {'_id': doc['_id']}
+            items = doc.get('urls') or []
+            for idx, item in enumerate(items):
+                match[f'urls.{idx}.url'] = item.get('url') if isinstance(item, dict) else None
+            match[f'urls.{len(items)}'] = {'$exists': False}
+            operations.append(UpdateOne(match, {'$set': {field: derive(doc)}}))
+        
+        modified = 0
+        chunk_size = chunk_size or Config.BULK_INSERT_CHUNK_SIZE
+        for start in range(0, len(operations), chunk_size):
+            modified += self.collection.bulk_write(operations[start:start + chunk_size], ordered=False).modified_count
+        return modified
+    
+    def duplicate_links(self, limit=None):
+        """
+        Links stored on more than one entry, most repeated first
+        Grouped on the url_hashes index in one aggregation; returns a list of
+        {'hash', 'url', 'count', 'entries': [{'_id', 'title', 'url'}]}.
+        """
         pipeline = [
-            {'$unwind': '$tags'},
-            {'$group': {
-                '_id': '$tags',
-                'count': {'$sum': 1}
-            }},
-            {'$sort': {'count': -1}}
+            {'$match': {'url_hashes.0': {'$exists': True}}},
+            {'$project': {'url_hashes': 1}},
+            {'$unwind': '$url_hashes'},
+            {'$group': {'_id': '$url_hashes', 'ids': {'$push': '$_id'}, 'count': {'$sum': 1}}},
+            {'$match': {'count': {'$gt': 1}}},
+            {'$sort': {'count': -1, '_id': 1}}
         ]
+        if limit:
+            pipeline.append({'$limit': limit})
+        groups = list(self.collection.aggregate(pipeline, allowDiskUse=True))
+        
+        ids = list({doc_id for group in groups for doc_id in group['ids']})
+        docs = {}
+        for start in range(0, len(ids), Config.CATALOG_BATCH_SIZE):
+            chunk = ids[start:start + Config.CATALOG_BATCH_SIZE]
+            for doc in self.collection.find({'_id': {'$in': chunk}}, {'title': 1, 'url': 1, 'urls.url': 1}):
+                docs[doc['_id']] = doc
+        
+        report = []
+        for group in groups:
+            entries = []
+            for doc_id in group['ids']:
+                doc = docs.get(doc_id)
+                if doc is None:
+                    continue
+                # The link as written on this entry
+                url = next((url for url in link_targets(doc) if url_hash(url) == group['_id']), None)
+                entries.append({'_id': doc_id, 'title': doc.get('title'), 'url': url})
+            report.append({
+                'hash': group['_id'],
+                'url': entries[0]['url'] if entries else None,
+                'count': group['count'],
+                'entries': entries
+            })
+        return report
+    
+    @cached
+    def get_all_tags(self):
+        """Get all unique tags with counts (read from the tag_counts collection)"""
+        if not self._tag_counts_checked:
+            # Bootstrap once per process for catalogs created before tag_counts existed
+            if self.tag_counts.estimated_document_count() == 0 and self.collection.find_one({'tags.0': {'$exists': True}}):
+                self.rebuild_tag_counts()
+            self._tag_counts_checked = True
         
-        result = list(self.collection.aggregate(pipeline))
-        return [{'tag': item['_id'], 'count': item['count']} for item in result]
+        cursor = self.tag_counts.find({'count': {'$gt': 0}}).sort([('count', -1), ('_id', 1)])
+        return [{'tag': item['_id'], 'count': item['count']} for item in cursor]
+    
+    def rebuild_tag_counts(self):
+        """Recompute the tag_counts collection from the urls collection"""
+        # $out swaps the collection in atomically and keeps its indexes
+        self.collection.aggregate(TAG_COUNT_PIPELINE + [{'$out': self.tag_counts.name}])
+        self.touch_catalog()
+        return self.tag_counts.count_documents({})
+    
+    def verify_tag_counts(self):
+        """
+        Compare tag_counts against a fresh aggregation
+        Returns a list of {'tag', 'expected', 'actual'} entries that drifted
+        """
+        expected = {item['_id']: item['count'] for item in self.collection.aggregate(TAG_COUNT_PIPELINE)}
+        actual = {item['_id']: item['count'] for item in self.tag_counts.find({'count': {'$gt': 0}})}
+        
+        drift = []
+        for tag in sorted(set(expected) | set(actual)):
+            if expected.get(tag, 0) != actual.get(tag, 0):
+                drift.append({'tag': tag, 'expected': expected.get(tag, 0), 'actual': actual.get(tag, 0)})
+        return drift
+    
+    def _adjust_tag_counts(self, added=(), removed=()):
+        """Apply $inc deltas to tag_counts for tags added to / removed from documents"""
+        self._adjust_counts(self.tag_counts, added, removed)
+    
+    def _adjust_domain_counts(self, added=(), removed=()):
+        """Apply $inc deltas to domain_counts for domains added to / removed from documents"""
+        self._adjust_counts(self.domain_counts, added, removed)
+    
+    def _adjust_counts(self, counts, added=(), removed=()):
+        """Apply $inc deltas to a materialized {_id: value, count} collection"""
+        deltas = Counter(added)
+        deltas.subtract(removed)
+        operations = [
+            UpdateOne({'_id': value}, {'$inc': {'count': delta}}, upsert=True)
+            for value, delta in deltas.items() if delta
+        ]
+        if not operations:
+            return
+        
+        counts.bulk_write(operations, ordered=False)
+        
+        # Drop values no longer used by any document
+        emptied = [value for value, delta in deltas.items() if delta < 0]
+        if emptied:
+            counts.delete_many({'_id': {'$in': emptied}, 'count': {'$lte': 0}})
+    
+    @cached
+    def get_domain_counts(self, limit=None):
+        """
+        Domains with the number of entries linking to each, most common first
+        Read from the domain_counts collection, so no aggregation over urls runs.
+        """
+        if not self._domain_counts_checked:
+            # Bootstrap once per process for entries written without keeping domain_counts current
+            if self.domain_counts.estimated_document_count() == 0 and self.collection.find_one({'domains.0': {'$exists': True}}):
+                self.rebuild_domain_counts()
+            self._domain_counts_checked = True
+        
+        cursor = self.domain_counts.find({'count': {'$gt': 0}}).sort([('count', -1), ('_id', 1)])
+        if limit:
+            cursor = cursor.limit(limit)
+        return [{'domain': item['_id'], 'count': item['count']} for item in cursor]
+    
+    def rebuild_domain_counts(self):
+        """Recompute the domain_counts collection from the stored domains"""
+        self.collection.aggregate(DOMAIN_COUNT_PIPELINE + [{'$out': self.domain_counts.name}])
+        self.touch_catalog()
+        return self.domain_counts.count_documents({})
+    
+    @cached
+    def get_catalog_version(self):
+        """
+        Get (version, updated_at) for the catalog as a whole
+        The version increases on every write, so it can back HTTP validators.
+        """
+        doc = self.meta.find_one({'_id': 'catalog'}) or {}
+        return doc.get('version', 0), doc.get('updated_at')
+    
+    def touch_catalog(self):
+        """Record a catalog change: bump the stored version and drop cached reads here and in other workers"""
+        self.meta.update_one(
+            {'_id': 'catalog'},
+            {'$inc': {'version': 1}, '$set': {'updated_at': datetime.utcnow()}},
+            upsert=True
+        )
+        self.cache.invalidate()
+        invalidation_bus.bump()
+    
+    def add_write_listener(self, listener):
+        """
+        Register an in-process index to keep current on writes
+        listener.apply_write(removed, added) receives full documents; an
+        update arrives as its previous version removed and the new one added.
+        """
+        if listener not in self._write_listeners:
+            self._write_listeners.append(listener)
+    
+    def _notify_write(self, removed=(), added=()):
+        """Pass a committed write to every listener; a failing listener never fails the write"""
+        for listener in self._write_listeners:
+            try:
+                listener.apply_write(removed, added)
+            except Exception as e:
+                print(f"✗ Write listener {type(listener).__name__} failed: {e}")
     
+    @cached
     def get_stats(self):
         """Get collection statistics"""
-        total_urls = self.collection.count_documents({})
+        total_urls = self.collection.estimated_document_count()
         tags = self.get_all_tags()
         total_tags = len(tags)
         
@@ -1,11 +1,19 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash
 from app.services.auth_service import login_required
-from app.repositories.url_repo import url_repo
-from app.services.url_service import validate_url_data, prepare_url_data, validate_url_collection
+from app.repositories.url_repo import url_repo, BROKEN_LINKS_FILTER, CARD_PROJECTION
+from app.services.url_service import document_url_hashes, get_domain, validate_url_data, prepare_url_data, validate_url_collection
 
 bp = Blueprint('admin', __name__, url_prefix='/admin')
 
 
+def duplicate_message(url_data, exclude_id=None):
+    """Error naming the stored entry that already has one of url_data's links, or None"""
+    duplicate = url_repo.find_duplicate(document_url_hashes(url_data), exclude_id)
+    if duplicate is None:
+        return None
+    return f'A URL in this entry is already stored in "{duplicate.get("title", "another entry")}"'
+
+
 @bp.route('/')
 @login_required
 def dashboard():
@@ -13,27 +21,40 @@ def dashboard():
     # Get query parameters
     search = request.args.get('q', '').strip()
     tag = request.args.get('tag', '').strip()
-    page = request.args.get('page', 1, type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
+    cursor = request.args.get('cursor', '').strip()
+    broken_only = request.args.get('health') == 'broken'
     
-    # Get URLs with filters
+    # Get URLs with filters (cursor links seek directly instead of skipping)
     result = url_repo.find_all(
+        filters=BROKEN_LINKS_FILTER if broken_only else None,
         search=search if search else None,
         tag=tag if tag else None,
         page=page,
-        per_page=24
+        per_page=24,
+        cursor=cursor if cursor else None,
+        count_limit=current_app.config['COUNT_LIMIT'],
+        projection=CARD_PROJECTION
     )
     
     # Get stats
     stats = url_repo.get_stats()
+    broken_total, broken_capped = url_repo.count(filters=BROKEN_LINKS_FILTER, limit=current_app.config['COUNT_LIMIT'])
     
     return render_template(
         'dashboard.html',
         urls=result['urls'],
         total=result['total'],
+        total_capped=result['total_capped'],
         page=result['page'],
         pages=result['pages'],
+        next_cursor=result['next_cursor'],
+        prev_cursor=result['prev_cursor'],
         search=search,
         selected_tag=tag,
+        health='broken' if broken_only else None,
+        broken_total=broken_total,
+        broken_capped=broken_capped,
         stats=stats
     )
 
@@ -61,6 +82,12 @@ def create_url():
                     'subtitle': subtitles[i].strip() if i < len(subtitles) else ''
                 })
         
+        # A blank title is filled in from the page by the metadata pipeline;
+        # until then the first URL's domain stands in for it
+        title_pending = not title and bool(url_array) and current_app.config['METADATA_FETCH']
+        if title_pending:
+            title = get_domain(url_array[0]['url']) or url_array[0]['url']
+        
         if not url_array:
             flash('At least one URL is required', 'error')
         elif not title:
@@ -83,13 +110,15 @@ def create_url():
                     'tags': tags,
                     'urls': url_array
                 })
+                if title_pending:
+                    url_data['title_pending'] = True
                 result = url_repo.create(url_data)
                 
                 if result:
                     flash(f'Collection with {len(url_array)} URL(s) added successfully!', 'success')
                     return redirect(url_for('admin.dashboard'))
                 else:
-                    flash('Failed to create collection', 'error')
+                    flash(duplicate_message(url_data) or 'Failed to create collection', 'error')
             else:
                 # Show validation errors
                 for field, error in errors.items():
@@ -153,7 +182,7 @@ def edit_url(url_id):
                         flash(f'Collection updated successfully with {len(url_items)} URL(s)!', 'success')
                         return redirect(url_for('admin.dashboard'))
                     else:
-                        flash('Failed to update collection', 'error')
+                        flash(duplicate_message(update_data, url['_id']) or 'Failed to update collection', 'error')
                 else:
                     for field, error in errors.items():
                         flash(f'{field.title()}: {error}', 'error')
@@ -168,7 +197,7 @@ def edit_url(url_id):
                     flash('URL updated successfully!', 'success')
                     return redirect(url_for('admin.dashboard'))
                 else:
-                    flash('Failed to update URL', 'error')
+                    flash(duplicate_message(update_data, url['_id']) or 'Failed to update URL', 'error')
             else:
                 for field, error in errors.items():
                     flash(f'{field.title()}: {error}', 'error')
@@ -188,3 +217,27 @@ def delete_url(url_id):
         flash('Failed to delete URL', 'error')
     
     return redirect(url_for('admin.dashboard'))
+
+
+@bp.route('/slow-queries')
+@login_required
+def slow_queries():
+    """Slowest MongoDB query shapes from the slow query log, with their explain plans"""
+    order = request.args.get('sort', 'max')
+    if order not in ('max', 'total', 'count'):
+        order = 'max'
+    
+    enabled = current_app.config['SLOW_QUERY_LOG']
+    if enabled:
+        from app.slow_query_log import slow_query_log
+        shapes = slow_query_log.worst_shapes(limit=50, order=order)
+    else:
+        shapes = []
+    
+    return render_template(
+        'slow_queries.html',
+        shapes=shapes,
+        order=order,
+        enabled=enabled,
+        threshold_ms=current_app.config['SLOW_QUERY_MS']
+    )
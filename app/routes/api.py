@@ -0,0 +1,21 @@
+from flask import Blueprint, current_app, jsonify, request
+from app.services.suggest_service import suggest_index
+
+bp = Blueprint('api', __name__, url_prefix='/api')
+
+
+@bp.route('/suggest')
+def suggest():
+    """Prefix suggestions for the search box (titles, tags and domains)"""
+    prefix = request.args.get('q', '').strip()
+    limit = min(request.args.get('limit', current_app.config['SUGGEST_MAX_RESULTS'], type=int),
+                current_app.config['SUGGEST_MAX_RESULTS'])
+    
+    response = jsonify({
+        'query': prefix,
+        'suggestions': suggest_index.suggest(prefix, limit=max(limit, 1))
+    })
+    # Short-lived so repeated keystrokes reuse answers without going stale
+    response.cache_control.public = True
+    response.cache_control.max_age = 30
+    return response
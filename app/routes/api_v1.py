@@ -0,0 +1,152 @@
+from flask import Blueprint, current_app, jsonify, request, url_for
+from app.repositories.url_repo import TAG_MODES, url_repo, decode_cursor
+from app.services.url_service import normalize_domain, normalize_tags
+
+bp = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+# Fields clients may select with ?fields=; "id" is always returned
+API_FIELDS = ('title', 'url', 'urls', 'description', 'tags', 'domains', 'created_at', 'updated_at')
+DEFAULT_LIMIT = 24
+MAX_LIMIT = 100
+# Tags counted within the results when ?facets=tags is given
+TAG_FACET_LIMIT = 20
+
+
+class APIError(Exception):
+    """Client error reported as {"error": message}"""
+    
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@bp.errorhandler(APIError)
+def handle_api_error(e):
+    return jsonify({'error': e.message}), e.status
+
+
+def selected_fields():
+    """Fields requested with ?fields=a,b (all API fields when absent)"""
+    raw = request.args.get('fields', '').strip()
+    if not raw:
+        return API_FIELDS
+    fields = tuple(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+    if not fields or any(field not in API_FIELDS for field in fields):
+        raise APIError(f"Unknown field in 'fields'; choose from: {', '.join(API_FIELDS)}")
+    return fields
+
+
+def field_projection(fields):
+    """Mongo projection for the selected fields (created_at is always read for cursors)"""
+    projection = {field: 1 for field in fields if field != 'urls'}
+    if 'urls' in fields:
+        # Collection items without the link checker's bookkeeping
+        projection['urls.url'] = 1
+        projection['urls.subtitle'] = 1
+    projection['created_at'] = 1
+    return projection
+
+
+def _serialize(doc, fields):
+    """API shape of a document; repository results may be cached, so never mutate them"""
+    item = {'id': doc['_id']}
+    for field in fields:
+        if field in doc:
+            item[field] = doc[field]
+    return item
+
+
+def list_arguments():
+    """
+    Validate the list query string
+    Returns (fields, find_all keyword arguments); shared with the async handlers.
+    """
+    fields = selected_fields()
+    
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    if limit is None or not 1 <= limit <= MAX_LIMIT:
+        raise APIError(f"'limit' must be between 1 and {MAX_LIMIT}")
+    
+    cursor = request.args.get('cursor', '').strip() or None
+    if cursor and decode_cursor(cursor) is None:
+        raise APIError("Invalid 'cursor'")
+    page = max(request.args.get('page', 1, type=int) or 1, 1)
+    
+    tag_mode = request.args.get('match', 'all').strip() or 'all'
+    if tag_mode not in TAG_MODES:
+        raise APIError(f"'match' must be one of: {', '.join(TAG_MODES)}")
+    facets = request.args.get('facets', '').strip()
+    if facets not in ('', 'tags'):
+        raise APIError("'facets' must be 'tags'")
+    tags = sorted(normalize_tags(request.args.getlist('tag')))
+    
+    return fields, dict(
+        search=request.args.get('q', '').strip() or None,
+        tag=tags or None,
+        domain=normalize_domain(request.args.get('domain', '')) or None,
+        page=page,
+        per_page=limit,
+        cursor=cursor,
+        count_limit=current_app.config['COUNT_LIMIT'],
+        projection=field_projection(fields),
+        tag_mode=tag_mode,
+        tag_facets=TAG_FACET_LIMIT if facets else None
+    )
+
+
+def list_response(result, fields):
+    """JSON body for a find_all result, with links to the neighbouring pages"""
+    # Links carry every parameter except the position, which they replace
+    params = {key: values for key, values in request.args.lists() if key not in ('cursor', 'page')}
+    links = {'next': None, 'prev': None}
+    if result['ranked']:
+        # Relevance-ranked searches paginate by page number
+        if result['page'] < result['pages']:
+            links['next'] = url_for('api_v1.list_urls', page=result['page'] + 1, **params)
+        if result['page'] > 1:
+            links['prev'] = url_for('api_v1.list_urls', page=result['page'] - 1, **params)
+    else:
+        if result['next_cursor']:
+            links['next'] = url_for('api_v1.list_urls', cursor=result['next_cursor'], **params)
+        if result['prev_cursor']:
+            links['prev'] = url_for('api_v1.list_urls', cursor=result['prev_cursor'], **params)
+    
+    body = {
+        'data': [_serialize(doc, fields) for doc in result['urls']],
+        'meta': {
+            'total': result['total'],
+            'total_capped': result['total_capped'],
+            'limit': result['per_page'],
+            'order': 'relevance' if result['ranked'] else 'newest'
+        },
+        'links': links
+    }
+    if result.get('tag_counts') is not None:
+        body['facets'] = {'tags': result['tag_counts']}
+    return jsonify(body)
+
+
+def detail_response(doc, fields):
+    """JSON body for a single entry (404 when missing)"""
+    if not doc:
+        raise APIError('Not found', 404)
+    return jsonify({'data': _serialize(doc, fields)})
+
+
+@bp.route('/urls')
+def list_urls():
+    """
+    List catalog entries newest first (relevance order for q=), with keyset pagination
+    Repeat tag= for entries with every tag (match=any: at least one);
+    facets=tags adds the most common tags among all matching entries.
+    """
+    fields, arguments = list_arguments()
+    return list_response(url_repo.find_all(**arguments), fields)
+
+
+@bp.route('/urls/<url_id>')
+def get_url(url_id):
+    """Single catalog entry by id"""
+    fields = selected_fields()
+    return detail_response(url_repo.find_by_id(url_id, field_projection(fields)), fields)
@@ -0,0 +1,94 @@
+from flask import before_render_template, current_app, template_rendered
+from app.page_cache import page_cache
+from app.repositories.async_url_repo import async_url_repo
+from app.routes import api, api_v1, public
+
+
+def stream_template_async(template_name, **context):
+    """Async counterpart of flask.stream_template: the response body is an async iterator"""
+    app = current_app._get_current_object()
+    env = app.extensions.get('async_jinja_env')
+    if env is None:
+        # Own template cache and no bytecode cache: async templates compile differently
+        env = app.jinja_env.overlay(cache_size=400, bytecode_cache=None)
+        env.is_async = True
+        app.extensions['async_jinja_env'] = env
+    
+    template = env.get_template(template_name)
+    app.update_template_context(context)
+    
+    async def generate():
+        # Same signals as flask.stream_template, so render-time metrics cover both modes
+        before_render_template.send(app, _async_wrapper=app.ensure_sync, template=template, context=context)
+        async for chunk in template.generate_async(context):
+            yield chunk
+        template_rendered.send(app, _async_wrapper=app.ensure_sync, template=template, context=context)
+    
+    return app.response_class(generate(), mimetype='text/html')
+
+
+@page_cache.cached
+async def index():
+    """Public URL catalog page; cards stream as the async cursor yields them"""
+    search, tags, filters = public.catalog_arguments()
+    
+    total, total_capped, tag_counts = await async_url_repo.count_with_facets(
+        limit=current_app.config['COUNT_LIMIT'],
+        tag_facets=public.TAG_FACET_LIMIT,
+        **filters
+    )
+    all_tags = await async_url_repo.get_all_tags()
+    all_domains = await async_url_repo.get_domain_counts(public.DOMAIN_FACET_LIMIT)
+    urls = async_url_repo.iter_all(
+        batch_size=current_app.config['CATALOG_BATCH_SIZE'],
+        **filters
+    )
+    
+    return stream_template_async(
+        'index.html',
+        urls=urls,
+        total=total,
+        total_capped=total_capped,
+        search=search,
+        selected_tags=tags,
+        tag_mode=filters['tag_mode'],
+        tag_counts=tag_counts,
+        all_tags=all_tags,
+        selected_domain=filters['domain'],
+        all_domains=all_domains
+    )
+
+
+async def url_detail(url_id):
+    """Full card details (description and every collection link) loaded on demand"""
+    url = await async_url_repo.find_details(url_id)
+    if not url:
+        return {'error': 'Not found'}, 404
+    return url
+
+
+async def list_urls():
+    """GET /api/v1/urls"""
+    fields, arguments = api_v1.list_arguments()
+    return api_v1.list_response(await async_url_repo.find_all(**arguments), fields)
+
+
+async def get_url(url_id):
+    """GET /api/v1/urls/<id>"""
+    fields = api_v1.selected_fields()
+    return api_v1.detail_response(await async_url_repo.find_by_id(url_id, api_v1.field_projection(fields)), fields)
+
+
+async def suggest():
+    """GET /api/suggest (in-memory, so the sync view runs inline)"""
+    return api.suggest()
+
+
+# Endpoint -> async handler; every other endpoint is served by the WSGI app
+ASYNC_VIEWS = {
+    'public.index': index,
+    'public.url_detail': url_detail,
+    'api_v1.list_urls': list_urls,
+    'api_v1.get_url': get_url,
+    'api.suggest': suggest
+}
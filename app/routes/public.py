@@ -1,31 +1,83 @@
-from flask import Blueprint, render_template, request
+from flask import Blueprint, current_app, jsonify, request, stream_template
+from app.page_cache import page_cache
 from app.repositories.url_repo import url_repo
+from app.services.url_service import normalize_domain, normalize_tags
 
 bp = Blueprint('public', __name__)
 
+# Most linked domains offered as filter chips
+DOMAIN_FACET_LIMIT = 12
+
+# Most common tags within the current results offered as filter chips
+TAG_FACET_LIMIT = 15
+
+
+def catalog_arguments():
+    """
+    (search, tags, repository filters) from the catalog query string
+    Repeat tag= to combine tags; match=any widens the filter from entries
+    with every selected tag to entries with at least one of them.
+    """
+    search = request.args.get('q', '').strip()
+    tags = sorted(normalize_tags(request.args.getlist('tag')))
+    domain = normalize_domain(request.args.get('domain', ''))
+    
+    filters = dict(
+        search=search if search else None,
+        tag=tags if tags else None,
+        domain=domain if domain else None,
+        tag_mode='any' if request.args.get('match') == 'any' else 'all'
+    )
+    return search, tags, filters
+
 
 @bp.route('/')
+@page_cache.cached
 def index():
     """Public URL catalog page - displays all URLs"""
-    # Get query parameters
-    search = request.args.get('q', '').strip()
-    tag = request.args.get('tag', '').strip()
+    search, tags, filters = catalog_arguments()
     
-    # Get all URLs with filters (no pagination)
-    result = url_repo.find_all(
-        search=search if search else None,
-        tag=tag if tag else None,
-        per_page=None  # Fetch all URLs
+    # Count up front so the header renders before any card is fetched; the
+    # tag counts for the matching entries come back in the same round trip
+    total, total_capped, tag_counts = url_repo.count_with_facets(
+        limit=current_app.config['COUNT_LIMIT'],
+        tag_facets=TAG_FACET_LIMIT,
+        **filters
+    )
+    
+    # Lazily iterated cursor (no pagination); documents are pulled in batches
+    # while the template streams, so memory stays flat as the catalog grows
+    urls = url_repo.iter_all(
+        batch_size=current_app.config['CATALOG_BATCH_SIZE'],
+        **filters
     )
     
-    # Get all tags for filter
+    # Catalog-wide tags for the snapshot and the most linked domains for the filters
     all_tags = url_repo.get_all_tags()
+    all_domains = url_repo.get_domain_counts(DOMAIN_FACET_LIMIT)
     
-    return render_template(
+    return stream_template(
         'index.html',
-        urls=result['urls'],
-        total=result['total'],
+        urls=urls,
+        total=total,
+        total_capped=total_capped,
         search=search,
-        selected_tag=tag,
-        all_tags=all_tags
+        selected_tags=tags,
+        tag_mode=filters['tag_mode'],
+        tag_counts=tag_counts,
+        all_tags=all_tags,
+        selected_domain=filters['domain'],
+        all_domains=all_domains
     )
+
+
+@bp.route('/url/<url_id>')
+def url_detail(url_id):
+    """Full card details (description and every collection link) loaded on demand"""
+    url = url_repo.find_details(url_id)
+    
+    if not url:
+        return jsonify({'error': 'Not found'}), 404
+    
+    url['_id'] = str(url['_id'])
+    return jsonify(url)
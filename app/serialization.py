@@ -0,0 +1,67 @@
+from datetime import date, datetime, timezone
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; the stdlib encoder produces the same output
+    orjson = None
+
+
+def _to_json(value):
+    """Encode the BSON/Python types our documents contain"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        # Mongo hands back naive UTC datetimes
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider using orjson when installed
+    ObjectIds become strings and datetimes ISO 8601 (UTC) with either encoder.
+    """
+    
+    @staticmethod
+    def default(value):
+        try:
+            return _to_json(value)
+        except TypeError:
+            return DefaultJSONProvider.default(value)
+    
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            kwargs.setdefault('default', self.default)
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+    
+    def dumps_bytes(self, obj, indent=False):
+        """Encode straight to bytes (skips a decode/encode round trip with orjson)"""
+        if orjson is None:
+            if indent:
+                return self.dumps(obj, indent=2).encode()
+            return self.dumps(obj, separators=(',', ':')).encode()
+        
+        # Native datetime output with OPT_NAIVE_UTC matches _to_json exactly
+        option = orjson.OPT_NAIVE_UTC
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(
+            self.dumps_bytes(obj, indent=indent) + b'\n',
+            mimetype=self.mimetype
+        )
@@ -1,22 +1,30 @@
-from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
 from functools import wraps
 from flask import session, redirect, url_for, flash
 import os
 
 
-ph = PasswordHasher()
+_ph = None
+
+
+def _password_hasher():
+    """argon2 hasher, imported on first use to keep it off the cold-start path"""
+    global _ph
+    if _ph is None:
+        from argon2 import PasswordHasher
+        _ph = PasswordHasher()
+    return _ph
 
 
 def hash_password(password):
     """Hash a password using argon2"""
-    return ph.hash(password)
+    return _password_hasher().hash(password)
 
 
 def verify_password(password_hash, password):
     """Verify a password against its hash"""
+    from argon2.exceptions import VerifyMismatchError
     try:
-        ph.verify(password_hash, password)
+        _password_hasher().verify(password_hash, password)
         return True
     except VerifyMismatchError:
         return False
@@ -0,0 +1,185 @@
+import asyncio
+import ssl
+import time
+from datetime import datetime
+from urllib.parse import quote, urljoin, urlsplit
+from app.services.url_service import get_domain, link_targets
+
+# Statuses worth another attempt (rate limited or a flaky upstream)
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+MAX_REDIRECTS = 5
+MAX_HEADER_LINES = 100
+USER_AGENT = 'URL-Organizer-LinkChecker/1.0'
+
+
+class LinkChecker:
+    """
+    Concurrent link-health checker on asyncio
+    Checks run under a global concurrency limit and a per-domain one (keyed
+    by url_service.get_domain) so no single site gets hammered. Each check is
+    a HEAD request, repeated as GET when the server rejects HEAD, following
+    redirects; network errors, timeouts and retryable statuses are retried
+    with exponential backoff.
+    """
+    
+    def __init__(self, concurrency=100, per_domain=4, timeout=10.0, retries=2, backoff=0.5, verify_tls=True):
+        self.concurrency = concurrency
+        self.per_domain = per_domain
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._ssl = ssl.create_default_context()
+        if not verify_tls:
+            self._ssl.check_hostname = False
+            self._ssl.verify_mode = ssl.CERT_NONE
+        self._global = None
+        self._domains = {}
+    
+    def _domain_limit(self, url):
+        domain = get_domain(url).lower()
+        semaphore = self._domains.get(domain)
+        if semaphore is None:
+            semaphore = self._domains[domain] = asyncio.Semaphore(self.per_domain)
+        return semaphore
+    
+    async def check_many(self, urls):
+        """Check URLs concurrently; returns {url: result} (duplicates are checked once)"""
+        unique = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*(self.check(url) for url in unique))
+        return dict(zip(unique, results))
+    
+    async def check(self, url):
+        """
+        Check one URL
+        Returns {'ok', 'status', 'error', 'latency_ms', 'checked_at'} plus
+        'final_url' when the URL redirected elsewhere.
+        """
+        if self._global is None:
+            # Created lazily so the semaphore belongs to the running event loop
+            self._global = asyncio.Semaphore(self.concurrency)
+        # Domain slot first, so tasks queued behind a busy site don't hold global slots
+        async with self._domain_limit(url), self._global:
+            status = final_url = error = None
+            latency = 0.0
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+                start = time.perf_counter()
+                try:
+                    status, final_url = await asyncio.wait_for(self._probe(url), self.timeout)
+                    error = None
+                except asyncio.TimeoutError:
+                    status, error = None, f'timeout after {self.timeout:g}s'
+                except (OSError, ssl.SSLError, ValueError, asyncio.IncompleteReadError) as e:
+                    status, error = None, f'{type(e).__name__}: {e}'.strip(': ')
+                latency = time.perf_counter() - start
+                if status is not None and status not in RETRY_STATUSES:
+                    break
+        
+        result = {
+            'ok': status is not None and status < 400,
+            'status': status,
+            'error': error,
+            'latency_ms': round(latency * 1000),
+            'checked_at': datetime.utcnow()
+        }
+        if final_url and final_url != url:
+            result['final_url'] = final_url
+        return result
+    
+    async def _probe(self, url):
+        """HEAD (then GET if the server refuses HEAD); returns (status, final url)"""
+        status, final_url = await self._follow('HEAD', url)
+        if status >= 400 and status not in RETRY_STATUSES:
+            # Many servers answer HEAD with 403/404/405/501 while GET works
+            status, final_url = await self._follow('GET', url)
+        return status, final_url
+    
+    async def _follow(self, method, url):
+        """Request a URL, following up to MAX_REDIRECTS redirects"""
+        for _ in range(MAX_REDIRECTS + 1):
+            status, location = await self._request(method, url)
+            if status not in REDIRECT_STATUSES or not location:
+                break
+            url = urljoin(url, location)
+        return status, url
+    
+    async def _request(self, method, url):
+        """One request on a fresh connection; returns (status, Location header) without reading the body"""
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f'unsupported URL {url!r}')
+        secure = parts.scheme == 'https'
+        hostname = parts.hostname.encode('idna').decode('ascii')
+        
+        reader, writer = await asyncio.open_connection(
+            hostname, parts.port or (443 if secure else 80),
+            ssl=self._ssl if secure else None,
+            server_hostname=hostname if secure else None
+        )
+        try:
+            target = quote(parts.path or '/', safe="/%:@!$&'()*+,;=~-._")
+            if parts.query:
+                target += '?' + quote(parts.query, safe="/%:@!$&'()*+,;=~-._?")
+            host = hostname if parts.port is None else f'{hostname}:{parts.port}'
+            writer.write((
+                f'{method} {target} HTTP/1.1\r\n'
+                f'Host: {host}\r\n'
+                f'User-Agent: {USER_AGENT}\r\n'
+                'Accept: */*\r\n'
+                'Connection: close\r\n\r\n'
+            ).encode('ascii'))
+            await writer.drain()
+            
+            status_line = await reader.readline()
+            fields = status_line.split(None, 2)
+            if len(fields) < 2 or not fields[0].startswith(b'HTTP/'):
+                raise ValueError('invalid HTTP response')
+            status = int(fields[1])
+            
+            location = None
+            for _ in range(MAX_HEADER_LINES):
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.strip().lower() == 'location':
+                    location = value.strip()
+            return status, location
+        finally:
+            writer.close()
+
+
+async def check_catalog(repo, checker, batch_size=500, query=None, on_batch=None):
+    """
+    Check every stored URL and write the results back
+    Documents are read batch_size at a time; while one batch's results are
+    written (bulk writes on a worker thread) the next batch is being checked.
+    on_batch(checked_docs, results) is called after each batch for progress.
+    Returns {'documents', 'links', 'broken', 'updated'}.
+    """
+    totals = {'documents': 0, 'links': 0, 'broken': 0, 'updated': 0}
+    pending = None
+    
+    async def flush(task):
+        if task is not None:
+            totals['updated'] += await task
+    
+    for docs in repo.iter_link_batches(batch_size, query):
+        urls = [url for doc in docs for url in link_targets(doc)]
+        results = await checker.check_many(urls)
+        
+        totals['documents'] += len(docs)
+        totals['links'] += len(results)
+        totals['broken'] += sum(1 for result in results.values() if not result['ok'])
+        if on_batch is not None:
+            on_batch(docs, results)
+        
+        await flush(pending)
+        pending = asyncio.create_task(asyncio.to_thread(repo.record_link_health, docs, results))
+    
+    await flush(pending)
+    if totals['updated']:
+        repo.touch_catalog()
+    return totals
@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from app.config import Config
+from app.repositories.url_repo import url_repo
+
+
+class MemoryIndex:
+    """
+    Base for in-process indexes built from the urls collection
+    Subclasses implement clear(), load() and apply_write(); this class handles
+    background (re)builds, fork safety and the max-age rebuild that picks up
+    writes made by other worker processes.
+    """
+    
+    name = 'index'
+    projection = None
+    
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+    
+    def _reset(self):
+        """Start empty (also used in forked children, whose copy may be half built)"""
+        self._lock = threading.Lock()
+        self._loading = False
+        self._writes = 0
+        self._pid = os.getpid()
+        self.loaded_at = None
+        self.clear()
+    
+    def clear(self):
+        """Drop all indexed data"""
+        raise NotImplementedError
+    
+    def load(self, documents):
+        """Replace the index with one built from an iterable of documents; returns its size"""
+        raise NotImplementedError
+    
+    def apply_write(self, removed=(), added=()):
+        """Repository write listener (see URLRepository.add_write_listener)"""
+        raise NotImplementedError
+    
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+    
+    def _mark_loaded(self):
+        """Called by load() while holding the lock, after swapping in new data"""
+        self.loaded_at = time.monotonic()
+    
+    def _record_write(self):
+        """Called by apply_write() while holding the lock; returns False until loaded"""
+        self._writes += 1
+        return self.loaded
+    
+    def warm(self):
+        """Build the index from the urls collection"""
+        cursor = url_repo.collection.find({}, self.projection, batch_size=Config.CATALOG_BATCH_SIZE)
+        return self.load(cursor)
+    
+    def warm_in_background(self):
+        """Build (or rebuild) the index on a daemon thread unless one is already running"""
+        if self._pid != os.getpid():
+            self._reset()
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+        
+        def run():
+            try:
+                while True:
+                    writes = self._writes
+                    size = self.warm()
+                    # Rescan if a write landed mid-scan and may be missing from the snapshot
+                    if writes == self._writes:
+                        break
+                print(f"✓ {self.name} built: {size} entries (pid {os.getpid()})")
+            except Exception as e:
+                print(f"✗ {self.name} build failed: {e}")
+            finally:
+                self._loading = False
+        
+        threading.Thread(target=run, name=self.name, daemon=True).start()
+    
+    def invalidate(self):
+        """Rebuild in the background after writes made by other processes (keeps serving meanwhile)"""
+        if self.loaded:
+            self.warm_in_background()
+    
+    def ensure_fresh(self):
+        """
+        Return True if the index can answer queries now
+        Never blocks: a missing or expired index is (re)built in the background,
+        unless MEMORY_INDEX_ON_DEMAND is off.
+        """
+        if not Config.MEMORY_INDEX_ON_DEMAND:
+            return self._pid == os.getpid() and self.loaded
+        if self._pid != os.getpid() or not self.loaded:
+            self.warm_in_background()
+            return False
+        if self.max_age and time.monotonic() - self.loaded_at > self.max_age:
+            self.warm_in_background()
+        return True
+    
+    def stats(self):
+        """Load state for /health"""
+        return {
+            'loaded': self.loaded,
+            'age': round(time.monotonic() - self.loaded_at, 1) if self.loaded else None
+        }
@@ -0,0 +1,346 @@
+import codecs
+import os
+import queue
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+from app.config import Config
+from app.repositories.query_cache import QueryCache
+from app.repositories.url_repo import url_repo
+from app.services.url_service import MAX_DESCRIPTION_LENGTH, MAX_SUBTITLE_LENGTH, MAX_TITLE_LENGTH, normalize_url
+
+USER_AGENT = 'URL-Organizer-Metadata/1.0'
+HTML_TYPES = frozenset({'text/html', 'application/xhtml+xml'})
+CHUNK_SIZE = 8192
+
+# <meta charset="..."> or the http-equiv form, looked for when the header names no charset
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([-\w.:]+)', re.IGNORECASE)
+
+# Fields needed to decide what a document is missing
+METADATA_PROJECTION = {'title': 1, 'title_pending': 1, 'description': 1, 'url': 1, 'urls': 1}
+
+# Documents with a placeholder title or an empty description or subtitle
+MISSING_METADATA_FILTER = {'$or': [
+    {'title_pending': True},
+    {'description': {'$in': ['', None]}},
+    {'urls.subtitle': {'$in': ['', None]}}
+]}
+
+
+def _clean(text, limit):
+    """Collapse whitespace and cut to the stored field's limit"""
+    text = ' '.join((text or '').split())
+    return text[:limit].rstrip() if len(text) > limit else text
+
+
+class HeadParser(HTMLParser):
+    """
+    Streaming parser for the metadata in an HTML <head>
+    Feed it chunks as they arrive; done turns True at </head> or <body>, so
+    the rest of the page never has to be downloaded.
+    """
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.done = False
+        self.title = None
+        self.canonical = None
+        self.meta = {}
+        self._title_parts = None
+    
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        attrs = {name: value or '' for name, value in attrs}
+        if tag == 'body':
+            self.done = True
+        elif tag == 'title' and self.title is None:
+            self._title_parts = []
+        elif tag == 'meta':
+            key = (attrs.get('name') or attrs.get('property') or '').strip().lower()
+            if key and attrs.get('content', '').strip():
+                self.meta.setdefault(key, attrs['content'])
+        elif tag == 'link' and 'canonical' in attrs.get('rel', '').lower().split() and attrs.get('href'):
+            if self.canonical is None:
+                self.canonical = attrs['href'].strip()
+    
+    def handle_endtag(self, tag):
+        if tag == 'title' and self._title_parts is not None:
+            self.title = ''.join(self._title_parts)
+            self._title_parts = None
+        elif tag == 'head':
+            self.done = True
+    
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+    
+    def result(self, base_url):
+        """{'title', 'description', 'canonical_url'} with missing values as None"""
+        title = _clean(self.title or self.meta.get('og:title'), MAX_TITLE_LENGTH)
+        description = _clean(
+            self.meta.get('description') or self.meta.get('og:description') or self.meta.get('twitter:description'),
+            MAX_DESCRIPTION_LENGTH
+        )
+        return {
+            'title': title or None,
+            'description': description or None,
+            'canonical_url': urljoin(base_url, self.canonical) if self.canonical else None
+        }
+
+
+def fetch_metadata(url, timeout=5.0, max_bytes=262144):
+    """
+    Fetch a page and parse title, description and canonical URL from its <head>
+    The body is read in CHUNK_SIZE pieces and parsing stops at </head>, after
+    max_bytes or at the timeout, whichever comes first. Returns None when the
+    page can't be fetched or isn't HTML.
+    """
+    request = urllib.request.Request(url, headers={
+        'User-Agent': USER_AGENT,
+        'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.1'
+    })
+    deadline = time.monotonic() + timeout
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            if response.headers.get_content_type() not in HTML_TYPES:
+                return None
+            
+            first = response.read(CHUNK_SIZE)
+            charset = response.headers.get_content_charset()
+            if not charset:
+                match = _META_CHARSET.search(first)
+                charset = match.group(1).decode('ascii') if match else 'utf-8'
+            try:
+                decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+            except LookupError:
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            
+            parser = HeadParser()
+            chunk, size = first, len(first)
+            while chunk:
+                parser.feed(decoder.decode(chunk))
+                if parser.done or size >= max_bytes or time.monotonic() > deadline:
+                    break
+                chunk = response.read(min(CHUNK_SIZE, max_bytes - size))
+                size += len(chunk)
+            return parser.result(response.geturl())
+    except (OSError, ValueError, urllib.error.URLError, UnicodeError):
+        return None
+
+
+class MetadataPipeline:
+    """
+    Background fill-in of missing titles, descriptions and subtitles
+    Registered as a repository write listener: newly created entries are
+    queued without blocking the request (when the queue is full they are
+    dropped and counted; scripts/fetch_metadata.py picks them up later).
+    Worker threads fetch each page's <head> through a cache keyed by
+    normalized URL and write the results back in bulk batches.
+    """
+    
+    name = 'metadata'
+    
+    def __init__(self, repo, workers=4, queue_size=1000, timeout=5.0, max_bytes=262144,
+                 cache_size=2048, cache_ttl=86400, batch_size=50, flush_interval=2.0):
+        self.repo = repo
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.cache = QueryCache(max_entries=cache_size, ttl=cache_ttl)
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+    
+    def _reset(self):
+        """Start without workers (also used in forked children, which don't inherit the threads)"""
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._threads = []
+        self._pid = os.getpid()
+        self.counters = {'queued': 0, 'dropped': 0, 'fetched': 0, 'failed': 0, 'updated': 0}
+    
+    def apply_write(self, removed=(), added=()):
+        """Repository write listener: queue new entries (updates and deletes are ignored)"""
+        if removed:
+            return
+        for doc in added:
+            if needs_metadata(doc):
+                self.submit(doc)
+    
+    def submit(self, doc):
+        """Queue a document for fetching; never blocks"""
+        if self._pid != os.getpid():
+            self._reset()
+        self._start()
+        try:
+            self._queue.put_nowait({field: doc.get(field) for field in ('_id', *METADATA_PROJECTION)})
+            self.counters['queued'] += 1
+        except queue.Full:
+            self.counters['dropped'] += 1
+    
+    def _start(self):
+        """Start the worker threads on first use in this process"""
+        with self._lock:
+            if self._threads:
+                return
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'metadata-{n}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+    
+    def _work(self):
+        """Worker loop: plan updates for queued documents and flush them in batches"""
+        while True:
+            try:
+                doc = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                doc = None
+            
+            if doc is not None:
+                try:
+                    updates = self.plan_updates(doc)
+                except Exception as e:
+                    print(f"✗ Metadata fetch for {doc.get('_id')} failed: {e}")
+                    updates = []
+                with self._lock:
+                    self._pending.extend(updates)
+            
+            with self._lock:
+                due = len(self._pending) >= self.batch_size or (
+                    self._pending and time.monotonic() - self._last_flush >= self.flush_interval
+                )
+                batch = self._pending if due else []
+                if due:
+                    self._pending = []
+                    self._last_flush = time.monotonic()
+            if batch:
+                self._write(batch)
+    
+    def _write(self, updates):
+        try:
+            self.counters['updated'] += self.repo.apply_metadata(updates)
+        except Exception as e:
+            print(f"✗ Metadata write failed: {e}")
+    
+    def fetch(self, url):
+        """Page metadata for a URL, served from the cache when the same page was fetched recently"""
+        key = normalize_url(url)
+        found, metadata = self.cache.get(key)
+        if found:
+            return metadata
+        
+        metadata = fetch_metadata(url, self.timeout, self.max_bytes)
+        if metadata is None:
+            self.counters['failed'] += 1
+        else:
+            self.counters['fetched'] += 1
+            self.cache.set(key, metadata, self.cache.generation)
+        return metadata
+    
+    def plan_updates(self, doc):
+        """
+        Fetch the pages of one document and return its (filter, update) pairs
+        Each filter pins the value being replaced (the placeholder title, an
+        empty description or subtitle at a given URL), so edits an admin made
+        in the meantime are never overwritten.
+        """
+        updates = []
+        items = [item for item in doc.get('urls') or [] if isinstance(item, dict) and item.get('url')]
+        primary = doc.get('url') or (items[0]['url'] if items else None)
+        if not primary:
+            return updates
+        
+        page = self.fetch(primary)
+        if page:
+            fields = {'metadata_fetched_at': datetime.utcnow()}
+            if page['canonical_url']:
+                fields['canonical_url'] = page['canonical_url']
+            updates.append(({'_id': doc['_id']}, {'$set': fields}))
+            
+            if doc.get('title_pending') and page['title']:
+                updates.append((
+                    {'_id': doc['_id'], 'title': doc.get('title'), 'title_pending': True},
+                    {'$set': {'title': page['title']}, '$unset': {'title_pending': ''}}
+                ))
+            if not doc.get('description') and page['description']:
+                updates.append((
+                    {'_id': doc['_id'], 'description': {'$in': ['', None]}},
+                    {'$set': {'description': page['description']}}
+                ))
+        
+        for idx, item in enumerate(doc.get('urls') or []):
+            if not isinstance(item, dict) or not item.get('url') or item.get('subtitle'):
+                continue
+            # A single-item collection already shows the page title as its title
+            if len(items) == 1 and doc.get('title_pending'):
+                continue
+            item_page = page if item['url'] == primary else self.fetch(item['url'])
+            if item_page and item_page['title']:
+                updates.append((
+                    {'_id': doc['_id'], f'urls.{idx}.url': item['url'], f'urls.{idx}.subtitle': {'$in': ['', None]}},
+                    {'$set': {f'urls.{idx}.subtitle': _clean(item_page['title'], MAX_SUBTITLE_LENGTH)}}
+                ))
+        return updates
+    
+    def run(self, docs, on_batch=None):
+        """
+        Fill in metadata for documents synchronously (backfills)
+        Pages are fetched on a pool of self.workers threads; updates are
+        written every batch_size documents. Returns the number of documents changed.
+        """
+        updated = 0
+        batch = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for updates in pool.map(self.plan_updates, docs):
+                batch.append(updates)
+                if len(batch) >= self.batch_size:
+                    updated += self.repo.apply_metadata([update for group in batch for update in group])
+                    if on_batch is not None:
+                        on_batch(batch)
+                    batch = []
+        if batch:
+            updated += self.repo.apply_metadata([update for group in batch for update in group])
+            if on_batch is not None:
+                on_batch(batch)
+        self.counters['updated'] += updated
+        return updated
+    
+    def stats(self):
+        """Queue and fetch counters for /health"""
+        return {
+            **self.counters,
+            'waiting': self._queue.qsize(),
+            'workers': len(self._threads),
+            'cache': self.cache.stats()
+        }
+
+
+def needs_metadata(doc):
+    """Whether a document has a placeholder title or an empty description or subtitle"""
+    if doc.get('title_pending') or not doc.get('description'):
+        return True
+    return any(isinstance(item, dict) and not item.get('subtitle') for item in doc.get('urls') or [])
+
+
+# Singleton instance
+metadata_pipeline = MetadataPipeline(
+    url_repo,
+    workers=Config.METADATA_WORKERS,
+    queue_size=Config.METADATA_QUEUE_SIZE,
+    timeout=Config.METADATA_TIMEOUT,
+    max_bytes=Config.METADATA_MAX_BYTES,
+    cache_size=Config.METADATA_CACHE_SIZE,
+    cache_ttl=Config.METADATA_CACHE_TTL
+)
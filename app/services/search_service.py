@@ -0,0 +1,255 @@
+import math
+import re
+from collections import Counter, OrderedDict
+from urllib.parse import urlsplit
+from app.config import Config
+from app.services.memory_index import MemoryIndex
+from app.services.url_service import document_domains
+
+# Per-field weight of each token occurrence (BM25F-style); tags get the biggest boost
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'tags': 2.5,
+    'url': 1.5,
+    'subtitle': 1.5,
+    'description': 1.0
+}
+
+# Fields needed to index a document
+SEARCH_PROJECTION = {
+    'title': 1,
+    'description': 1,
+    'tags': 1,
+    'url': 1,
+    'urls': 1,
+    'domains': 1,
+    'created_at': 1
+}
+
+_WORD = re.compile(r'[^\W_]+')
+_HOST = re.compile(r'[^\W_](?:[\w-]*[^\W_])?(?:\.[^\W_](?:[\w-]*[^\W_])?)+')
+
+
+def tokenize(text):
+    """Lowercase word tokens"""
+    return _WORD.findall((text or '').lower())
+
+
+def tokenize_url(url):
+    """
+    Tokens for a URL
+    The host contributes its labels plus the whole host without "www." (so
+    "python.org" matches as one term); the path contributes its words.
+    """
+    try:
+        parts = urlsplit((url or '').strip().lower())
+    except ValueError:
+        return tokenize(url)
+    host = (parts.hostname or '').removeprefix('www.')
+    tokens = [label for label in host.split('.') if label] if host else []
+    if '.' in host:
+        tokens.append(host)
+    tokens.extend(tokenize(parts.path))
+    tokens.extend(tokenize(parts.query))
+    return tokens
+
+
+def query_terms(text):
+    """Unique terms of a search query, including dotted hosts typed as-is"""
+    text = (text or '').lower()
+    terms = [host.removeprefix('www.') for host in _HOST.findall(text)]
+    terms.extend(tokenize(text))
+    return list(dict.fromkeys(terms))
+
+
+def document_terms(doc):
+    """Weighted term frequencies and weighted length of one document"""
+    terms = Counter()
+    for token in tokenize(doc.get('title')):
+        terms[token] += FIELD_WEIGHTS['title']
+    for token in tokenize(doc.get('description')):
+        terms[token] += FIELD_WEIGHTS['description']
+    for tag in doc.get('tags') or []:
+        for token in tokenize(tag):
+            terms[token] += FIELD_WEIGHTS['tags']
+    for token in tokenize_url(doc.get('url')):
+        terms[token] += FIELD_WEIGHTS['url']
+    for item in doc.get('urls') or []:
+        if not isinstance(item, dict):
+            continue
+        for token in tokenize_url(item.get('url')):
+            terms[token] += FIELD_WEIGHTS['url']
+        for token in tokenize(item.get('subtitle')):
+            terms[token] += FIELD_WEIGHTS['subtitle']
+    return terms, sum(terms.values())
+
+
+class _InvertedIndex:
+    """Postings and per-document data; built off-lock and swapped in whole by SearchIndex.load"""
+    
+    def __init__(self):
+        self.postings = {}
+        self.docs = []
+        self.slots = {}
+        self.free = []
+        self.total_length = 0.0
+    
+    def add(self, doc):
+        """Index one document, replacing any previous version"""
+        if doc['_id'] in self.slots:
+            self.remove(doc['_id'])
+        terms, length = document_terms(doc)
+        created_at = doc.get('created_at')
+        entry = (
+            doc['_id'],
+            created_at.timestamp() if created_at else 0.0,
+            frozenset(doc.get('tags') or ()),
+            length,
+            tuple(terms),
+            frozenset(doc['domains'] if 'domains' in doc else document_domains(doc))
+        )
+        if self.free:
+            slot = self.free.pop()
+            self.docs[slot] = entry
+        else:
+            slot = len(self.docs)
+            self.docs.append(entry)
+        self.slots[doc['_id']] = slot
+        self.total_length += length
+        for term, frequency in terms.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+            postings[slot] = frequency
+    
+    def remove(self, url_id):
+        """Unindex one document by id"""
+        slot = self.slots.pop(url_id, None)
+        if slot is None:
+            return
+        length, terms = self.docs[slot][3:5]
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(slot, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_length -= length
+        self.docs[slot] = None
+        self.free.append(slot)
+
+
+class SearchIndex(MemoryIndex):
+    """
+    In-process inverted index with BM25 ranking
+    Covers titles, descriptions, tags, URLs and collection subtitles. Postings
+    map each term to {slot: weighted frequency}; slots of deleted documents
+    are reused, so incremental writes never rebuild the index.
+    """
+    
+    name = 'Search index'
+    projection = SEARCH_PROJECTION
+    
+    def __init__(self, k1=1.2, b=0.75, max_age=300, result_cache_size=64):
+        self.k1 = k1
+        self.b = b
+        self.result_cache_size = result_cache_size
+        super().__init__(max_age=max_age)
+    
+    def clear(self):
+        """Drop the inverted index and cached results"""
+        self._index = _InvertedIndex()
+        self._results = OrderedDict()
+    
+    def load(self, documents):
+        """Replace the index with one built from an iterable of documents"""
+        index = _InvertedIndex()
+        for doc in documents:
+            index.add(doc)
+        
+        with self._lock:
+            self._index = index
+            self._results = OrderedDict()
+            self._mark_loaded()
+        return len(index.slots)
+    
+    def apply_write(self, removed=(), added=()):
+        """Repository write listener: unindex previous versions, index new ones"""
+        with self._lock:
+            if not self._record_write():
+                return
+            for doc in removed:
+                self._index.remove(doc['_id'])
+            for doc in added:
+                self._index.add(doc)
+            self._results.clear()
+    
+    def search(self, query, tag=None, limit=None, domain=None, tag_mode='all'):
+        """
+        Document ids matching any query term, best BM25 score first
+        Ties go to the newest document; tag restricts results to an exact tag
+        (or, given several, to entries with all of them, or any with
+        tag_mode='any') and domain to entries linking to that (normalized) domain.
+        """
+        tags = (tag,) if isinstance(tag, str) else tuple(tag or ())
+        key = (query, tags, tag_mode, limit, domain)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                return cached
+            
+            index = self._index
+            count = len(index.slots)
+            if not count:
+                return []
+            average_length = index.total_length / count or 1.0
+            k1, b = self.k1, self.b
+            docs = index.docs
+            
+            scores = {}
+            for term in query_terms(query):
+                postings = index.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for slot, frequency in postings.items():
+                    norm = k1 * (1 - b + b * docs[slot][3] / average_length)
+                    scores[slot] = scores.get(slot, 0.0) + idf * frequency * (k1 + 1) / (frequency + norm)
+            
+            if tags and tag_mode == 'any':
+                scores = {slot: score for slot, score in scores.items() if not docs[slot][2].isdisjoint(tags)}
+            elif tags:
+                scores = {slot: score for slot, score in scores.items() if docs[slot][2].issuperset(tags)}
+            if domain:
+                scores = {slot: score for slot, score in scores.items() if domain in docs[slot][5]}
+            
+            ranked = sorted(scores, key=lambda slot: (-scores[slot], -docs[slot][1]))
+            if limit is not None:
+                ranked = ranked[:limit]
+            result = [docs[slot][0] for slot in ranked]
+            
+            self._results[key] = result
+            while len(self._results) > self.result_cache_size:
+                self._results.popitem(last=False)
+            return result
+    
+    def count_tags(self, ids, limit=20):
+        """[{'tag', 'count'}] for the most common tags among the given document ids"""
+        counts = Counter()
+        with self._lock:
+            index = self._index
+            for url_id in ids:
+                slot = index.slots.get(url_id)
+                if slot is not None:
+                    counts.update(index.docs[slot][2])
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [{'tag': tag, 'count': count} for tag, count in ranked]
+    
+    def stats(self):
+        """Size of the index for /health"""
+        return dict(super().stats(), documents=len(self._index.slots), terms=len(self._index.postings))
+
+
+# Shared instance; installed as url_repo.search_engine by create_app when SEARCH_ENGINE=bm25
+search_index = SearchIndex(max_age=Config.MEMORY_INDEX_MAX_AGE)
@@ -0,0 +1,160 @@
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+from app.config import Config
+from app.services.memory_index import MemoryIndex
+from app.services.url_service import normalize_domain
+
+# Separates term, kind and identifier inside an index key; stripped from input
+_SEP = '\x1f'
+
+# Ranking of suggestion kinds when several match the same prefix
+KIND_ORDER = {'tag': 0, 'domain': 1, 'title': 2}
+
+# Fields needed to index a document
+SUGGEST_PROJECTION = {'title': 1, 'tags': 1, 'url': 1, 'urls.url': 1}
+
+_WHITESPACE = re.compile(r'\s+')
+_WORD_START = re.compile(r'(?:^|\s)(?=\S)')
+
+
+def normalize_term(text):
+    """Lowercase, collapse whitespace and drop the key separator"""
+    return _WHITESPACE.sub(' ', (text or '').replace(_SEP, ' ')).strip().lower()
+
+
+def document_keys(doc, max_title_words=6):
+    """
+    Index keys for one document
+    Titles are indexed from each of their first words so "guide" finds
+    "Python Style Guide"; tags and domains are shared between documents.
+    """
+    keys = []
+    
+    title = normalize_term(doc.get('title'))
+    if title:
+        ident = str(doc['_id'])
+        for start in [m.start() for m in _WORD_START.finditer(title)][:max_title_words]:
+            keys.append(_SEP.join((title[start:].lstrip(), 'title', ident)))
+    
+    for tag in dict.fromkeys(normalize_term(tag) for tag in doc.get('tags') or []):
+        if tag:
+            keys.append(_SEP.join((tag, 'tag', tag)))
+    
+    urls = [doc.get('url')] + [item.get('url') for item in doc.get('urls') or [] if isinstance(item, dict)]
+    for domain in dict.fromkeys(normalize_domain(url) for url in urls if url):
+        if domain:
+            keys.append(_SEP.join((domain, 'domain', domain)))
+    
+    return keys
+
+
+class SuggestIndex(MemoryIndex):
+    """
+    In-process prefix index over titles, tags and domains
+    Keys live in one sorted list, so a lookup is a bisect plus a short scan.
+    Reference counts let tags and domains shared by many documents be added
+    and removed incrementally as the repository reports writes.
+    """
+    
+    name = 'Suggest index'
+    projection = SUGGEST_PROJECTION
+    
+    def __init__(self, max_title_words=6, scan_limit=200, max_age=300):
+        self.max_title_words = max_title_words
+        self.scan_limit = scan_limit
+        super().__init__(max_age=max_age)
+    
+    def clear(self):
+        """Empty the key list, reference counts and titles"""
+        self._keys = []
+        self._refs = Counter()
+        self._titles = {}
+    
+    def load(self, documents):
+        """Replace the index with one built from an iterable of documents"""
+        refs = Counter()
+        titles = {}
+        for doc in documents:
+            refs.update(document_keys(doc, self.max_title_words))
+            if doc.get('title'):
+                titles[str(doc['_id'])] = doc['title']
+        keys = sorted(refs)
+        
+        with self._lock:
+            self._keys, self._refs, self._titles = keys, refs, titles
+            self._mark_loaded()
+        return len(keys)
+    
+    def apply_write(self, removed=(), added=()):
+        """Repository write listener: move reference counts by document keys"""
+        with self._lock:
+            if not self._record_write():
+                return
+            for doc in removed:
+                for key in document_keys(doc, self.max_title_words):
+                    self._refs[key] -= 1
+                    if self._refs[key] <= 0:
+                        del self._refs[key]
+                        i = bisect_left(self._keys, key)
+                        if i < len(self._keys) and self._keys[i] == key:
+                            del self._keys[i]
+                self._titles.pop(str(doc['_id']), None)
+            for doc in added:
+                for key in document_keys(doc, self.max_title_words):
+                    self._refs[key] += 1
+                    if self._refs[key] == 1:
+                        insort(self._keys, key)
+                if doc.get('title'):
+                    self._titles[str(doc['_id'])] = doc['title']
+    
+    def suggest(self, prefix, limit=10):
+        """
+        Suggestions for a prefix, best first
+        Returns dicts with type, text and either count (tags, domains) or id (titles).
+        """
+        if not self.ensure_fresh():
+            # Serve nothing rather than block a keystroke on a full scan
+            return []
+        
+        prefix = normalize_term(prefix)
+        if not prefix:
+            return []
+        
+        with self._lock:
+            start = bisect_left(self._keys, prefix)
+            end = min(bisect_left(self._keys, prefix + '\uffff', start), start + self.scan_limit)
+            refs = self._refs
+            titles = self._titles
+            
+            seen = set()
+            candidates = []
+            for key in self._keys[start:end]:
+                term, kind, ident = key.split(_SEP)
+                if (kind, ident) in seen:
+                    continue
+                seen.add((kind, ident))
+                if kind == 'title':
+                    candidates.append((KIND_ORDER[kind], 0, len(term), term, kind, ident))
+                else:
+                    candidates.append((KIND_ORDER[kind], -refs[key], len(term), term, kind, ident))
+            
+            candidates.sort()
+            suggestions = []
+            for _, negative_count, _, term, kind, ident in candidates[:limit]:
+                if kind == 'title':
+                    suggestions.append({'type': kind, 'text': titles.get(ident, term), 'id': ident})
+                else:
+                    suggestions.append({'type': kind, 'text': ident, 'count': -negative_count})
+        return suggestions
+    
+    def stats(self):
+        """Size of the index for /health"""
+        return dict(super().stats(), keys=len(self._keys))
+
+
+# Shared instance; registered as a url_repo write listener by create_app
+suggest_index = SuggestIndex(
+    max_title_words=Config.SUGGEST_TITLE_WORDS,
+    max_age=Config.MEMORY_INDEX_MAX_AGE
+)
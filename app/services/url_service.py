@@ -1,5 +1,51 @@
+import hashlib
 import re
-from urllib.parse import urlparse
+from collections import namedtuple
+from urllib.parse import parse_qsl, quote, urlencode, urlparse, urlsplit
+
+# Compiled once at import; shared by single and batch validation
+URL_PATTERN = re.compile(
+    r'^https?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+
+MAX_URL_LENGTH = 2048
+MAX_TITLE_LENGTH = 200
+MAX_DESCRIPTION_LENGTH = 1000
+MAX_SUBTITLE_LENGTH = 200
+MAX_TAGS = 20
+MAX_COLLECTION_URLS = 10
+
+# Query parameters that only record where a click came from; ignored when comparing links
+TRACKING_PARAMS = frozenset({'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid', 'yclid'})
+TRACKING_PREFIXES = ('utm_',)
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# Characters left unescaped when re-encoding a path; escapes of unreserved ones are decoded
+_PATH_SAFE = "/:@!$&'()*+,;=~-._%"
+_UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+_ESCAPE = re.compile(r'%([0-9A-Fa-f]{2})')
+
+# Human-readable messages for (field, code) errors reported by validate_rows
+ERROR_MESSAGES = {
+    ('url', 'required'): "URL is required",
+    ('url', 'too_long'): "URL is too long",
+    ('url', 'invalid'): "Invalid URL format. Must start with http:// or https://",
+    ('title', 'required'): "Title is required",
+    ('title', 'too_long'): f"Title is too long (max {MAX_TITLE_LENGTH} characters)",
+    ('description', 'too_long'): f"Description is too long (max {MAX_DESCRIPTION_LENGTH} characters)",
+    ('tags', 'too_many'): f"Too many tags (max {MAX_TAGS})",
+    ('urls', 'required'): "At least one URL is required",
+    ('urls', 'too_many'): f"Maximum {MAX_COLLECTION_URLS} URLs allowed per collection",
+    ('url', 'duplicate'): "Same link as an earlier URL in this collection",
+    ('subtitle', 'too_long'): f"Subtitle is too long (max {MAX_SUBTITLE_LENGTH} characters)",
+}
+
+# Per-row outcome of validate_rows: errors is () on success, otherwise a tuple
+# of (field, code) or (field, code, item_index) for collection items
+RowResult = namedtuple('RowResult', ['index', 'valid', 'data', 'errors'])
 
 
 def normalize_tags(tags_input):
@@ -18,17 +64,8 @@ def normalize_tags(tags_input):
     else:
         tags = [tag.strip() for tag in tags_input.split(',')]
     
-    # Normalize: lowercase, strip, remove empty, remove duplicates
-    normalized = []
-    seen = set()
-    
-    for tag in tags:
-        tag = tag.lower().strip()
-        if tag and tag not in seen:
-            normalized.append(tag)
-            seen.add(tag)
-    
-    return normalized
+    # Normalize: lowercase, strip, remove empty, remove duplicates (order kept)
+    return list(dict.fromkeys(tag for tag in (t.lower().strip() for t in tags) if tag))
 
 
 def validate_url(url):
@@ -36,27 +73,64 @@ def validate_url(url):
     Validate URL format
     Returns (is_valid, error_message)
     """
-    if not url:
-        return False, "URL is required"
-    
-    if len(url) > 2048:
-        return False, "URL is too long"
-    
-    # Basic URL pattern
-    url_pattern = re.compile(
-        r'^https?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-    
-    if not url_pattern.match(url):
-        return False, "Invalid URL format. Must start with http:// or https://"
+    code = _check_url(url)
+    if code:
+        return False, ERROR_MESSAGES[('url', code)]
     
     return True, None
 
 
+def _check_url(url):
+    """Return an error code for a URL, or None if it is valid"""
+    if not url:
+        return 'required'
+    if len(url) > MAX_URL_LENGTH:
+        return 'too_long'
+    if not URL_PATTERN.match(url):
+        return 'invalid'
+    return None
+
+
+def _check_title(title):
+    if not title:
+        return 'required'
+    if len(title) > MAX_TITLE_LENGTH:
+        return 'too_long'
+    return None
+
+
+def _check_description(description):
+    return 'too_long' if len(description) > MAX_DESCRIPTION_LENGTH else None
+
+
+def _check_tags(tags):
+    return 'too_many' if len(tags) > MAX_TAGS else None
+
+
+def _check_collection_size(items):
+    if not items:
+        return 'required'
+    if len(items) > MAX_COLLECTION_URLS:
+        return 'too_many'
+    return None
+
+
+def _check_subtitle(subtitle):
+    return 'too_long' if len(subtitle) > MAX_SUBTITLE_LENGTH else None
+
+
+def _check_entry_fields(data, errors):
+    """Add form errors for the title, description and tags shared by both entry kinds"""
+    for field, value, check in (
+        ('title', data.get('title', '').strip(), _check_title),
+        ('description', data.get('description', '').strip(), _check_description),
+        ('tags', normalize_tags(data.get('tags', '')), _check_tags)
+    ):
+        code = check(value)
+        if code:
+            errors[field] = ERROR_MESSAGES[(field, code)]
+
+
 def validate_url_data(data):
     """
     Validate URL form data (backward compatibility for single URLs)
@@ -70,23 +144,7 @@ def validate_url_data(data):
     if not is_valid:
         errors['url'] = error
     
-    # Validate title
-    title = data.get('title', '').strip()
-    if not title:
-        errors['title'] = "Title is required"
-    elif len(title) > 200:
-        errors['title'] = "Title is too long (max 200 characters)"
-    
-    # Validate description (optional)
-    description = data.get('description', '').strip()
-    if description and len(description) > 1000:
-        errors['description'] = "Description is too long (max 1000 characters)"
-    
-    # Validate tags (optional)
-    tags = normalize_tags(data.get('tags', ''))
-    if len(tags) > 20:
-        errors['tags'] = "Too many tags (max 20)"
-    
+    _check_entry_fields(data, errors)
     return len(errors) == 0, errors
 
 
@@ -96,42 +154,32 @@ def validate_url_collection(data):
     Returns (is_valid, errors_dict)
     """
     errors = {}
-    
-    # Validate title
-    title = data.get('title', '').strip()
-    if not title:
-        errors['title'] = "Title is required"
-    elif len(title) > 200:
-        errors['title'] = "Title is too long (max 200 characters)"
-    
-    # Validate description (optional)
-    description = data.get('description', '').strip()
-    if description and len(description) > 1000:
-        errors['description'] = "Description is too long (max 1000 characters)"
-    
-    # Validate tags (optional)
-    tags = normalize_tags(data.get('tags', ''))
-    if len(tags) > 20:
-        errors['tags'] = "Too many tags (max 20)"
+    _check_entry_fields(data, errors)
     
     # Validate URLs array
     urls = data.get('urls', [])
-    if not urls:
-        errors['urls'] = "At least one URL is required"
-    elif len(urls) > 10:
-        errors['urls'] = "Maximum 10 URLs allowed per collection"
+    code = _check_collection_size(urls)
+    if code:
+        errors['urls'] = ERROR_MESSAGES[('urls', code)]
     else:
         # Validate each URL and subtitle
+        seen = {}
         for idx, url_item in enumerate(urls):
             url = url_item.get('url', '').strip()
             subtitle = url_item.get('subtitle', '').strip()
             
             is_valid_url, url_error = validate_url(url)
+            canonical = canonicalize_url(url)
             if not is_valid_url:
                 errors[f'url_{idx}'] = f"URL #{idx + 1}: {url_error}"
+            elif canonical in seen:
+                errors[f'url_{idx}'] = f"URL #{idx + 1}: same link as URL #{seen[canonical] + 1}"
+            else:
+                seen[canonical] = idx
             
-            if subtitle and len(subtitle) > 200:
-                errors[f'subtitle_{idx}'] = f"Subtitle #{idx + 1} is too long (max 200 characters)"
+            code = _check_subtitle(subtitle)
+            if code:
+                errors[f'subtitle_{idx}'] = f"Subtitle #{idx + 1}: {ERROR_MESSAGES[('subtitle', code)]}"
     
     return len(errors) == 0, errors
 
@@ -172,17 +220,91 @@ def validate_batch(url_data_list, max_size=50):
     valid_items = []
     errors_list = []
     
-    for idx, data in enumerate(url_data_list):
-        is_valid, errors = validate_url_data(data)
-        if is_valid:
-            valid_items.append(data)
+    for result in validate_rows(url_data_list):
+        if result.valid:
+            valid_items.append(url_data_list[result.index])
         else:
-            error_msg = f"URL #{idx + 1}: " + ", ".join([f"{k}: {v}" for k, v in errors.items()])
-            errors_list.append(error_msg)
+            errors_list.append(format_row_errors(result))
     
     return len(valid_items) > 0, valid_items, errors_list
 
 
+def validate_rows(rows):
+    """
+    Validate and prepare many rows of URL data in one pass
+    Rows with a 'urls' list are treated as collections, others as single URLs.
+    Returns a list of RowResult; data holds the prepared document for valid
+    rows. No error strings are built here - see format_row_errors.
+    """
+    results = []
+    append = results.append
+    
+    for idx, row in enumerate(rows):
+        errors = []
+        items = row.get('urls')
+        is_collection = isinstance(items, list)
+        
+        if not is_collection:
+            url = (row.get('url') or '').strip()
+            code = _check_url(url)
+            if code:
+                errors.append(('url', code))
+        
+        title = (row.get('title') or '').strip()
+        description = (row.get('description') or '').strip()
+        tags = normalize_tags(row.get('tags', ''))
+        for field, code in (
+            ('title', _check_title(title)),
+            ('description', _check_description(description)),
+            ('tags', _check_tags(tags))
+        ):
+            if code:
+                errors.append((field, code))
+        
+        if is_collection:
+            data = {'title': title, 'description': description, 'tags': tags, 'urls': []}
+            code = _check_collection_size(items)
+            if code:
+                errors.append(('urls', code))
+            else:
+                seen = set()
+                for item_idx, item in enumerate(items):
+                    url = (item.get('url') or '').strip()
+                    subtitle = (item.get('subtitle') or '').strip()
+                    code = _check_url(url)
+                    canonical = canonicalize_url(url)
+                    if code:
+                        errors.append(('url', code, item_idx))
+                    elif canonical in seen:
+                        errors.append(('url', 'duplicate', item_idx))
+                    seen.add(canonical)
+                    if _check_subtitle(subtitle):
+                        errors.append(('subtitle', 'too_long', item_idx))
+                    data['urls'].append({'url': url, 'subtitle': subtitle})
+        else:
+            data = {'url': url, 'title': title, 'description': description, 'tags': tags}
+        
+        if errors:
+            append(RowResult(idx, False, None, tuple(errors)))
+        else:
+            append(RowResult(idx, True, data, ()))
+    
+    return results
+
+
+def format_row_errors(result):
+    """Format a failed RowResult the way validate_batch reports errors"""
+    parts = []
+    for error in result.errors:
+        message = ERROR_MESSAGES[(error[0], error[1])]
+        if len(error) == 3:
+            label = 'URL' if error[0] == 'url' else error[0].title()
+            parts.append(f"{error[0]}_{error[2]}: {label} #{error[2] + 1}: {message}")
+        else:
+            parts.append(f"{error[0]}: {message}")
+    return f"URL #{result.index + 1}: " + ", ".join(parts)
+
+
 def get_domain(url):
     """Extract domain from URL"""
     try:
@@ -190,3 +312,101 @@ def get_domain(url):
         return parsed.netloc
     except:
         return ''
+
+
+def normalize_url(url):
+    """
+    Normalized form of a URL for cache keys and comparisons
+    Lowercases the scheme and host, drops default ports, the fragment and
+    a trailing slash; the path and query are kept as-is.
+    """
+    try:
+        parsed = urlparse((url or '').strip())
+        scheme = parsed.scheme.lower()
+        host = (parsed.hostname or '').rstrip('.')
+        port = parsed.port
+    except ValueError:
+        return (url or '').strip()
+    
+    if port and (scheme, port) not in (('http', 80), ('https', 443)):
+        host = f"{host}:{port}"
+    path = parsed.path.rstrip('/')
+    query = f"?{parsed.query}" if parsed.query else ''
+    return f"{scheme}://{host}{path}{query}"
+
+
+def canonicalize_url(url):
+    """
+    Canonical form of a link, used to detect duplicates
+    URLs with the same canonical form are the same link: the scheme (http or
+    https), host case, a default port, a trailing slash, the fragment,
+    percent-encoding case and tracking parameters (utm_*, fbclid, ...) are
+    ignored and the remaining query parameters are sorted.
+    """
+    url = (url or '').strip()
+    try:
+        parsed = urlsplit(url)
+        host = (parsed.hostname or '').rstrip('.')
+        port = parsed.port
+        host = host.encode('idna').decode('ascii') if host else host
+    except (ValueError, UnicodeError):
+        return url.lower()
+    
+    if ':' in host:
+        host = f"[{host}]"
+    if port and port != DEFAULT_PORTS.get(parsed.scheme.lower()):
+        host = f"{host}:{port}"
+    path = quote(_ESCAPE.sub(_normalize_escape, parsed.path), safe=_PATH_SAFE).rstrip('/')
+    params = sorted(
+        (name, value) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    )
+    query = f"?{urlencode(params)}" if params else ''
+    return f"{host}{path}{query}"
+
+
+def _normalize_escape(match):
+    """Decode an escaped unreserved character, otherwise uppercase the escape"""
+    char = chr(int(match.group(1), 16))
+    return char if char in _UNRESERVED else f"%{match.group(1).upper()}"
+
+
+def url_hash(url):
+    """Fixed-size key of a link's canonical form (stored in url_hashes)"""
+    return hashlib.blake2b(canonicalize_url(url).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def link_targets(doc):
+    """Every URL stored on a document (the single url and each collection item)"""
+    targets = []
+    if doc.get('url'):
+        targets.append(doc['url'])
+    for item in doc.get('urls') or []:
+        if isinstance(item, dict) and item.get('url'):
+            targets.append(item['url'])
+    return targets
+
+
+def document_url_hashes(doc):
+    """url_hash of every link on a document, without repeats"""
+    return list(dict.fromkeys(url_hash(url) for url in link_targets(doc)))
+
+
+def normalize_domain(value):
+    """
+    Normalized domain of a URL or bare host name
+    Lowercase, without port, credentials, trailing dot or a leading www.
+    """
+    value = (value or '').strip()
+    if '//' not in value:
+        value = f"//{value}"
+    try:
+        host = (urlsplit(value).hostname or '').rstrip('.')
+    except ValueError:
+        return ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def document_domains(doc):
+    """Normalized domain of every link on a document, without repeats"""
+    return [domain for domain in dict.fromkeys(normalize_domain(url) for url in link_targets(doc)) if domain]
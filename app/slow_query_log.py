@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from pymongo import DESCENDING, monitoring
+from pymongo.errors import CollectionInvalid, PyMongoError
+from app.config import Config
+
+# Commands that can be explained, and the fields that make up their query shape
+SHAPE_FIELDS = {
+    'find': ('filter', 'sort', 'hint'),
+    'aggregate': ('pipeline', 'hint'),
+    'count': ('query', 'hint'),
+    'distinct': ('key', 'query'),
+    'findAndModify': ('query', 'sort'),
+    'update': ('updates',),
+    'delete': ('deletes',)
+}
+
+# Session and routing fields pymongo adds to commands; explain gets its own
+SESSION_FIELDS = frozenset({'lsid', 'txnNumber', 'autocommit', 'startTransaction', 'readConcern', 'writeConcern'})
+
+# Explain output subtrees that say nothing about the chosen plan
+_IGNORED_PLAN_FIELDS = frozenset({'rejectedPlans', 'command', 'serverInfo', 'serverParameters'})
+
+MAX_PLAN_CHARS = 20000
+
+
+def query_shape(value):
+    """A filter, sort or pipeline with every literal replaced by '?' (keys and operators kept)"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = [query_shape(item) for item in value]
+        if shapes and all(shape == '?' for shape in shapes):
+            return ['?']
+        return shapes
+    return '?'
+
+
+def command_shape(name, command):
+    """Shape of an explainable command; update/delete shapes cover their first statement's filter"""
+    shape = {}
+    for field in SHAPE_FIELDS[name]:
+        if field not in command:
+            continue
+        value = command[field]
+        if field in ('updates', 'deletes'):
+            statement = value[0] if value else {}
+            shape['q'] = query_shape(statement.get('q', {}))
+        elif field == 'key':
+            shape['key'] = value
+        else:
+            shape[field] = query_shape(value)
+    return shape
+
+
+def explain_command(name, command):
+    """The command to pass to explain: session fields dropped, one statement for update/delete"""
+    explained = {
+        key: value for key, value in command.items()
+        if not key.startswith('$') and key not in SESSION_FIELDS
+    }
+    if name in ('update', 'delete'):
+        field = 'updates' if name == 'update' else 'deletes'
+        explained[field] = list(explained.get(field) or [])[:1]
+    return explained
+
+
+def summarize_plan(explain):
+    """
+    (winning plan, stages, index names) from explain output
+    Walks the whole document, so find, aggregate ($cursor stages) and
+    sharded explains all work; rejected plans are skipped.
+    """
+    winning = None
+    stages = []
+    indexes = []
+    
+    def walk(node):
+        nonlocal winning
+        if isinstance(node, dict):
+            stage = node.get('stage')
+            if isinstance(stage, str) and stage not in stages:
+                stages.append(stage)
+            index = node.get('indexName')
+            if isinstance(index, str) and index not in indexes:
+                indexes.append(index)
+            for key, value in node.items():
+                if key in _IGNORED_PLAN_FIELDS:
+                    continue
+                if key == 'winningPlan' and winning is None:
+                    winning = value
+                walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+    
+    walk(explain)
+    return winning, stages, indexes
+
+
+def repository_caller():
+    """'URLRepository.find_all' for the outermost repository method on this thread's stack, or None"""
+    caller = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.startswith('app.repositories.') and module != 'app.repositories.query_cache':
+            owner = frame.f_locals.get('self')
+            prefix = type(owner).__name__ if owner is not None else module.rsplit('.', 1)[1]
+            caller = f'{prefix}.{frame.f_code.co_name}'
+        frame = frame.f_back
+    return caller
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """
+    Records MongoDB commands slower than a threshold into a capped collection
+    Registered on the MongoDB clients as a command listener, so every
+    repository query is covered without wrapping it. A slow command is
+    sampled with its query shape (literals removed), duration and calling
+    repository method. The first sample of a shape in each explain_interval
+    also gets its queryPlanner explain. Explains and writes run on a
+    background thread, never on the request that was slow.
+    """
+    
+    collection_name = 'slow_queries'
+    
+    def __init__(self, threshold_ms=100, explain_interval=300, size_bytes=8 * 1024 * 1024, queue_size=1000):
+        self.threshold_micros = threshold_ms * 1000
+        self.explain_interval = explain_interval
+        self.size_bytes = size_bytes
+        self.queue_size = queue_size
+        self._created = False
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+    
+    def _reset(self):
+        """Start without a worker (also used in forked children, which don't inherit the thread)"""
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._started = {}
+        self._explained_at = {}
+        self._thread = None
+        self._pid = os.getpid()
+        self.counters = {'recorded': 0, 'explained': 0, 'dropped': 0, 'errors': 0}
+    
+    def started(self, event):
+        if event.command_name in SHAPE_FIELDS:
+            self._started[(event.request_id, event.connection_id)] = (event.command, event.database_name)
+    
+    def succeeded(self, event):
+        self._finish(event, None)
+    
+    def failed(self, event):
+        self._finish(event, str(event.failure.get('errmsg') or 'failed'))
+    
+    def _finish(self, event, error):
+        entry = self._started.pop((event.request_id, event.connection_id), None)
+        if entry is None or event.duration_micros < self.threshold_micros:
+            return
+        command, database = entry
+        name = event.command_name
+        collection = command.get(name)
+        if collection == self.collection_name:
+            return
+        
+        shape = json.dumps(command_shape(name, command), default=str)
+        fingerprint = hashlib.sha1(f'{database}.{collection}:{name}:{shape}'.encode()).hexdigest()[:16]
+        sample = {
+            'fingerprint': fingerprint,
+            'command': name,
+            'collection': collection,
+            'shape': shape,
+            'duration_ms': round(event.duration_micros / 1000, 3),
+            'source': repository_caller(),
+            'at': datetime.utcnow(),
+            'pid': os.getpid()
+        }
+        if error is not None:
+            sample['error'] = error
+        
+        # Explain a shape at most once per interval
+        now = time.monotonic()
+        explain = None
+        with self._lock:
+            if now - self._explained_at.get(fingerprint, float('-inf')) >= self.explain_interval:
+                self._explained_at[fingerprint] = now
+                explain = explain_command(name, command)
+        self._submit((sample, database, explain))
+    
+    def _submit(self, item):
+        if self._pid != os.getpid():
+            self._reset()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name='slow-query-log', daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.counters['dropped'] += 1
+    
+    def _work(self):
+        while True:
+            sample, database, explain = self._queue.get()
+            try:
+                if explain is not None:
+                    self._explain(sample, database, explain)
+                self._collection().insert_one(sample)
+                self.counters['recorded'] += 1
+            except Exception as e:
+                self.counters['errors'] += 1
+                print(f"✗ Slow query log write failed: {e}")
+    
+    def _explain(self, sample, database, command):
+        """Add the plan summary of command to sample"""
+        from app.db import get_db
+        try:
+            result = get_db().client[database].command('explain', command, verbosity='queryPlanner')
+        except PyMongoError as e:
+            sample['explain_error'] = str(e)
+            return
+        winning, stages, indexes = summarize_plan(result)
+        sample['collscan'] = 'COLLSCAN' in stages
+        sample['stages'] = stages
+        sample['indexes'] = indexes
+        sample['plan'] = json.dumps(winning if winning is not None else result, default=str, indent=2)[:MAX_PLAN_CHARS]
+        self.counters['explained'] += 1
+    
+    def _collection(self):
+        from app.db import get_db
+        db = get_db()
+        if not self._created:
+            try:
+                db.create_collection(self.collection_name, capped=True, size=self.size_bytes)
+            except CollectionInvalid:
+                pass  # Already exists
+            self._created = True
+        return db[self.collection_name]
+    
+    def worst_shapes(self, limit=50, order='max'):
+        """
+        Query shapes grouped by fingerprint, worst first
+        order is 'max' (slowest single run), 'total' (time spent overall) or
+        'count'. Each group carries its latest explained plan, if any.
+        """
+        sort_field = {'max': 'max_ms', 'total': 'total_ms', 'count': 'count'}[order]
+        collection = self._collection()
+        groups = list(collection.aggregate([
+            {'$group': {
+                '_id': '$fingerprint',
+                'command': {'$first': '$command'},
+                'collection': {'$first': '$collection'},
+                'shape': {'$first': '$shape'},
+                'sources': {'$addToSet': '$source'},
+                'count': {'$sum': 1},
+                'max_ms': {'$max': '$duration_ms'},
+                'avg_ms': {'$avg': '$duration_ms'},
+                'total_ms': {'$sum': '$duration_ms'},
+                'last_at': {'$max': '$at'},
+                'collscan': {'$max': '$collscan'}
+            }},
+            {'$sort': {sort_field: -1, '_id': 1}},
+            {'$limit': limit}
+        ]))
+        for group in groups:
+            group['sources'] = sorted(source for source in group['sources'] if source)
+            group['explained'] = collection.find_one(
+                {'fingerprint': group['_id'], 'plan': {'$exists': True}},
+                {'plan': 1, 'stages': 1, 'indexes': 1, 'at': 1},
+                sort=[('$natural', DESCENDING)]
+            )
+        return groups
+    
+    def stats(self):
+        """Counters for /health"""
+        return {**self.counters, 'waiting': self._queue.qsize(), 'threshold_ms': self.threshold_micros / 1000}
+
+
+# Singleton instance
+slow_query_log = SlowQueryLog(
+    threshold_ms=Config.SLOW_QUERY_MS,
+    explain_interval=Config.SLOW_QUERY_EXPLAIN_INTERVAL,
+    size_bytes=Config.SLOW_QUERY_LOG_BYTES
+)
@@ -0,0 +1,10 @@
+"""
+ASGI entrypoint for the async serving mode
+Usage: uvicorn asgi:app --workers 4
+"""
+
+import os
+from app.asgi import create_asgi_app
+
+env = os.getenv('FLASK_ENV', 'development')
+app = create_asgi_app(env)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark for /api/v1/urls payloads: response size per field selection and
+serialization time with orjson vs the stdlib encoder
+Usage: python bench/api_serialization.py [--repeat 20]
+"""
+
+import sys
+import os
+import argparse
+import gzip
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bson import ObjectId
+from flask import Flask
+import app.serialization as serialization
+from app.routes.api_v1 import API_FIELDS, _serialize
+
+FIELD_SETS = {
+    'all': API_FIELDS,
+    'card': ('title', 'url', 'tags'),
+    'id_title': ('title',)
+}
+
+
+def make_docs(count, seed=42):
+    """Documents shaped like the urls collection (ObjectId, datetimes, collections)"""
+    rng = random.Random(seed)
+    now = datetime(2024, 1, 1)
+    docs = []
+    for i in range(count):
+        doc = {
+            '_id': ObjectId(),
+            'title': f'Resource {i} ' + 'word ' * rng.randint(1, 8),
+            'description': 'Synthetic description text. ' * rng.randint(0, 12),
+            'tags': [f'tag{rng.randint(0, 200)}' for _ in range(rng.randint(0, 5))],
+            'created_at': now - timedelta(minutes=i),
+            'updated_at': now - timedelta(minutes=i)
+        }
+        if rng.random() < 0.3:
+            doc['urls'] = [
+                {'url': f'https://site{i}-{j}.example.com/path/{j}', 'subtitle': f'Part {j}'}
+                for j in range(rng.randint(1, 10))
+            ]
+        else:
+            doc['url'] = f'https://www.site{i}.example.com/docs/page-{i}'
+        docs.append(doc)
+    return docs
+
+
+def time_it(func, repeat):
+    """Best wall time of several runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    app = Flask(__name__)
+    provider = serialization.FastJSONProvider(app)
+    orjson = serialization.orjson
+    docs = make_docs(1000)
+    
+    sizes = {}
+    for name, fields in FIELD_SETS.items():
+        body = provider.dumps_bytes({'data': [_serialize(doc, fields) for doc in docs[:24]]})
+        sizes[name] = {'bytes': len(body), 'gzip_bytes': len(gzip.compress(body))}
+    
+    timings = {}
+    for page_size in (24, 100, 1000):
+        payload = {'data': [_serialize(doc, API_FIELDS) for doc in docs[:page_size]]}
+        row = {}
+        if orjson is not None:
+            row['orjson_ms'] = round(time_it(lambda: provider.dumps_bytes(payload), args.repeat) * 1000, 3)
+        serialization.orjson = None
+        try:
+            row['stdlib_ms'] = round(time_it(lambda: provider.dumps_bytes(payload), args.repeat) * 1000, 3)
+        finally:
+            serialization.orjson = orjson
+        timings[page_size] = row
+    
+    print(json.dumps({
+        'orjson_available': orjson is not None,
+        'page_of_24_size_by_fields': sizes,
+        'serialize_time_by_page_size': timings
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Generate a reproducible synthetic catalog for load testing
+Usage: python bench/dataset.py [--docs 100000] [--collections 0.2] [--seed 42] [--workers 4] [--drop]
+
+Fills the database in MONGO_URI with single entries and collections whose
+tags, domains and title words follow Zipf distributions, so popular tags
+match a large share of the catalog and most tags match very little, as in
+real catalogs. Chunks are generated and written with unordered insert_many
+by a pool of processes; chunk n is always built from the same random seed,
+so a given --docs/--seed pair yields the same catalog whatever --workers
+is. The app's indexes and the tag and domain counts are built after the
+load. Refuses to touch a non-empty catalog unless --drop is given.
+"""
+
+import sys
+import os
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pymongo import MongoClient
+from app.config import Config
+from app.db import _ensure_indexes, get_db
+from app.repositories.url_repo import url_repo
+from app.services.url_service import document_domains, document_url_hashes
+
+# Title and description vocabulary, most common first
+WORDS = [
+    'python', 'guide', 'javascript', 'tutorial', 'docs', 'web', 'database', 'api', 'design', 'cloud',
+    'rust', 'performance', 'security', 'testing', 'linux', 'react', 'data', 'mongodb', 'flask', 'css',
+    'kubernetes', 'docker', 'machine', 'learning', 'async', 'network', 'compiler', 'reference', 'library', 'tools',
+    'framework', 'postgres', 'frontend', 'backend', 'mobile', 'golang', 'typescript', 'caching', 'search', 'index',
+    'cli', 'editor', 'shell', 'git', 'deploy', 'monitoring', 'logging', 'metrics', 'tracing', 'streaming',
+    'graph', 'queue', 'storage', 'auth', 'crypto', 'browser', 'http', 'grpc', 'json', 'schema',
+    'migration', 'profiling', 'memory', 'threads', 'concurrency', 'parser', 'regex', 'unicode', 'fonts', 'color',
+    'layout', 'animation', 'charts', 'maps', 'audio', 'video', 'images', 'pdf', 'email', 'calendar',
+    'payments', 'analytics', 'notebook', 'statistics', 'algorithms', 'math', 'physics', 'astronomy', 'history', 'music'
+]
+
+BASE_DATE = datetime(2024, 1, 1)
+CREATED_SPAN_SECONDS = 3 * 365 * 24 * 3600
+
+# Set in each pool process by _init_worker
+_worker = {}
+
+
+def zipf_weights(size, exponent):
+    """Cumulative Zipf weights for ranks 1..size (for random.choices)"""
+    return list(accumulate(1 / (rank ** exponent) for rank in range(1, size + 1)))
+
+
+def vocabulary(args):
+    """Tag and domain lists shared by every chunk, most popular first"""
+    tags = [f'tag{n}' for n in range(args.tags)]
+    domains = [f'site{n}.example.com' for n in range(args.domains)]
+    return tags, domains
+
+
+def build_chunk(chunk, args):
+    """Documents of one chunk, identical for the same (seed, chunk) whichever process builds it"""
+    rng = random.Random(f'{args.seed}:{chunk}')
+    tags, domains = vocabulary(args)
+    tag_weights = zipf_weights(len(tags), args.zipf)
+    domain_weights = zipf_weights(len(domains), args.zipf)
+    word_weights = zipf_weights(len(WORDS), args.zipf)
+    
+    def words(count):
+        return ' '.join(rng.choices(WORDS, cum_weights=word_weights, k=count))
+    
+    def link(number, item=None):
+        domain = rng.choices(domains, cum_weights=domain_weights)[0]
+        path = f'{number}' if item is None else f'{number}/{item}'
+        return f'https://{domain}/{rng.choice(WORDS)}/{path}'
+    
+    docs = []
+    first = chunk * args.chunk_size
+    for number in range(first, min(first + args.chunk_size, args.docs)):
+        created_at = BASE_DATE + timedelta(seconds=rng.randrange(CREATED_SPAN_SECONDS))
+        doc = {
+            'title': words(rng.randint(2, 6)).capitalize(),
+            'description': words(rng.randint(8, 30)).capitalize() + '.',
+            'tags': sorted(set(rng.choices(tags, cum_weights=tag_weights, k=rng.randint(1, 6))))
+        }
+        if rng.random() < args.collections:
+            doc['urls'] = [
+                {'url': link(number, item), 'subtitle': words(rng.randint(1, 4)).capitalize()}
+                for item in range(rng.randint(2, 10))
+            ]
+        else:
+            doc['url'] = link(number)
+        doc['url_hashes'] = document_url_hashes(doc)
+        doc['domains'] = document_domains(doc)
+        doc['created_at'] = created_at
+        doc['updated_at'] = created_at
+        docs.append(doc)
+    return docs
+
+
+def _init_worker(db_name):
+    _worker['urls'] = MongoClient(Config.MONGO_URI)[db_name].urls
+
+
+def insert_chunk(chunk, args):
+    """Build and insert one chunk in a pool process; returns the number of documents written"""
+    docs = build_chunk(chunk, args)
+    if docs:
+        _worker['urls'].insert_many(docs, ordered=False)
+    return len(docs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', type=int, default=100000)
+    parser.add_argument('--collections', type=float, default=0.2, help='share of entries that are collections')
+    parser.add_argument('--tags', type=int, default=2000, help='tag vocabulary size')
+    parser.add_argument('--domains', type=int, default=5000, help='domain vocabulary size')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent for tags, domains and words')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='inserting processes')
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--drop', action='store_true', help='replace an existing catalog')
+    args = parser.parse_args()
+    
+    # The indexes are built once after the load, not in the background during it
+    Config.MONGO_AUTO_INDEXES = False
+    db = get_db()
+    if db.urls.estimated_document_count() and not args.drop:
+        raise SystemExit(f'{db.name}.urls is not empty; pass --drop to replace it')
+    for name in ('urls', 'tag_counts', 'domain_counts'):
+        db.drop_collection(name)
+    
+    chunks = range(-(-args.docs // args.chunk_size))
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(db.name,)) as pool:
+        inserted = sum(pool.map(insert_chunk, chunks, [args] * len(chunks)))
+    insert_seconds = time.perf_counter() - start
+    
+    # Indexes are cheaper to build once over the loaded data than to maintain per insert
+    start = time.perf_counter()
+    _ensure_indexes(db)
+    tag_count = url_repo.rebuild_tag_counts()
+    domain_count = url_repo.rebuild_domain_counts()
+    index_seconds = time.perf_counter() - start
+    
+    stats = db.command('collStats', 'urls')
+    print(json.dumps({
+        'database': db.name,
+        'docs': inserted,
+        'collections': db.urls.count_documents({'urls': {'$exists': True}}),
+        'tags': tag_count,
+        'domains': domain_count,
+        'top_tags': url_repo.get_all_tags()[:5],
+        'seed': args.seed,
+        'workers': args.workers,
+        'insert_seconds': round(insert_seconds, 2),
+        'docs_per_second': round(inserted / insert_seconds) if insert_seconds else None,
+        'index_seconds': round(index_seconds, 2),
+        'data_mb': round(stats['size'] / 1e6, 1),
+        'index_mb': round(stats['totalIndexSize'] / 1e6, 1)
+    }, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Overhead of the request and MongoDB command metrics on the public catalog page
+Usage: python bench/instrumentation.py [--requests 300] [--path /]
+
+Renders the page through the Flask test client against the MONGO_URI from
+the environment (seed it first, e.g. python scripts/seed_data.py) with the
+page and query caches off, interleaving requests with metrics off, on, and
+on with METRICS_MONGO_BYTES, so every mode sees the same database state.
+Also reports the listener's own cost per command from synthetic events.
+"""
+
+import sys
+import os
+import argparse
+import json
+import time
+from types import SimpleNamespace
+
+# Every request must do its MongoDB work and render
+os.environ['PAGE_CACHE_BACKEND'] = 'none'
+os.environ['QUERY_CACHE_MAX_ENTRIES'] = '0'
+os.environ['MEMORY_INDEX_PRELOAD'] = 'false'
+os.environ['METRICS_ENABLED'] = 'true'
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.metrics import metrics
+
+MODES = {
+    'off': (False, False),
+    'on': (True, False),
+    'on_with_bytes': (True, True)
+}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def listener_cost(events=100000):
+    """Microseconds the command listener adds per command (started + succeeded)"""
+    metrics.enabled, metrics.count_bytes = True, False
+    event = SimpleNamespace(command_name='find', duration_micros=800, command={'find': 'urls'}, reply={'ok': 1})
+    start = time.perf_counter()
+    for _ in range(events):
+        metrics.listener.started(event)
+        metrics.listener.succeeded(event)
+    return (time.perf_counter() - start) / events * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=300, help='requests per mode')
+    parser.add_argument('--path', default='/')
+    args = parser.parse_args()
+    
+    app = create_app()
+    client = app.test_client()
+    
+    # Warm up connections, templates and the in-process indexes
+    for _ in range(10):
+        with client.get(args.path) as response:
+            response.get_data()
+    
+    latencies = {mode: [] for mode in MODES}
+    for _ in range(args.requests):
+        for mode, (enabled, count_bytes) in MODES.items():
+            metrics.enabled, metrics.count_bytes = enabled, count_bytes
+            start = time.perf_counter()
+            with client.get(args.path) as response:
+                response.get_data()
+            latencies[mode].append(time.perf_counter() - start)
+    
+    results = {}
+    for mode, values in latencies.items():
+        values.sort()
+        results[mode] = {
+            'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 3),
+            'mean_ms': round(sum(values) / len(values) * 1000, 3)
+        }
+    for mode in ('on', 'on_with_bytes'):
+        results[mode]['overhead_p50_pct'] = round(
+            (results[mode]['p50_ms'] / results['off']['p50_ms'] - 1) * 100, 2
+        )
+    
+    print(json.dumps({
+        'path': args.path,
+        'requests_per_mode': args.requests,
+        'modes': results,
+        'listener_us_per_command': round(listener_cost(), 3)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
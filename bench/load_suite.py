@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Load-test the public, dashboard and search endpoints at several concurrency levels
+Usage: python bench/load_suite.py [--connections 10 50 200] [--duration 15] [--save-baseline FILE] [--baseline FILE]
+
+Starts the app (gunicorn, or uvicorn with --mode async) against the catalog
+in MONGO_URI, generate one first with python bench/dataset.py, and runs
+bench/loadgen.py on each scenario at every concurrency level. Filter paths
+use the catalog's own popular and mid-ranked tags. Dashboard requests carry
+a session cookie signed with SECRET_KEY. Reports p50/p95/p99 latency,
+throughput and the server's resident memory (all worker processes, Linux
+only) as JSON. --save-baseline stores the report. --baseline compares the
+run with a stored report and exits with status 1 when a latency percentile
+rose, or throughput fell, by more than --tolerance percent.
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+from urllib.parse import quote
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from flask import Flask
+from flask.sessions import SecureCookieSessionInterface
+from app.config import Config
+from app.db import get_db
+from app.repositories.url_repo import url_repo
+from bench.dataset import WORDS
+from bench.loadgen import run_load
+from bench.serving_modes import server_command, wait_until_healthy
+
+SCENARIOS = ('public', 'dashboard', 'search')
+
+
+def scenario_paths(name, tags):
+    """Paths requested round-robin by one scenario; tags are the catalog's, most used first"""
+    top = quote(tags[0]) if tags else 'python'
+    second = quote(tags[1]) if len(tags) > 1 else top
+    middle = quote(tags[len(tags) // 10]) if tags else top
+    if name == 'public':
+        return ['/', f'/?tag={middle}', f'/?tag={top}&tag={second}', f'/api/v1/urls?tag={top}&limit=24']
+    if name == 'dashboard':
+        return ['/admin/', f'/admin/?tag={top}', '/admin/?page=5']
+    return [
+        f'/?q={WORDS[0]}',
+        f'/?q={WORDS[20]}+{WORDS[40]}',
+        f'/api/v1/urls?q={WORDS[10]}&limit=24',
+        f'/api/suggest?q={WORDS[5][:3]}'
+    ]
+
+
+def session_cookie():
+    """Cookie header value of a logged-in admin session signed with SECRET_KEY"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    serializer = SecureCookieSessionInterface().get_signing_serializer(app)
+    value = serializer.dumps({'logged_in': True, 'username': os.getenv('ADMIN_USERNAME', 'admin')})
+    return f"{app.config['SESSION_COOKIE_NAME']}={value}"
+
+
+def process_memory(pid):
+    """
+    (resident MB, peak resident MB) summed over pid and its descendants
+    Peak is each process's high-water mark since it started. Reads /proc,
+    so both are None on platforms without it.
+    """
+    rss = peak = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as status:
+                for line in status:
+                    if line.startswith('VmRSS:'):
+                        rss += int(line.split()[1])
+                    elif line.startswith('VmHWM:'):
+                        peak += int(line.split()[1])
+            task_dir = f'/proc/{current}/task'
+            for task in os.listdir(task_dir):
+                with open(f'{task_dir}/{task}/children') as children:
+                    pending.extend(int(child) for child in children.read().split())
+        except OSError:
+            # No /proc, or a worker exited while being read
+            if current == pid:
+                return None, None
+    return round(rss / 1024, 1), round(peak / 1024, 1)
+
+
+def percent_change(value, base):
+    """Change from base to value in percent (None when either is missing)"""
+    if value is None or not base:
+        return None
+    return round((value / base - 1) * 100, 1)
+
+
+def compare(report, baseline, tolerance):
+    """Per-level percentage changes against a stored report, with the metrics that regressed"""
+    levels = []
+    for name, scenario in report['scenarios'].items():
+        stored = baseline.get('scenarios', {}).get(name, {}).get('levels', [])
+        stored = {level['connections']: level for level in stored}
+        for level in scenario['levels']:
+            base = stored.get(level['connections'])
+            if base is None:
+                continue
+            changes = {
+                f'{percentile}_ms': percent_change(level['latency_ms'][percentile], base['latency_ms'][percentile])
+                for percentile in ('p50', 'p95', 'p99')
+            }
+            changes['throughput_rps'] = percent_change(level['throughput_rps'], base['throughput_rps'])
+            changes['rss_mb'] = percent_change(level.get('rss_mb'), base.get('rss_mb'))
+            regressed = [
+                metric for metric in ('p50_ms', 'p95_ms', 'p99_ms')
+                if changes[metric] is not None and changes[metric] > tolerance
+            ]
+            if changes['throughput_rps'] is not None and changes['throughput_rps'] < -tolerance:
+                regressed.append('throughput_rps')
+            levels.append({
+                'scenario': name,
+                'connections': level['connections'],
+                'change_pct': changes,
+                'regressed': regressed
+            })
+    return {
+        'tolerance_pct': tolerance,
+        'baseline_commit': baseline.get('commit'),
+        'same_dataset': baseline.get('docs') == report['docs'],
+        'same_setup': all(baseline.get(key) == report[key] for key in ('mode', 'workers', 'caches')),
+        'levels': levels,
+        'regressions': sum(1 for level in levels if level['regressed'])
+    }
+
+
+def current_commit():
+    """Short hash of the checked-out commit, recorded so baselines say what they measured"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args, base_url, server_pid):
+    """Every scenario at every concurrency level against a running server"""
+    tags = [item['tag'] for item in url_repo.get_all_tags()]
+    cookie = session_cookie()
+    results = {}
+    for name in args.scenarios:
+        paths = scenario_paths(name, tags)
+        headers = {'Cookie': cookie} if name == 'dashboard' else None
+        levels = []
+        for connections in args.connections:
+            level = asyncio.run(run_load(
+                [base_url + path for path in paths], connections, args.duration, args.warmup, headers
+            ))
+            level['rss_mb'], level['peak_rss_mb'] = process_memory(server_pid) if server_pid else (None, None)
+            levels.append(level)
+        results[name] = {'paths': paths, 'levels': levels}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--connections', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds per scenario and level')
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--mode', choices=['sync', 'async'], default='sync')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--caches', action='store_true', help='keep the page and query caches on')
+    parser.add_argument('--url', help='load an already running server instead (no memory figures)')
+    parser.add_argument('--save-baseline', metavar='FILE', help='write the report to FILE')
+    parser.add_argument('--baseline', metavar='FILE', help='compare with a report saved earlier')
+    parser.add_argument('--tolerance', type=float, default=10.0, help='allowed change in percent')
+    args = parser.parse_args()
+    
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    
+    report = {
+        'commit': current_commit(),
+        'python': platform.python_version(),
+        'docs': get_db().urls.estimated_document_count(),
+        'mode': None if args.url else args.mode,
+        'workers': None if args.url else args.workers,
+        'caches': args.caches,
+        'duration_s': args.duration
+    }
+    
+    if args.url:
+        report['scenarios'] = run_suite(args, args.url.rstrip('/'), None)
+    else:
+        env = dict(os.environ, FLASK_ENV='production', MEMORY_INDEX_PRELOAD='true')
+        if not args.caches:
+            env.update(PAGE_CACHE_BACKEND='none', QUERY_CACHE_TTL='0')
+        server = subprocess.Popen(
+            server_command(args.mode, args.port, args.workers),
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_until_healthy(args.port)
+            report['scenarios'] = run_suite(args, f'http://127.0.0.1:{args.port}', server.pid)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+    if baseline is not None:
+        report['comparison'] = compare(report, baseline, args.tolerance)
+    
+    print(json.dumps(report, indent=2))
+    if baseline is not None and report['comparison']['regressions']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
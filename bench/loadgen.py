@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Closed-loop HTTP/1.1 load generator (asyncio, keep-alive, no dependencies)
+Usage: python bench/loadgen.py http://127.0.0.1:5000/api/v1/urls [more URLs] [--connections 200] [--duration 15]
+
+Every connection sends one request at a time and the next as soon as the
+response is complete, cycling through the given URLs (same host). Reports
+throughput, latency percentiles and status counts.
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))
+    return values[index]
+
+
+async def read_response(reader):
+    """Read one response; returns (status, body size, keep_alive)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed')
+    status = int(status_line.split()[1])
+    
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    
+    size = 0
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            chunk_size = int((await reader.readline()).split(b';')[0], 16)
+            if chunk_size == 0:
+                await reader.readline()
+                break
+            size += len(await reader.readexactly(chunk_size))
+            await reader.readline()
+    elif 'content-length' in headers:
+        size = len(await reader.readexactly(int(headers['content-length'])))
+    elif status not in (204, 304):
+        size = len(await reader.read())
+        return status, size, False
+    
+    return status, size, headers.get('connection', '').lower() != 'close'
+
+
+async def _connection(host, port, requests, deadline, results):
+    """One keep-alive client connection issuing requests back to back"""
+    reader = writer = None
+    turn = 0
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            request = requests[turn % len(requests)]
+            turn += 1
+            
+            start = time.perf_counter()
+            writer.write(request)
+            status, size, keep_alive = await read_response(reader)
+            results['latencies'].append(time.perf_counter() - start)
+            results['statuses'][status] += 1
+            results['bytes'] += size
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+            results['errors'][type(e).__name__] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.05)
+    if writer is not None:
+        writer.close()
+
+
+async def run_load(urls, connections=50, duration=10.0, warmup=1.0, headers=None):
+    """Drive the URLs with a fixed number of connections; returns a report dict"""
+    target = urlsplit(urls[0])
+    host, port = target.hostname, target.port or 80
+    extra = ''.join(f"{name}: {value}\r\n" for name, value in (headers or {}).items())
+    requests = []
+    for url in urls:
+        parts = urlsplit(url)
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        requests.append(
+            f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept-Encoding: identity\r\n{extra}\r\n".encode('latin-1')
+        )
+    
+    if warmup:
+        scratch = {'latencies': [], 'statuses': Counter(), 'errors': Counter(), 'bytes': 0}
+        deadline = time.perf_counter() + warmup
+        await asyncio.gather(*(
+            _connection(host, port, requests, deadline, scratch) for _ in range(min(connections, 10))
+        ))
+    
+    results = {'latencies': [], 'statuses': Counter(), 'errors': Counter(), 'bytes': 0}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _connection(host, port, requests, start + duration, results) for _ in range(connections)
+    ))
+    elapsed = time.perf_counter() - start
+    
+    latencies = sorted(results['latencies'])
+    return {
+        'connections': connections,
+        'duration_s': round(elapsed, 2),
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'latency_ms': {
+            name: round(percentile(latencies, fraction) * 1000, 2) if latencies else None
+            for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99), ('max', 1.0))
+        },
+        'statuses': {str(status): count for status, count in sorted(results['statuses'].items())},
+        'errors': dict(results['errors']),
+        'mb_received': round(results['bytes'] / 1e6, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('urls', nargs='+', help='URLs on one host, requested round-robin')
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of measured load')
+    parser.add_argument('--warmup', type=float, default=1.0, help='seconds of unmeasured load first')
+    args = parser.parse_args()
+    
+    report = asyncio.run(run_load(args.urls, args.connections, args.duration, args.warmup))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Relevance and latency benchmark for the in-process BM25 search index
+Compares BM25 ranking with the $text-style baseline (title/description
+match, newest first) on a synthetic corpus with planted relevant documents.
+Usage: python bench/search.py [--docs 50000] [--queries 200]
+"""
+
+import sys
+import os
+import argparse
+import json
+import random
+import string
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.search_service import SearchIndex, query_terms, tokenize
+
+
+def make_words(count, rng):
+    """Distinct pseudo-words"""
+    words = set()
+    while len(words) < count:
+        words.add(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))))
+    return sorted(words)
+
+
+def make_corpus(doc_count, query_count, seed=42):
+    """
+    Background documents plus, per query, a few planted relevant documents
+    (query terms in title/tags/URL) and decoys (one term buried in a long description)
+    Returns (docs, queries) where each query is (text, set of relevant ids).
+    """
+    rng = random.Random(seed)
+    words = make_words(20000, rng)
+    common = words[:2000]
+    tags = words[2000:2300]
+    now = datetime(2024, 1, 1)
+    
+    def doc(i, title, description, doc_tags, host, path):
+        return {
+            '_id': i,
+            'title': title,
+            'description': description,
+            'tags': doc_tags,
+            'url': f'https://{host}.example.com/{path}',
+            'created_at': now - timedelta(minutes=rng.randint(0, 10 ** 6))
+        }
+    
+    docs = []
+    for i in range(doc_count):
+        docs.append(doc(
+            i,
+            ' '.join(rng.choices(common, k=rng.randint(3, 8))),
+            ' '.join(rng.choices(common, k=rng.randint(10, 40))),
+            rng.sample(tags, rng.randint(1, 4)),
+            rng.choice(common),
+            '/'.join(rng.choices(common, k=2))
+        ))
+    
+    queries = []
+    topics = words[2300:]
+    for q in range(query_count):
+        first, second = topics[2 * q], topics[2 * q + 1]
+        relevant = set()
+        for _ in range(5):
+            i = len(docs)
+            relevant.add(i)
+            docs.append(doc(
+                i,
+                f'{first} {second} ' + ' '.join(rng.choices(common, k=3)),
+                ' '.join(rng.choices(common, k=20)),
+                [first] + rng.sample(tags, 2),
+                second,
+                first
+            ))
+        for _ in range(30):
+            docs.append(doc(
+                len(docs),
+                ' '.join(rng.choices(common, k=5)),
+                ' '.join(rng.choices(common, k=60) + [first]),
+                rng.sample(tags, 2),
+                rng.choice(common),
+                rng.choice(common)
+            ))
+        queries.append((f'{first} {second}', relevant))
+    return docs, queries, common
+
+
+def text_baseline(docs):
+    """$text-style search: any term in title/description, newest first"""
+    postings = {}
+    for doc in docs:
+        for term in set(tokenize(doc['title']) + tokenize(doc['description'])):
+            postings.setdefault(term, set()).add(doc['_id'])
+    created = {doc['_id']: doc['created_at'] for doc in docs}
+    
+    def search(query):
+        matched = set()
+        for term in query_terms(query):
+            matched |= postings.get(term, set())
+        return sorted(matched, key=lambda i: created[i], reverse=True)
+    return search
+
+
+def relevance(search, queries, k=10):
+    """Mean reciprocal rank of the first relevant hit and mean recall@k"""
+    reciprocal, recall = 0.0, 0.0
+    for text, relevant in queries:
+        ranked = search(text)
+        first = next((rank for rank, i in enumerate(ranked, 1) if i in relevant), None)
+        reciprocal += 1 / first if first else 0.0
+        recall += len(relevant.intersection(ranked[:k])) / len(relevant)
+    return round(reciprocal / len(queries), 4), round(recall / len(queries), 4)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', type=int, default=50000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--lookups', type=int, default=1000)
+    args = parser.parse_args()
+    
+    docs, queries, common = make_corpus(args.docs, args.queries)
+    
+    index = SearchIndex(max_age=0, result_cache_size=0)
+    start = time.perf_counter()
+    index.load(docs)
+    build = time.perf_counter() - start
+    
+    bm25_mrr, bm25_recall = relevance(index.search, queries)
+    text_mrr, text_recall = relevance(text_baseline(docs), queries)
+    
+    # Latency on common terms (long posting lists) is the worst case
+    rng = random.Random(7)
+    latencies = []
+    for _ in range(args.lookups):
+        query = ' '.join(rng.choices(common, k=rng.randint(1, 3)))
+        start = time.perf_counter()
+        index.search(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    
+    print(json.dumps({
+        'docs': len(docs),
+        'queries': len(queries),
+        'build_seconds': round(build, 3),
+        'bm25': {'mrr': bm25_mrr, 'recall_at_10': bm25_recall},
+        'text_newest_first': {'mrr': text_mrr, 'recall_at_10': text_recall},
+        'search_p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'search_p99_ms': round(percentile(latencies, 0.99) * 1000, 3)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Compare the sync (gunicorn) and async (uvicorn/ASGI) serving modes under load
+Usage: python bench/serving_modes.py [--connections 50 200 1000] [--duration 15] [--workers 4]
+
+Starts each server in turn against the MONGO_URI from the environment (seed
+it first, e.g. python scripts/seed_data.py), waits for /health, then runs
+bench/loadgen.py at every concurrency level. The page and query caches are
+off unless --caches is given, so both modes do the same MongoDB work per
+request. Needs gunicorn, uvicorn, motor and asgiref, and an open-file limit
+above the largest connection count (ulimit -n).
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import json
+import subprocess
+import time
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from bench.loadgen import run_load
+
+DEFAULT_PATHS = ['/api/v1/urls?limit=24', '/api/v1/urls?tag=python&limit=24', '/']
+
+
+def server_command(mode, port, workers):
+    """Command line starting one serving mode"""
+    if mode == 'sync':
+        return [
+            sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+            '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--access-logfile', '/dev/null',
+            'run:app'
+        ]
+    return [
+        sys.executable, '-m', 'uvicorn', 'asgi:app',
+        '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+        '--no-access-log', '--log-level', 'warning'
+    ]
+
+
+def wait_until_healthy(port, timeout=30.0):
+    """Poll /health until the server answers 200"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f'server on port {port} did not become healthy within {timeout:.0f}s')
+
+
+def bench_mode(mode, args):
+    """Start one server, load it at every concurrency level, stop it"""
+    env = dict(os.environ, FLASK_ENV='production', MEMORY_INDEX_PRELOAD='true')
+    if not args.caches:
+        env.update(PAGE_CACHE_BACKEND='none', QUERY_CACHE_TTL='0')
+    
+    server = subprocess.Popen(
+        server_command(mode, args.port, args.workers),
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_healthy(args.port)
+        urls = [f'http://127.0.0.1:{args.port}{path}' for path in args.paths]
+        runs = []
+        for connections in args.connections:
+            runs.append(asyncio.run(run_load(urls, connections, args.duration, args.warmup)))
+        return runs
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--connections', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds per concurrency level')
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--workers', type=int, default=4, help='worker processes for both servers')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS, help='paths requested round-robin')
+    parser.add_argument('--modes', nargs='+', choices=['sync', 'async'], default=['sync', 'async'])
+    parser.add_argument('--caches', action='store_true', help='keep the page and query caches on')
+    args = parser.parse_args()
+    
+    report = {
+        'workers': args.workers,
+        'paths': args.paths,
+        'caches': args.caches,
+        'modes': {mode: bench_mode(mode, args) for mode in args.modes}
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the serverless entry point (api/index.py)
+Usage: python bench/startup.py [--runs 5] [--path /health]
+
+Each run is a fresh interpreter, reporting import time (module import plus
+create_app) and time to first response for one request to --path.
+"""
+
+import sys
+import os
+import argparse
+import json
+import statistics
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Executed in a fresh interpreter for every run
+PROBE = r'''
+import json, sys, time, io, contextlib
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+with contextlib.redirect_stdout(io.StringIO()):
+    from api.index import app
+    imported = time.perf_counter()
+    response = app.test_client().get({path!r})
+    response.get_data()
+    done = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - start) * 1000,
+    'first_response_ms': (done - imported) * 1000,
+    'total_ms': (done - start) * 1000,
+    'status': response.status_code
+}}))
+'''
+
+
+def run_once(path):
+    """Start a fresh interpreter and return its timing report"""
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(root=ROOT, path=path)],
+        capture_output=True, text=True, cwd=ROOT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'probe failed')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold-start benchmark for api/index.py')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/health')
+    args = parser.parse_args()
+    
+    runs = [run_once(args.path) for _ in range(args.runs)]
+    
+    report = {'path': args.path, 'runs': args.runs, 'status': runs[-1]['status']}
+    for key in ('import_ms', 'first_response_ms', 'total_ms'):
+        values = [run[key] for run in runs]
+        report[key] = {
+            'median': round(statistics.median(values), 1),
+            'min': round(min(values), 1),
+            'max': round(max(values), 1)
+        }
+    
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
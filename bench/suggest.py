@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the /api/suggest prefix index (build time, lookup percentiles)
+Usage: python bench/suggest.py [--docs 100000] [--lookups 5000]
+"""
+
+import sys
+import os
+import argparse
+import json
+import random
+import string
+import time
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.suggest_service import SuggestIndex
+
+
+def make_docs(count, vocabulary=5000, seed=42):
+    """Generate reproducible documents with titles, tags and URLs from a shared vocabulary"""
+    rng = random.Random(seed)
+    words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(vocabulary)]
+    docs = []
+    for i in range(count):
+        docs.append({
+            '_id': f'{i:024x}',
+            'title': ' '.join(rng.choices(words, k=rng.randint(2, 8))).title(),
+            'tags': rng.sample(words[:300], rng.randint(0, 5)),
+            'url': f'https://www.{rng.choice(words)}.example.com/{rng.choice(words)}'
+        })
+    return docs, words
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', type=int, default=100000)
+    parser.add_argument('--lookups', type=int, default=5000)
+    args = parser.parse_args()
+    
+    docs, words = make_docs(args.docs)
+    index = SuggestIndex()
+    
+    start = time.perf_counter()
+    keys = index.load(docs)
+    build = time.perf_counter() - start
+    
+    rng = random.Random(7)
+    latencies = []
+    for _ in range(args.lookups):
+        prefix = rng.choice(words)[:rng.randint(1, 5)]
+        start = time.perf_counter()
+        index.suggest(prefix)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    
+    writes = []
+    for i in range(200):
+        doc = {'_id': f'new{i}', 'title': f'Fresh {rng.choice(words)}', 'tags': [rng.choice(words)]}
+        start = time.perf_counter()
+        index.apply_write(added=[doc])
+        writes.append(time.perf_counter() - start)
+    writes.sort()
+    
+    print(json.dumps({
+        'docs': args.docs,
+        'keys': keys,
+        'build_seconds': round(build, 3),
+        'lookup_p50_ms': round(percentile(latencies, 0.50) * 1000, 4),
+        'lookup_p99_ms': round(percentile(latencies, 0.99) * 1000, 4),
+        'write_p99_ms': round(percentile(writes, 0.99) * 1000, 4)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Compare ways of fetching a filtered catalog page with its total and tag counts
+Usage: python bench/tag_facets.py [--docs 50000] [--runs 200] [--per-page 24] [--depth 2000]
+
+Seeds a scratch database next to the one in MONGO_URI with entries carrying
+Zipf-distributed tags and domains, creates the app's indexes, then times
+each query shape three ways, on the first page and on a keyset page
+--depth entries in: what find_all does (an indexed find for the page plus
+one $facet for the total and tag counts), a single $facet that also
+returns the page, and find + count_documents + a tag count aggregation.
+The scratch database is dropped afterwards.
+"""
+
+import sys
+import os
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pymongo import MongoClient
+from app.config import Config
+from app.db import _ensure_indexes
+from app.repositories.url_repo import (
+    CARD_PROJECTION, LIST_SORT, _seek_filter, count_facet_pipeline, page_find_args, tag_facet_stages, trim_page,
+    unpack_count_facet, unpack_tag_counts, url_repo
+)
+
+TAG_FACETS = 15
+COUNT_LIMIT = 10000
+
+
+def zipf_choices(values, count, rng, exponent=1.1):
+    """count distinct values, popular ones (low index) far more likely"""
+    weights = [1 / (rank ** exponent) for rank in range(1, len(values) + 1)]
+    chosen = set()
+    while len(chosen) < count:
+        chosen.add(rng.choices(values, weights)[0])
+    return sorted(chosen)
+
+
+def seed(collection, doc_count, rng):
+    """Insert synthetic entries in batches"""
+    tags = [f'tag{n}' for n in range(300)]
+    domains = [f'site{n}.example.com' for n in range(500)]
+    now = datetime(2024, 1, 1)
+    batch = []
+    for i in range(doc_count):
+        domain = zipf_choices(domains, 1, rng)[0]
+        batch.append({
+            'title': f'Entry {i}',
+            'url': f'https://{domain}/{i}',
+            'tags': zipf_choices(tags, rng.randint(1, 5), rng),
+            'domains': [domain],
+            'created_at': now - timedelta(seconds=rng.randint(0, 10 ** 8))
+        })
+        if len(batch) == 1000:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def query_shapes():
+    """(name, query) pairs built the way the repository builds them"""
+    return [
+        ('one_tag', url_repo._build_query(tag='tag0')),
+        ('rare_tag', url_repo._build_query(tag='tag120')),
+        ('two_tags_all', url_repo._build_query(tag=['tag0', 'tag1'])),
+        ('three_tags_any', url_repo._build_query(tag=['tag3', 'tag7', 'tag40'], tag_mode='any')),
+        ('tag_and_domain', {**url_repo._build_query(tag='tag1'), 'domains': 'site0.example.com'})
+    ]
+
+
+def indexed_page(collection, query, position, per_page):
+    """Page from an indexed find, total and tag counts from one $facet (what find_all does)"""
+    keyset_query, sort, skip = page_find_args(query, position, 1, per_page)
+    urls = list(collection.find(keyset_query, CARD_PROJECTION).sort(sort).skip(skip).limit(per_page + 1))
+    urls, _ = trim_page(urls, position, per_page)
+    result = next(collection.aggregate(count_facet_pipeline(query, COUNT_LIMIT, TAG_FACETS)), None)
+    total, _, tag_counts = unpack_count_facet(result, COUNT_LIMIT)
+    return [doc['_id'] for doc in urls], total, tag_counts
+
+
+def single_facet(collection, query, position, per_page):
+    """The same answers from one $facet that seeks inside the page facet (every match is read first)"""
+    page_stages = [{'$match': _seek_filter(position)}] if position else []
+    page_stages += [{'$limit': per_page}, {'$project': CARD_PROJECTION}]
+    pipeline = [
+        {'$match': query},
+        {'$sort': dict(LIST_SORT)},
+        {'$facet': {
+            'urls': page_stages,
+            'total': [{'$limit': COUNT_LIMIT + 1}, {'$count': 'total'}],
+            'tag_counts': tag_facet_stages(TAG_FACETS)
+        }}
+    ]
+    result = next(collection.aggregate(pipeline), None)
+    total, _, tag_counts = unpack_count_facet(result, COUNT_LIMIT)
+    return [doc['_id'] for doc in result['urls']], total, tag_counts
+
+
+def separate_queries(collection, query, position, per_page):
+    """The same answers from three round trips"""
+    keyset_query, sort, _ = page_find_args(query, position, 1, per_page)
+    urls = list(collection.find(keyset_query, CARD_PROJECTION).sort(sort).limit(per_page))
+    total = min(collection.count_documents(query, limit=COUNT_LIMIT + 1), COUNT_LIMIT)
+    tag_counts = unpack_tag_counts(collection.aggregate([{'$match': query}, *tag_facet_stages(TAG_FACETS)]))
+    return [doc['_id'] for doc in urls], total, tag_counts
+
+
+def deep_position(collection, query, depth):
+    """Keyset position of the entry depth places into the listing, or None if there are fewer matches"""
+    doc = next(collection.find(query, {'created_at': 1}).sort(LIST_SORT).skip(depth).limit(1), None)
+    return (doc['created_at'], doc['_id'], 'next') if doc else None
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def time_runs(function, runs):
+    """p50/p95 latency in milliseconds"""
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--docs', type=int, default=50000)
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--per-page', type=int, default=24)
+    parser.add_argument('--depth', type=int, default=2000, help='entries skipped before the deep page')
+    args = parser.parse_args()
+    
+    client = MongoClient(Config.MONGO_URI, serverSelectionTimeoutMS=5000)
+    db = client[f'bench_tag_facets_{os.getpid()}']
+    try:
+        seed(db.urls, args.docs, random.Random(42))
+        _ensure_indexes(db)
+        
+        shapes = {}
+        for name, query in query_shapes():
+            pages = {'first': None, 'deep': deep_position(db.urls, query, args.depth)}
+            for page, position in pages.items():
+                if page == 'deep' and position is None:
+                    continue
+                expected = indexed_page(db.urls, query, position, args.per_page)
+                for strategy in (single_facet, separate_queries):
+                    if strategy(db.urls, query, position, args.per_page) != expected:
+                        raise SystemExit(f'{name}/{page}: {strategy.__name__} disagrees with indexed_page')
+                
+                shapes[f'{name}/{page}'] = {
+                    'matches': expected[1],
+                    **{
+                        strategy.__name__: time_runs(
+                            lambda: strategy(db.urls, query, position, args.per_page), args.runs
+                        )
+                        for strategy in (indexed_page, single_facet, separate_queries)
+                    }
+                }
+        
+        print(json.dumps({
+            'docs': args.docs,
+            'runs': args.runs,
+            'per_page': args.per_page,
+            'depth': args.depth,
+            'shapes': shapes
+        }, indent=2))
+    finally:
+        client.drop_database(db.name)
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
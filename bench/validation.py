@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for batch URL validation (rows per second)
+Usage: python bench/validation.py [--rows 10000] [--repeat 5]
+"""
+
+import sys
+import os
+import argparse
+import json
+import random
+import time
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.url_service import validate_rows, validate_url_data, prepare_url_data
+
+
+def make_rows(count, invalid_ratio=0.1, seed=42):
+    """Generate a reproducible mix of valid/invalid single-URL and collection rows"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        row = {
+            'title': f'Resource {i}',
+            'description': 'Synthetic description ' * rng.randint(0, 20),
+            'tags': ', '.join(f'tag{rng.randint(0, 200)}' for _ in range(rng.randint(0, 6)))
+        }
+        if rng.random() < 0.3:
+            row['urls'] = [
+                {'url': f'https://site{i}-{j}.example.com/path/{j}', 'subtitle': f'Part {j}'}
+                for j in range(rng.randint(1, 5))
+            ]
+        else:
+            row['url'] = f'https://www.site{i}.example.com/docs/page-{i}?ref=bench'
+        
+        if rng.random() < invalid_ratio:
+            if 'url' in row:
+                row['url'] = f'site{i}.example.com'
+            else:
+                row['title'] = ''
+        rows.append(row)
+    return rows
+
+
+def time_it(func, repeat):
+    """Best wall time of several runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def legacy_validate(rows):
+    """Row-by-row validate + prepare path used before validate_rows (single-URL rows only)"""
+    for idx, data in enumerate(rows):
+        is_valid, errors = validate_url_data(data)
+        if is_valid:
+            prepare_url_data(data)
+        else:
+            f"URL #{idx + 1}: " + ", ".join([f"{k}: {v}" for k, v in errors.items()])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    rows = make_rows(args.rows)
+    single_rows = [row for row in rows if 'url' in row]
+    
+    batch = time_it(lambda: validate_rows(rows), args.repeat)
+    batch_single = time_it(lambda: validate_rows(single_rows), args.repeat)
+    legacy_single = time_it(lambda: legacy_validate(single_rows), args.repeat)
+    
+    print(json.dumps({
+        'rows': len(rows),
+        'validate_rows_per_sec': round(len(rows) / batch),
+        'single_url_rows': len(single_rows),
+        'validate_rows_single_per_sec': round(len(single_rows) / batch_single),
+        'legacy_single_per_sec': round(len(single_rows) / legacy_single)
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Gunicorn configuration
+Usage: gunicorn -c gunicorn.conf.py run:app
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Threaded workers: requests mostly wait on MongoDB, so a few threads per
+# process keep the CPU busy. Keep MONGO_MAX_POOL_SIZE >= threads.
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Reuse client connections behind a load balancer
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+
+# Load the app once in the master; each worker opens its own Mongo client
+preload_app = True
+
+# Recycle workers periodically to bound memory growth
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    """Make sure the worker never reuses a Mongo client created before fork"""
+    from app.db import reset_after_fork
+    reset_after_fork()
+    server.log.info(f"Worker {worker.pid}: MongoDB client will be created on first request")
+    
+    # Each worker builds its own in-process indexes (the preloaded master builds none)
+    from app.config import Config
+    if Config.MEMORY_INDEX_PRELOAD:
+        from app import warm_memory_indexes
+        warm_memory_indexes(vars(Config))
+
+
+def worker_exit(server, worker):
+    """Close this worker's Mongo connections cleanly"""
+    from app.db import close_db
+    close_db()
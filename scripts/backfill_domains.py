@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Backfill the domains field on existing documents and rebuild domain counts
+Usage: python scripts/backfill_domains.py [--force] [--batch-size 1000]
+
+Run once after upgrading; new and edited entries get domains on write and
+keep domain_counts current incrementally.
+"""
+
+import sys
+import os
+import argparse
+import time
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import get_db, ensure_indexes
+from app.repositories.url_repo import url_repo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--force', action='store_true', help='recompute documents that already have domains')
+    parser.add_argument('--batch-size', type=int, default=1000, help='documents read and written per batch')
+    args = parser.parse_args()
+    
+    print("=" * 50)
+    print("Backfill Domains")
+    print("=" * 50)
+    print()
+    
+    try:
+        print("🔧 Ensuring indexes...")
+        ensure_indexes(get_db())
+        print("  ✓ domains index in place")
+        
+        print("\n🌐 Extracting domains...")
+        start = time.perf_counter()
+        documents = modified = 0
+        for docs in url_repo.iter_missing_domains(args.batch_size, args.force):
+            modified += url_repo.record_domains(docs)
+            documents += len(docs)
+            print(f"  ✓ {documents} document(s) processed")
+        
+        print("\n🔧 Rebuilding domain counts...")
+        total = url_repo.rebuild_domain_counts()
+        elapsed = time.perf_counter() - start
+        
+        print(f"\n📊 {documents} document(s) in {elapsed:.1f}s, {modified} updated")
+        print(f"  • Distinct domains: {total}")
+        for item in url_repo.get_domain_counts(5):
+            print(f"    - {item['domain']}: {item['count']}")
+        print()
+    
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\nOperation cancelled.")
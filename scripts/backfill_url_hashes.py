@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Backfill url_hashes (canonical link hashes) on existing documents
+Usage: python scripts/backfill_url_hashes.py [--force] [--batch-size 1000]
+
+Run once after upgrading; new and edited entries get url_hashes on write.
+Creates the url_hashes index first, then prints a duplicate summary (see
+scripts/find_duplicates.py for the full report).
+"""
+
+import sys
+import os
+import argparse
+import time
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import get_db, ensure_indexes
+from app.repositories.url_repo import url_repo
+from app.services.url_service import document_url_hashes, link_targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--force', action='store_true', help='recompute documents that already have url_hashes')
+    parser.add_argument('--batch-size', type=int, default=1000, help='documents read and written per batch')
+    args = parser.parse_args()
+    
+    print("=" * 50)
+    print("Backfill URL Hashes")
+    print("=" * 50)
+    print()
+    
+    try:
+        print("🔧 Ensuring indexes...")
+        ensure_indexes(get_db())
+        print("  ✓ url_hashes index in place")
+        
+        print("\n🔍 Hashing links...")
+        start = time.perf_counter()
+        documents = modified = repeated = 0
+        for docs in url_repo.iter_missing_url_hashes(args.batch_size, args.force):
+            modified += url_repo.record_url_hashes(docs)
+            documents += len(docs)
+            # Collections listing the same link twice (rejected on new writes)
+            repeated += sum(1 for doc in docs if len(document_url_hashes(doc)) < len(link_targets(doc)))
+            print(f"  ✓ {documents} document(s) processed")
+        elapsed = time.perf_counter() - start
+        
+        duplicates = url_repo.duplicate_links()
+        print(f"\n📊 {documents} document(s) in {elapsed:.1f}s, {modified} updated")
+        print(f"  • Entries repeating a link within themselves: {repeated}")
+        print(f"  • Links stored on more than one entry: {len(duplicates)}")
+        if duplicates:
+            print("    Run python scripts/find_duplicates.py for details")
+        print()
+    
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\nOperation cancelled.")
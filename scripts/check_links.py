@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Check every stored URL and record its health (status, latency) on the document
+Usage: python scripts/check_links.py [--broken-only] [--stale-hours 24] [--concurrency 100] [--per-domain 4]
+
+Broken links can then be listed on the admin dashboard (Links: Broken).
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import Config
+from app.repositories.url_repo import url_repo, BROKEN_LINKS_FILTER
+from app.services.link_checker import LinkChecker, check_catalog
+
+
+def build_query(args):
+    """Which documents to check"""
+    if args.broken_only:
+        return BROKEN_LINKS_FILTER
+    if args.stale_hours:
+        checked_before = datetime.utcnow() - timedelta(hours=args.stale_hours)
+        return {'$or': [
+            {'links_checked_at': {'$exists': False}},
+            {'links_checked_at': {'$lt': checked_before}}
+        ]}
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--broken-only', action='store_true', help='recheck documents with broken links only')
+    parser.add_argument('--stale-hours', type=float, help='only documents not checked in this many hours')
+    parser.add_argument('--concurrency', type=int, default=Config.LINK_CHECK_CONCURRENCY)
+    parser.add_argument('--per-domain', type=int, default=Config.LINK_CHECK_PER_DOMAIN)
+    parser.add_argument('--timeout', type=float, default=Config.LINK_CHECK_TIMEOUT, help='seconds per attempt')
+    parser.add_argument('--retries', type=int, default=Config.LINK_CHECK_RETRIES)
+    parser.add_argument('--batch-size', type=int, default=500, help='documents read and written per batch')
+    args = parser.parse_args()
+    
+    print("=" * 50)
+    print("Link Health Check")
+    print("=" * 50)
+    print()
+    
+    checker = LinkChecker(
+        concurrency=args.concurrency,
+        per_domain=args.per_domain,
+        timeout=args.timeout,
+        retries=args.retries
+    )
+    failures = Counter()
+    
+    def progress(docs, results):
+        broken = [url for url, result in results.items() if not result['ok']]
+        for url in broken:
+            failures[results[url]['status'] or results[url]['error'].split(':')[0]] += 1
+        print(f"  ✓ {len(docs)} document(s), {len(results)} link(s), {len(broken)} broken")
+    
+    try:
+        print(f"🔍 Checking links ({args.concurrency} in flight, {args.per_domain} per domain)...")
+        start = time.perf_counter()
+        totals = asyncio.run(check_catalog(url_repo, checker, args.batch_size, build_query(args), progress))
+        elapsed = time.perf_counter() - start
+        
+        print(f"\n📊 {totals['links']} link(s) on {totals['documents']} document(s) in {elapsed:.1f}s")
+        print(f"  • Broken: {totals['broken']}")
+        print(f"  • Documents updated: {totals['updated']}")
+        if failures:
+            print("\n  Failures by status/error:")
+            for reason, count in failures.most_common(10):
+                print(f"    - {reason}: {count}")
+        print()
+    
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\nOperation cancelled.")
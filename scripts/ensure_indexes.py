@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Create/update MongoDB indexes at deploy time
+Usage: python scripts/ensure_indexes.py [--force]
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db import get_db, ensure_indexes, INDEX_SCHEMA_VERSION
+
+
+def main():
+    print("=" * 50)
+    print("Ensure MongoDB Indexes")
+    print("=" * 50)
+    print()
+    
+    try:
+        db = get_db()
+        force = '--force' in sys.argv[1:]
+        
+        if ensure_indexes(db, force=force):
+            print(f"  ✓ Indexes created for schema v{INDEX_SCHEMA_VERSION}")
+        else:
+            print(f"ℹ️  Index schema v{INDEX_SCHEMA_VERSION} already in place - no changes needed")
+        
+        print("\n📋 Current indexes:")
+        for idx_name, idx_info in db.urls.index_information().items():
+            print(f"  • {idx_name}: {idx_info['key']}")
+        print()
+        
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\nOperation cancelled.")
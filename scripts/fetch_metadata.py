@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Fill in missing titles, descriptions and subtitles from the linked pages
+Usage: python scripts/fetch_metadata.py [--refetch] [--workers 8] [--batch-size 200] [--limit N]
+
+New entries are handled in the background by the web app; this catches up on
+entries it dropped (full queue, restarts) and on imports made by scripts.
+"""
+
+import sys
+import os
+import argparse
+import time
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import Config
+from app.repositories.url_repo import url_repo
+from app.services.metadata_service import (
+    METADATA_PROJECTION, MISSING_METADATA_FILTER, MetadataPipeline
+)
+
+
+def build_query(args):
+    """Which documents to fetch"""
+    if args.refetch:
+        return MISSING_METADATA_FILTER
+    # Pages fetched before had nothing more to offer
+    return {'$and': [MISSING_METADATA_FILTER, {'metadata_fetched_at': {'$exists': False}}]}
+
+
+def iter_batches(query, batch_size, limit=None):
+    """Yield lists of up to batch_size documents"""
+    cursor = url_repo.collection.find(query, METADATA_PROJECTION, batch_size=batch_size).sort('_id', 1)
+    if limit:
+        cursor = cursor.limit(limit)
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--refetch', action='store_true', help='include entries whose pages were fetched before')
+    parser.add_argument('--workers', type=int, default=max(Config.METADATA_WORKERS, 8), help='pages fetched in parallel')
+    parser.add_argument('--timeout', type=float, default=Config.METADATA_TIMEOUT, help='seconds per page')
+    parser.add_argument('--batch-size', type=int, default=200, help='documents read and written per batch')
+    parser.add_argument('--limit', type=int, help='stop after this many documents')
+    args = parser.parse_args()
+    
+    print("=" * 50)
+    print("Page Metadata Backfill")
+    print("=" * 50)
+    print()
+    
+    pipeline = MetadataPipeline(
+        url_repo,
+        workers=args.workers,
+        timeout=args.timeout,
+        max_bytes=Config.METADATA_MAX_BYTES,
+        cache_size=Config.METADATA_CACHE_SIZE,
+        cache_ttl=Config.METADATA_CACHE_TTL,
+        batch_size=args.batch_size
+    )
+    
+    try:
+        print(f"🔍 Fetching pages ({args.workers} in parallel)...")
+        start = time.perf_counter()
+        documents = updated = 0
+        for docs in iter_batches(build_query(args), args.batch_size, args.limit):
+            changed = pipeline.run(docs)
+            documents += len(docs)
+            updated += changed
+            print(f"  ✓ {len(docs)} document(s), {changed} updated")
+        elapsed = time.perf_counter() - start
+        
+        counters = pipeline.stats()
+        print(f"\n📊 {documents} document(s) in {elapsed:.1f}s")
+        print(f"  • Updated: {updated}")
+        print(f"  • Pages fetched: {counters['fetched']}")
+        print(f"  • Pages failed or not HTML: {counters['failed']}")
+        print(f"  • Cache hits: {counters['cache']['hits']}")
+        print()
+    
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\nOperation cancelled.")
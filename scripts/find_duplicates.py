@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Report links stored on more than one entry (after canonicalization)
+Usage: python scripts/find_duplicates.py [--limit 50] [--json]
+
+http/https, host case, trailing slashes, fragments and tracking parameters
+are ignored when comparing links. Needs url_hashes on every document
+(python scripts/backfill_url_hashes.py).
+"""
+
+import sys
+import os
+import argparse
+import json
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.repositories.url_repo import url_repo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--limit', type=int, default=50, help='most repeated links to show (0 for all)')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+    
+    missing = url_repo.collection.count_documents({'url_hashes': {'$exists': False}}, limit=1)
+    duplicates = url_repo.duplicate_links(args.limit or None)
+    
+    if args.json:
+        print(json.dumps(duplicates, indent=2, default=str))
+        return
+    
+    print("=" * 50)
+    print("Duplicate Links")
+    print("=" * 50)
+    print()
+    
+    if missing:
+        print("⚠️  Some documents have no url_hashes yet - run python scripts/backfill_url_hashes.py\n")
+    
+    if not duplicates:
+        print("  ✓ No link is stored on more than one entry")
+        return
+    
+    for group in duplicates:
+        print(f"🔗 {group['url']} ({group['count']} entries)")
+        for entry in group['entries']:
+            print(f"    - {entry['title']} [{entry['_id']}] {entry['url']}")
+    print()
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\nOperation cancelled.")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Rebuild or verify the materialized tag_counts collection
+Usage: python scripts/rebuild_tag_counts.py [--verify]
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.repositories.url_repo import url_repo
+
+
+def verify():
+    """Report tags whose stored count drifted from the urls collection"""
+    print("🔍 Verifying tag counts...")
+    drift = url_repo.verify_tag_counts()
+    
+    if not drift:
+        print("  ✓ tag_counts matches the urls collection")
+        return True
+    
+    print(f"  ✗ {len(drift)} tag(s) drifted:")
+    for item in drift:
+        print(f"    - {item['tag']}: expected {item['expected']}, stored {item['actual']}")
+    return False
+
+
+def rebuild():
+    """Recompute tag_counts from scratch"""
+    print("🔧 Rebuilding tag counts...")
+    total = url_repo.rebuild_tag_counts()
+    print(f"  ✓ Stored counts for {total} tag(s)")
+
+
+def main():
+    print("=" * 50)
+    print("Tag Counts Maintenance")
+    print("=" * 50)
+    print()
+    
+    try:
+        if '--verify' in sys.argv[1:]:
+            if not verify():
+                print("\n💡 Run without --verify to repair the drift")
+                sys.exit(1)
+        else:
+            rebuild()
+            verify()
+        print()
+        
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\nOperation cancelled.")
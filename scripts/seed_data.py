@@ -11,6 +11,8 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.db import get_db
+from app.repositories.url_repo import url_repo
+from app.services.url_service import document_domains, document_url_hashes
 from datetime import datetime, timedelta
 import random
 
@@ -142,6 +144,13 @@ def seed_database():
             
             url_data['created_at'] = created_at
             url_data['updated_at'] = created_at
+            # Written directly (to keep the varied dates), so derive what create() would
+            url_data['url_hashes'] = document_url_hashes(url_data)
+            url_data['domains'] = document_domains(url_data)
+            if url_repo.find_duplicate(url_data['url_hashes']):
+                print(f"  ✗ [{i}/{len(SAMPLE_URLS)}] {url_data['title']} (already exists)")
+                skipped_count += 1
+                continue
             
             try:
                 urls_collection.insert_one(url_data)
@@ -151,6 +160,11 @@ def seed_database():
                 print(f"  ✗ [{i}/{len(SAMPLE_URLS)}] {url_data['title']} (already exists)")
                 skipped_count += 1
         
+        # Inserts above bypass the repository, so refresh the materialized counts
+        # (which also bumps the catalog version used for HTTP caching)
+        url_repo.rebuild_tag_counts()
+        url_repo.rebuild_domain_counts()
+        
         # Show results
         print("\n" + "=" * 50)
         print("✓ Seeding complete!")
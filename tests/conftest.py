@@ -0,0 +1,121 @@
+"""
+Shared fixtures: a local HTTP stub server and an optional real MongoDB
+Usage: python -m pytest
+
+Database tests need a disposable MongoDB; set TEST_MONGO_URI (its
+database is dropped afterwards) or they are skipped.
+"""
+
+import sys
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class Route:
+    """Canned answer for one path: status, headers and body, optionally after a delay"""
+    
+    def __init__(self, status=200, headers=None, body=b'', delay=0.0, methods=None):
+        self.status = status
+        self.headers = headers or {}
+        self.body = body
+        self.delay = delay
+        # Per-method status overrides, e.g. {'HEAD': 405}
+        self.methods = methods or {}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_HEAD(self):
+        self._answer(send_body=False)
+    
+    def do_GET(self):
+        self._answer(send_body=True)
+    
+    def _answer(self, send_body):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path, self.headers.get('Host')))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            route = server.routes.get(self.path.split('?')[0]) or Route(404, body=b'not found')
+            if route.delay:
+                time.sleep(route.delay)
+            status = route.methods.get(self.command, route.status)
+            self.send_response(status)
+            for name, value in route.headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(route.body)))
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            if send_body:
+                self.wfile.write(route.body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up (timeouts)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+class StubServer(ThreadingHTTPServer):
+    """http.server on 127.0.0.1 answering from a route table and recording every request"""
+    
+    daemon_threads = True
+    block_on_close = False
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.routes = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+    
+    def route(self, path, *args, **kwargs):
+        self.routes[path] = Route(*args, **kwargs)
+    
+    def url(self, path, host='127.0.0.1'):
+        """URL of path on this server; host='localhost' reaches it under a second domain"""
+        return f'http://{host}:{self.server_port}{path}'
+
+
+@pytest.fixture
+def http_server():
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def mongo_db():
+    """A real, disposable database from TEST_MONGO_URI, wired into app.db for the test"""
+    uri = os.getenv('TEST_MONGO_URI')
+    if not uri:
+        pytest.skip('set TEST_MONGO_URI to run database tests')
+    from pymongo import MongoClient
+    import app.db
+    
+    client = MongoClient(uri, serverSelectionTimeoutMS=3000)
+    db = client[f'url_organizer_test_{os.getpid()}']
+    previous = app.db._db, app.db._client, app.db._pid
+    app.db._db, app.db._client, app.db._pid = db, client, os.getpid()
+    try:
+        yield db
+    finally:
+        app.db._db, app.db._client, app.db._pid = previous
+        client.drop_database(db.name)
+        client.close()
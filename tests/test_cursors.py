@@ -0,0 +1,52 @@
+"""Keyset pagination cursors (pure functions, no database)"""
+
+import base64
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.repositories.url_repo import decode_cursor, encode_cursor
+
+OID = ObjectId('65a1b2c3d4e5f60718293a4b')
+
+
+def token(raw):
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('created_at, direction', [
+    (datetime(2024, 5, 17, 12, 30, 45, 123000), 'next'),
+    (datetime(2024, 5, 17, 12, 30, 45, 123000), 'prev'),
+    (datetime(1970, 1, 1), 'next'),
+    (datetime(1969, 12, 31, 23, 59, 59), 'next'),
+    (datetime(2999, 1, 1), 'prev'),
+])
+def test_cursor_round_trips(created_at, direction):
+    encoded = encode_cursor({'created_at': created_at, '_id': OID}, direction)
+    assert '=' not in encoded
+    assert decode_cursor(encoded) == (created_at, OID, direction)
+
+
+def test_cursor_keeps_milliseconds_only():
+    # MongoDB stores dates with millisecond precision, so finer parts never match anyway
+    encoded = encode_cursor({'created_at': datetime(2024, 1, 1, 0, 0, 0, 999999), '_id': OID})
+    assert decode_cursor(encoded)[0] == datetime(2024, 1, 1, 0, 0, 0, 999000)
+
+
+def test_missing_created_at_sorts_as_the_epoch():
+    assert decode_cursor(encode_cursor({'_id': OID}))[0] == datetime(1970, 1, 1)
+
+
+@pytest.mark.parametrize('value', [
+    '',
+    'not base64!',
+    token('1715949045123.65a1b2c3d4e5f60718293a4b.sideways'),
+    token('1715949045123.not-an-object-id.next'),
+    token('soon.65a1b2c3d4e5f60718293a4b.next'),
+    token('1715949045123.65a1b2c3d4e5f60718293a4b'),
+    token('1715949045123.65a1b2c3d4e5f60718293a4b.next.extra'),
+    base64.urlsafe_b64encode(b'\xff\xfe.\x00').decode(),
+])
+def test_invalid_cursors_decode_to_none(value):
+    assert decode_cursor(value) is None
@@ -0,0 +1,64 @@
+"""The shared generation counter file refuses paths other accounts could tamper with"""
+
+import os
+
+import pytest
+
+from app.invalidation import FileGeneration, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason='no shared counter on this platform')
+
+
+@pytest.fixture
+def private_dir(tmp_path):
+    directory = tmp_path / 'private'
+    directory.mkdir(mode=0o700)
+    return directory
+
+
+def test_counter_is_created_private_and_counts(private_dir):
+    counter = FileGeneration(str(private_dir / 'generation'))
+    assert counter.read() == 0
+    assert counter.bump() == (0, 1)
+    assert FileGeneration(str(private_dir / 'generation')).read() == 1
+    assert os.stat(private_dir / 'generation').st_mode & 0o777 == 0o600
+
+
+def test_missing_directory_is_created_0700(tmp_path):
+    directory = tmp_path / 'new'
+    FileGeneration(str(directory / 'generation')).read()
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+
+
+def test_symlink_is_not_followed(private_dir, tmp_path):
+    target = tmp_path / 'elsewhere'
+    target.write_bytes(b'\0' * 8)
+    os.symlink(target, private_dir / 'generation')
+    with pytest.raises(OSError):
+        FileGeneration(str(private_dir / 'generation')).read()
+
+
+def test_group_writable_file_is_refused(private_dir):
+    path = private_dir / 'generation'
+    path.write_bytes(b'\0' * 8)
+    os.chmod(path, 0o660)
+    with pytest.raises(ValueError):
+        FileGeneration(str(path)).read()
+
+
+def test_shared_directory_is_refused(tmp_path):
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    os.chmod(shared, 0o1777)
+    with pytest.raises(ValueError):
+        FileGeneration(str(shared / 'generation')).read()
+
+
+@pytest.mark.skipif(not hasattr(os, 'geteuid') or os.geteuid() != 0, reason='needs root to chown')
+def test_file_owned_by_another_user_is_refused(private_dir):
+    path = private_dir / 'generation'
+    path.write_bytes(b'\0' * 8)
+    os.chmod(path, 0o600)
+    os.chown(path, 65534, -1)
+    with pytest.raises(ValueError):
+        FileGeneration(str(path)).read()
@@ -0,0 +1,214 @@
+"""Link checker against a local stand-in server, and the link-health write-back"""
+
+import asyncio
+
+import pytest
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.repositories.url_repo import BROKEN_LINKS_FILTER, URLRepository
+from app.services.link_checker import LinkChecker, MAX_REDIRECTS
+from app.services.url_service import document_url_hashes
+
+
+def check(checker, url):
+    return asyncio.run(checker.check(url))
+
+
+def fast_checker(**kwargs):
+    options = {'timeout': 2.0, 'retries': 0, 'backoff': 0}
+    options.update(kwargs)
+    return LinkChecker(**options)
+
+
+def test_2xx_is_ok_after_a_single_head(http_server):
+    http_server.route('/ok', 200)
+    result = check(fast_checker(), http_server.url('/ok'))
+    assert result['ok'] and result['status'] == 200 and result['error'] is None
+    assert 'final_url' not in result
+    assert [method for method, _, _ in http_server.requests] == ['HEAD']
+
+
+def test_404_is_broken_and_confirmed_with_get(http_server):
+    result = check(fast_checker(), http_server.url('/missing'))
+    assert not result['ok'] and result['status'] == 404
+    assert [method for method, _, _ in http_server.requests] == ['HEAD', 'GET']
+
+
+def test_head_rejection_falls_back_to_get(http_server):
+    http_server.route('/no-head', 200, methods={'HEAD': 405})
+    result = check(fast_checker(), http_server.url('/no-head'))
+    assert result['ok'] and result['status'] == 200
+
+
+def test_500_is_broken_without_retries(http_server):
+    http_server.route('/error', 500)
+    result = check(fast_checker(retries=2), http_server.url('/error'))
+    assert not result['ok'] and result['status'] == 500
+    assert len(http_server.requests) == 2  # HEAD, then GET; 500 is not retryable
+
+
+def test_503_is_retried_then_reported(http_server):
+    http_server.route('/unavailable', 503)
+    result = check(fast_checker(retries=2), http_server.url('/unavailable'))
+    assert not result['ok'] and result['status'] == 503
+    assert len(http_server.requests) == 3
+
+
+def test_redirect_chain_is_followed_to_the_final_url(http_server):
+    http_server.route('/a', 301, headers={'Location': '/b'})
+    http_server.route('/b', 302, headers={'Location': http_server.url('/c')})
+    http_server.route('/c', 307, headers={'Location': '/final'})
+    http_server.route('/final', 200)
+    result = check(fast_checker(), http_server.url('/a'))
+    assert result['ok'] and result['status'] == 200
+    assert result['final_url'] == http_server.url('/final')
+    assert [path for _, path, _ in http_server.requests] == ['/a', '/b', '/c', '/final']
+
+
+def test_redirect_loop_stops_after_max_redirects(http_server):
+    http_server.route('/loop', 302, headers={'Location': '/loop'})
+    result = check(fast_checker(), http_server.url('/loop'))
+    assert result['status'] == 302
+    assert len([method for method, _, _ in http_server.requests if method == 'HEAD']) == MAX_REDIRECTS + 1
+
+
+def test_timeout_is_reported_as_an_error(http_server):
+    http_server.route('/slow', 200, delay=1.0)
+    result = check(fast_checker(timeout=0.2), http_server.url('/slow'))
+    assert not result['ok'] and result['status'] is None
+    assert result['error'] == 'timeout after 0.2s'
+
+
+def test_per_host_concurrency_is_capped(http_server):
+    for n in range(8):
+        http_server.route(f'/page{n}', 200, delay=0.15)
+    checker = fast_checker(per_domain=2, concurrency=50)
+    urls = [http_server.url(f'/page{n}') for n in range(8)]
+    results = asyncio.run(checker.check_many(urls))
+    assert all(result['ok'] for result in results.values())
+    assert http_server.max_active == 2
+
+
+def test_hosts_have_separate_limits(http_server):
+    for n in range(8):
+        http_server.route(f'/page{n}', 200, delay=0.15)
+    checker = fast_checker(per_domain=2, concurrency=50)
+    urls = [http_server.url(f'/page{n}', host=host) for n in range(4) for host in ('127.0.0.1', 'localhost')]
+    asyncio.run(checker.check_many(urls))
+    assert http_server.max_active > 2
+
+
+def test_check_many_checks_duplicates_once(http_server):
+    http_server.route('/ok', 200)
+    url = http_server.url('/ok')
+    results = asyncio.run(fast_checker().check_many([url, url, url]))
+    assert list(results) == [url]
+    assert len(http_server.requests) == 1
+
+
+class Anything:
+    def __eq__(self, other):
+        return True
+
+
+class RecordingCollection:
+    """Collects the bulk operations record_link_health sends"""
+    
+    def __init__(self):
+        self.operations = []
+    
+    def bulk_write(self, operations, ordered=True):
+        self.operations.extend(operations)
+        
+        class Result:
+            matched_count = len(operations)
+        return Result()
+
+
+def link_health_docs():
+    single = {'_id': ObjectId(), 'url': 'https://ok.example/'}
+    collection = {'_id': ObjectId(), 'urls': [
+        {'url': 'https://ok.example/a'},
+        {'url': 'https://gone.example/b'},
+        {'url': 'https://unchecked.example/c'}
+    ]}
+    results = {
+        'https://ok.example/': {'ok': True, 'status': 200},
+        'https://ok.example/a': {'ok': True, 'status': 200},
+        'https://gone.example/b': {'ok': False, 'status': 404}
+    }
+    return single, collection, results
+
+
+def test_record_link_health_pins_each_checked_url(monkeypatch):
+    recording = RecordingCollection()
+    monkeypatch.setattr(URLRepository, 'collection', property(lambda self: recording))
+    single, collection, results = link_health_docs()
+    
+    matched = URLRepository().record_link_health([single, collection], results, chunk_size=1)
+    
+    assert matched == 2
+    assert recording.operations == [
+        UpdateOne(
+            {'_id': single['_id'], 'url': 'https://ok.example/'},
+            {'$set': {'links_checked_at': Anything(), 'link_health': results['https://ok.example/'],
+                      'broken_links': 0}}
+        ),
+        UpdateOne(
+            {'_id': collection['_id'], 'urls.0.url': 'https://ok.example/a', 'urls.1.url': 'https://gone.example/b'},
+            {'$set': {'links_checked_at': Anything(), 'urls.0.link_health': results['https://ok.example/a'],
+                      'urls.1.link_health': results['https://gone.example/b'], 'broken_links': 1}}
+        )
+    ]
+
+
+def test_record_link_health_writes_to_mongodb(mongo_db):
+    repo = URLRepository()
+    single, collection, results = link_health_docs()
+    edited = {'_id': ObjectId(), 'urls': [{'url': 'https://moved.example/'}, {'url': 'https://ok.example/a2'}]}
+    mongo_db.urls.insert_many([single, collection, edited])
+    # Checked as it was read, then edited before the write-back
+    checked_edited = {'_id': edited['_id'], 'urls': [{'url': 'https://ok.example/old'}]}
+    results['https://ok.example/old'] = {'ok': True, 'status': 200}
+    
+    matched = repo.record_link_health([single, collection, checked_edited], results)
+    
+    assert matched == 2
+    stored = mongo_db.urls.find_one({'_id': collection['_id']})
+    assert [item.get('link_health', {}).get('status') for item in stored['urls']] == [200, 404, None]
+    assert stored['broken_links'] == 1
+    assert mongo_db.urls.find_one({'_id': single['_id']})['link_health']['status'] == 200
+    assert 'links_checked_at' not in mongo_db.urls.find_one({'_id': edited['_id']})
+
+
+def test_replacing_links_drops_their_health(mongo_db):
+    repo = URLRepository()
+    single, collection, results = link_health_docs()
+    results['https://ok.example/'] = {'ok': False, 'status': 500}
+    for doc in (single, collection):
+        doc['url_hashes'] = document_url_hashes(doc)
+    mongo_db.urls.insert_many([single, collection])
+    repo.record_link_health([single, collection], results)
+    assert mongo_db.urls.count_documents(BROKEN_LINKS_FILTER) == 2
+    
+    # Resending the same links (as the edit form does) keeps the last check
+    assert repo.update(str(single['_id']), {'title': 'Renamed', 'url': 'https://ok.example/'})
+    assert repo.update(str(collection['_id']), {'urls': [{'url': item['url'], 'subtitle': ''} for item in collection['urls']]})
+    stored = mongo_db.urls.find_one({'_id': collection['_id']})
+    assert [item.get('link_health', {}).get('status') for item in stored['urls']] == [200, 404, None]
+    assert mongo_db.urls.count_documents(BROKEN_LINKS_FILTER) == 2
+    
+    assert repo.update(str(single['_id']), {'url': 'https://fixed.example/'})
+    assert repo.update(str(collection['_id']), {'urls': [{'url': 'https://ok.example/a', 'subtitle': ''},
+                                                         {'url': 'https://fixed.example/b', 'subtitle': ''}]})
+    assert mongo_db.urls.count_documents(BROKEN_LINKS_FILTER) == 0
+    for doc in mongo_db.urls.find():
+        assert not {'link_health', 'broken_links', 'links_checked_at'} & set(doc)
+        assert all('link_health' not in item for item in doc.get('urls', []))
+
+
+@pytest.mark.parametrize('status, ok', [(200, True), (204, True), (404, False), (410, False), (500, False)])
+def test_status_classification(http_server, status, ok):
+    http_server.route('/status', status)
+    assert check(fast_checker(), http_server.url('/status'))['ok'] is ok
@@ -0,0 +1,143 @@
+"""Page metadata fetching against a local stand-in server, and what gets written back"""
+
+from bson import ObjectId
+
+from app.repositories.url_repo import URLRepository
+from app.services.metadata_service import MetadataPipeline, fetch_metadata
+
+HTML = {'Content-Type': 'text/html; charset=utf-8'}
+
+PAGE = b"""<!doctype html>
+<html><head>
+<title>  Example
+  Page </title>
+<meta name="description" content="What the page is about">
+<link rel="canonical" href="/canonical">
+</head>
+<body>
+<title>Not the title</title>
+<meta name="description" content="Not the description">
+""" + b'<p>filler</p>' * 50000 + b'</body></html>'
+
+
+def test_title_description_and_canonical_come_from_the_head(http_server):
+    http_server.route('/page', 200, headers=HTML, body=PAGE)
+    metadata = fetch_metadata(http_server.url('/page'))
+    assert metadata == {
+        'title': 'Example Page',
+        'description': 'What the page is about',
+        'canonical_url': http_server.url('/canonical')
+    }
+
+
+def test_open_graph_fields_fill_in_for_missing_ones(http_server):
+    body = (
+        b'<html><head><meta property="og:title" content="OG title">'
+        b'<meta name="twitter:description" content="Card text"></head></html>'
+    )
+    http_server.route('/og', 200, headers=HTML, body=body)
+    metadata = fetch_metadata(http_server.url('/og'))
+    assert metadata == {'title': 'OG title', 'description': 'Card text', 'canonical_url': None}
+
+
+def test_charset_is_read_from_the_meta_tag(http_server):
+    body = '<html><head><meta charset="iso-8859-1"><title>Café</title></head>'.encode('iso-8859-1')
+    http_server.route('/latin1', 200, headers={'Content-Type': 'text/html'}, body=body)
+    assert fetch_metadata(http_server.url('/latin1'))['title'] == 'Café'
+
+
+def test_redirects_are_followed_and_canonical_resolves_against_the_final_url(http_server):
+    http_server.route('/old', 301, headers={'Location': '/moved/'})
+    http_server.route('/moved/', 302, headers={'Location': http_server.url('/new/page')})
+    http_server.route('/new/page', 200, headers=HTML, body=b'<head><title>New</title><link rel="canonical" href="here">')
+    metadata = fetch_metadata(http_server.url('/old'))
+    assert metadata['title'] == 'New'
+    assert metadata['canonical_url'] == http_server.url('/new/here')
+    assert [path for _, path, _ in http_server.requests] == ['/old', '/moved/', '/new/page']
+
+
+def test_timeout_returns_none(http_server):
+    http_server.route('/slow', 200, headers=HTML, body=PAGE, delay=1.0)
+    assert fetch_metadata(http_server.url('/slow'), timeout=0.2) is None
+
+
+def test_non_html_and_error_responses_return_none(http_server):
+    http_server.route('/data.json', 200, headers={'Content-Type': 'application/json'}, body=b'{"title": "x"}')
+    http_server.route('/file.pdf', 200, headers={'Content-Type': 'application/pdf'}, body=b'%PDF-1.4')
+    http_server.route('/gone', 410, headers=HTML, body=b'<title>Gone</title>')
+    for path in ('/data.json', '/file.pdf', '/gone', '/missing'):
+        assert fetch_metadata(http_server.url(path)) is None
+
+
+def test_fetches_are_cached_by_normalized_url(http_server):
+    http_server.route('/page', 200, headers=HTML, body=PAGE)
+    pipeline = MetadataPipeline(None, timeout=2.0)
+    first = pipeline.fetch(http_server.url('/page'))
+    assert pipeline.fetch(http_server.url('/page#section')) == first
+    assert len(http_server.requests) == 1
+
+
+def planned_sets(updates):
+    """Fields each planned update sets, fetch time left out"""
+    return [
+        sorted(key for key in update['$set'] if key != 'metadata_fetched_at')
+        for _, update in updates
+    ]
+
+
+def test_only_missing_fields_are_planned(http_server):
+    http_server.route('/page', 200, headers=HTML, body=PAGE)
+    http_server.route('/other', 200, headers=HTML, body=b'<head><title>Other page</title></head>')
+    pipeline = MetadataPipeline(None, timeout=2.0)
+    
+    complete = {'_id': ObjectId(), 'title': 'Mine', 'description': 'Kept', 'url': http_server.url('/page')}
+    assert planned_sets(pipeline.plan_updates(complete)) == [['canonical_url']]
+    
+    pending = {'_id': ObjectId(), 'title': 'example.com', 'title_pending': True, 'description': '',
+               'url': http_server.url('/page')}
+    updates = pipeline.plan_updates(pending)
+    assert planned_sets(updates) == [['canonical_url'], ['title'], ['description']]
+    assert updates[1] == (
+        {'_id': pending['_id'], 'title': 'example.com', 'title_pending': True},
+        {'$set': {'title': 'Example Page'}, '$unset': {'title_pending': ''}}
+    )
+    
+    collection = {'_id': ObjectId(), 'title': 'Reading', 'description': 'Kept', 'urls': [
+        {'url': http_server.url('/page'), 'subtitle': 'Named already'},
+        {'url': http_server.url('/other'), 'subtitle': ''}
+    ]}
+    updates = pipeline.plan_updates(collection)
+    assert planned_sets(updates) == [['canonical_url'], ['urls.1.subtitle']]
+    assert updates[1][0]['urls.1.url'] == http_server.url('/other')
+    assert updates[1][1] == {'$set': {'urls.1.subtitle': 'Other page'}}
+
+
+def test_unreachable_page_plans_nothing(http_server):
+    pipeline = MetadataPipeline(None, timeout=2.0)
+    doc = {'_id': ObjectId(), 'title': 'x', 'title_pending': True, 'url': http_server.url('/missing')}
+    assert pipeline.plan_updates(doc) == []
+
+
+def test_catalog_is_bumped_only_when_a_visible_field_changes(http_server, mongo_db, monkeypatch):
+    http_server.route('/page', 200, headers=HTML, body=PAGE)
+    repo = URLRepository()
+    bumps = []
+    monkeypatch.setattr(repo, 'touch_catalog', lambda: bumps.append(1))
+    pipeline = MetadataPipeline(repo, timeout=2.0)
+    url = http_server.url('/page')
+    complete = {'_id': ObjectId(), 'title': 'Mine', 'description': 'Kept', 'url': url,
+                'canonical_url': http_server.url('/canonical')}
+    pending = {'_id': ObjectId(), 'title': 'example.com', 'title_pending': True, 'description': '', 'url': url}
+    mongo_db.urls.insert_many([complete, pending])
+    
+    # Nothing to fill: the fetch is recorded, the catalog left alone
+    assert repo.apply_metadata(pipeline.plan_updates(complete)) == 0
+    assert bumps == []
+    stored = mongo_db.urls.find_one({'_id': complete['_id']})
+    assert stored['metadata_fetched_at'] and stored['title'] == 'Mine'
+    
+    assert repo.apply_metadata(pipeline.plan_updates(pending)) == 1
+    assert bumps == [1]
+    stored = mongo_db.urls.find_one({'_id': pending['_id']})
+    assert (stored['title'], stored['description']) == ('Example Page', 'What the page is about')
+    assert 'title_pending' not in stored